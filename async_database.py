@@ -0,0 +1,180 @@
+# async_database.py
+import time
+import queue
+import asyncio
+import logging
+import threading
+
+from config import DB_BATCH_SIZE
+from cache import MISSING
+from metrics import DB_LATENCY
+
+
+class AsyncDatabase:
+    """واجهة غير متزامنة لقاعدة البيانات تنفذ الاستعلامات على خيط مخصص"""
+
+    def __init__(self, db, batch_size=DB_BATCH_SIZE):
+        self.db = db
+        self.groups = db.groups
+        self.users = db.users
+        self.batch_size = batch_size
+        self._requests = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._worker, name='database', daemon=True)
+        self._thread.start()
+
+        # إحصائيات
+        self.batches = 0
+        self.requests = 0
+
+    def _worker(self):
+        """تنفيذ الطلبات على دفعات داخل معاملة واحدة لكل دفعة"""
+        while True:
+            item = self._requests.get()
+            if item is None:
+                break
+
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._requests.put(None)
+                    break
+                batch.append(item)
+
+            results = []
+            try:
+                with self.db.transaction():
+                    for func, args, future, loop in batch:
+                        try:
+                            results.append((future, loop, func(*args), None))
+                        except Exception as e:
+                            results.append((future, loop, None, e))
+            except Exception as e:
+                # فشل BEGIN أو COMMIT أو الاتصال: لم يحفظ شيء من الدفعة، والخيط يستمر للدفعات التالية
+                logging.error(f"❌ Database batch of {len(batch)} requests failed: {e}")
+                results = [(future, loop, None, e) for _, _, future, loop in batch]
+
+            self.batches += 1
+            self.requests += len(batch)
+
+            # إيقاظ كل حلقة أحداث مرة واحدة فقط لكل دفعة
+            by_loop = {}
+            for future, loop, result, error in results:
+                by_loop.setdefault(loop, []).append((future, result, error))
+            for loop, items in by_loop.items():
+                try:
+                    loop.call_soon_threadsafe(self._resolve, items)
+                except RuntimeError:
+                    logging.error("❌ Event loop closed before database results were delivered")
+
+        self.db.close()
+
+    @staticmethod
+    def _resolve(items):
+        for future, result, error in items:
+            if future.cancelled():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    async def _call(self, func, *args):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        start = time.perf_counter()
+        self._requests.put((func, args, future, loop))
+        try:
+            return await future
+        finally:
+            DB_LATENCY.observe(time.perf_counter() - start, func.__name__)
+
+    async def close(self):
+        """إيقاف خيط قاعدة البيانات بعد تنفيذ الطلبات المعلقة"""
+        if self._thread.is_alive():
+            self._requests.put(None)
+            await asyncio.to_thread(self._thread.join)
+
+    @property
+    def queue_depth(self):
+        return self._requests.qsize()
+
+    # دوال الجروبات
+    async def add_group(self, group_username, group_chat_id, keyword, language='ar'):
+        return await self._call(self.db.add_group, group_username, group_chat_id, keyword, language)
+
+    async def get_group(self, group_username):
+        return await self._call(self.db.get_group, group_username)
+
+    async def get_all_groups(self):
+        return await self._call(self.db.get_all_groups)
+
+    async def load_group_registry(self):
+        return await self._call(self.db.load_group_registry)
+
+    async def get_registry_version(self):
+        return await self._call(self.db.get_registry_version)
+
+    # دوال القنوات
+    async def add_group_channel(self, group_username, channel_username):
+        return await self._call(self.db.add_group_channel, group_username, channel_username)
+
+    async def get_group_channel(self, group_username):
+        return await self._call(self.db.get_group_channel, group_username)
+
+    # دوال المستخدمين
+    async def add_user(self, user_id, username, first_name, language='ar'):
+        return await self._call(self.db.add_user, user_id, username, first_name, language)
+
+    async def get_user(self, user_id):
+        # القراءة من الذاكرة المؤقتة مباشرة بدون المرور بخيط قاعدة البيانات
+        row = self.users.get(user_id, MISSING)
+        if row is not MISSING:
+            return row
+        return await self._call(self.db.load_user, user_id)
+
+    async def update_user_language(self, user_id, language):
+        return await self._call(self.db.update_user_language, user_id, language)
+
+    # دوال الإحصائيات
+    async def get_stats(self):
+        return await self._call(self.db.get_stats)
+
+    async def rebuild_counters(self):
+        return await self._call(self.db.rebuild_counters)
+
+    async def get_group_stats(self, group_username, top=5):
+        return await self._call(self.db.get_group_stats, group_username, top)
+
+    # دوال التسجيل
+    async def log_deleted_message(self, group_username, user_id, user_name, message_text, language, reason):
+        return await self._call(
+            self.db.log_deleted_message,
+            group_username, user_id, user_name, message_text, language, reason
+        )
+
+    async def log_deleted_messages(self, records):
+        return await self._call(self.db.log_deleted_messages, records)
+
+    # دوال الاحتفاظ والأرشفة
+    async def fetch_expired_messages(self, before, limit):
+        return await self._call(self.db.fetch_expired_messages, before, limit)
+
+    async def delete_archived_messages(self, ids):
+        return await self._call(self.db.delete_archived_messages, ids)
+
+    async def incremental_vacuum(self, pages):
+        return await self._call(self.db.incremental_vacuum, pages)
+
+    # دوال الحذف المؤجل
+    async def schedule_deletion(self, chat_id, message_id, due_at):
+        return await self._call(self.db.schedule_deletion, chat_id, message_id, due_at)
+
+    async def pop_due_deletions(self, now, limit):
+        return await self._call(self.db.pop_due_deletions, now, limit)
+
+    async def next_deletion_due(self):
+        return await self._call(self.db.next_deletion_due)
@@ -0,0 +1,106 @@
+# audit.py
+import time
+import asyncio
+import logging
+
+from config import AUDIT_BATCH_SIZE, AUDIT_FLUSH_INTERVAL, AUDIT_MAX_PENDING
+
+
+class AuditLogger:
+    """سجل مؤجل للرسائل المحذوفة يكتبها على دفعات في معاملة واحدة"""
+
+    def __init__(self, db, batch_size=AUDIT_BATCH_SIZE, flush_interval=AUDIT_FLUSH_INTERVAL,
+                 max_pending=AUDIT_MAX_PENDING):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = []
+        self._wakeup = None
+        self._task = None
+        self._flush_lock = None
+
+        # إحصائيات
+        self.flushes = 0
+        self.flushed_records = 0
+        self.dropped_records = 0
+        self.last_flush_latency = 0.0
+        self.max_flush_latency = 0.0
+
+    def log(self, group_username, user_id, user_name, message_text, language, reason):
+        """إضافة سجل حذف إلى الطابور بدون انتظار"""
+        self._pending.append((group_username, user_id, user_name, message_text, language, reason))
+
+        if len(self._pending) > self.max_pending:
+            overflow = len(self._pending) - self.max_pending
+            del self._pending[:overflow]
+            self.dropped_records += overflow
+            logging.error(f"❌ Audit queue full, dropped {overflow} records")
+
+        if self._wakeup is not None and len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def start(self):
+        """تشغيل مهمة الكتابة في الخلفية"""
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """إيقاف المهمة وكتابة كل السجلات المتبقية"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """كتابة السجلات المعلقة في معاملة واحدة"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            while self._pending:
+                batch = self._pending[:self.batch_size]
+                del self._pending[:len(batch)]
+
+                start = time.perf_counter()
+                success = await self.db.log_deleted_messages(batch)
+                latency = time.perf_counter() - start
+
+                if not success:
+                    # إعادة الدفعة إلى بداية الطابور للمحاولة لاحقاً
+                    self._pending[:0] = batch
+                    return
+
+                self.flushes += 1
+                self.flushed_records += len(batch)
+                self.last_flush_latency = latency
+                self.max_flush_latency = max(self.max_flush_latency, latency)
+
+    @property
+    def queue_depth(self):
+        return len(self._pending)
+
+    def stats(self):
+        """إحصائيات السجل المؤجل"""
+        return {
+            'queue_depth': self.queue_depth,
+            'flushes': self.flushes,
+            'flushed_records': self.flushed_records,
+            'dropped_records': self.dropped_records,
+            'last_flush_latency': self.last_flush_latency,
+            'max_flush_latency': self.max_flush_latency
+        }
@@ -0,0 +1,287 @@
+# bench.py
+"""مقاييس أداء مصغرة للبوت
+
+الاستخدام:
+    python bench.py            # تشغيل كل المقاييس
+    python bench.py db         # تشغيل مقياس واحد
+"""
+import os
+import sys
+import time
+import asyncio
+import sqlite3
+import logging
+import tempfile
+import tracemalloc
+from types import SimpleNamespace
+from contextlib import contextmanager
+
+from config import DATABASE_URL
+from database import Database
+from database_memory import MemoryDatabase
+from migrations import HOT_QUERIES, explain_query_plan
+from matcher import KeywordMatcher
+from processor import ChatOrderedUpdateProcessor
+from texts import TEXTS, get_text
+import utils
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """تسجيل دالة كمقياس أداء"""
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+def measure(func, iterations):
+    """قياس عدد العمليات في الثانية"""
+    start = time.perf_counter()
+    for i in range(iterations):
+        func(i)
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed if elapsed else float('inf')
+
+
+def report(title, rows):
+    """طباعة جدول نتائج"""
+    print(f"\n{title}")
+    for label, value in rows:
+        print(f"  {label:<45} {value}")
+
+
+@contextmanager
+def temp_db_path():
+    """مسار ملف قاعدة بيانات مؤقت"""
+    with tempfile.TemporaryDirectory() as directory:
+        yield os.path.join(directory, 'bench.db')
+
+
+class PerCallConnectDatabase(Database):
+    """السلوك القديم: اتصال جديد لكل عملية"""
+
+    @contextmanager
+    def get_connection(self):
+        conn = sqlite3.connect(self.db_name, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        with conn:
+            yield conn
+
+
+@benchmark('db')
+def bench_db(iterations=2000):
+    """مقارنة الاتصال الدائم مع إنشاء اتصال لكل عملية ومع محرك الذاكرة"""
+    rows = []
+    engines = (
+        ('per-call connect', PerCallConnectDatabase),
+        ('persistent connection', Database),
+        ('in-memory engine', lambda path: MemoryDatabase()),
+    )
+    for label, factory in engines:
+        with temp_db_path() as path:
+            db = factory(path)
+            for user_id in range(100):
+                db.add_user(user_id, f'user{user_id}', 'User')
+            db.add_group('@group', -100, 'keyword')
+
+            get_user = measure(lambda i: db.load_user(i % 100), iterations)
+            get_group = measure(lambda i: db.get_group('@group'), iterations)
+            log_deleted = measure(
+                lambda i: db.log_deleted_message('@group', i, 'User', 'spam', 'ar', 'bench'),
+                iterations
+            )
+            db.close()
+
+        rows.append((f'{label}: get_user (uncached)', f'{get_user:,.0f} ops/s'))
+        rows.append((f'{label}: get_group', f'{get_group:,.0f} ops/s'))
+        rows.append((f'{label}: log_deleted_message', f'{log_deleted:,.0f} ops/s'))
+    report('Database connection reuse', rows)
+
+
+@benchmark('postgres')
+def bench_postgres(iterations=500):
+    """التحقق من إعادة استخدام اتصالات PostgreSQL عبر المجمع (يتطلب DATABASE_URL)"""
+    if not DATABASE_URL.startswith('postgresql://'):
+        report('PostgreSQL connection pool', [('skipped', 'set DATABASE_URL=postgresql://...')])
+        return
+
+    import psycopg2
+    from database_railway import Database as PostgresDatabase, PreparedConnection
+
+    db = PostgresDatabase(DATABASE_URL)
+    db.add_user(1, 'bench', 'Bench')
+    db.add_group('@bench_group', -100, 'keyword')
+    opened_before = PreparedConnection.opened
+
+    backends = set()
+
+    def pooled_call(i):
+        db.load_user(1)
+        db.get_group('@bench_group')
+        db.log_deleted_message('@bench_group', i, 'Bench', 'spam', 'ar', 'bench')
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT pg_backend_pid()')
+            backends.add(cursor.fetchone()[0])
+
+    def per_call_connect(i):
+        conn = psycopg2.connect(DATABASE_URL)
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM user_settings WHERE user_id = %s', (1,))
+            cursor.fetchone()
+        finally:
+            conn.close()
+
+    pooled = measure(pooled_call, iterations)
+    connect = measure(per_call_connect, iterations // 5)
+
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM deleted_messages WHERE reason = 'bench'")
+    db.close()
+
+    report('PostgreSQL connection pool', [
+        ('pooled iterations (4 queries each)', f'{pooled:,.0f} it/s'),
+        ('per-call psycopg2.connect (1 query)', f'{connect:,.0f} it/s'),
+        ('connections opened during pooled run', PreparedConnection.opened - opened_before),
+        ('distinct server backends used', len(backends)),
+    ])
+
+
+@benchmark('explain')
+def check_query_plans():
+    """التحقق عبر EXPLAIN QUERY PLAN من أن الاستعلامات الساخنة تستخدم فهارسها"""
+    failures = []
+    rows = []
+    with temp_db_path() as path:
+        db = Database(path)
+        with db.get_connection() as conn:
+            for name, sql, params, index in HOT_QUERIES:
+                plan = explain_query_plan(conn, sql, params)
+                ok = index in plan
+                rows.append((name, f"{'ok' if ok else 'FULL SCAN'}: {plan}"))
+                if not ok:
+                    failures.append(name)
+        db.close()
+    report('Hot query plans', rows)
+    if failures:
+        raise SystemExit(f"Queries not using their index: {', '.join(failures)}")
+
+
+@benchmark('keywords')
+def bench_keywords(iterations=20000):
+    """مقارنة المطابقة مع التعبير الأصلي keyword.lower() in text.lower()"""
+    keywords = ['إعلان', 'بيع', 'شراء', 'promo', 'sale'] + [f'كلمة{i}' for i in range(20)]
+    text = 'مرحباً بالجميع، هذه رسالة عادية طويلة نوعاً ما بدون أي كلمات ممنوعة ' * 4
+    rows = []
+    for count in (1, 5, len(keywords)):
+        selected = keywords[:count]
+        matcher = KeywordMatcher(selected)
+        baseline = measure(lambda i: any(k.lower() in text.lower() for k in selected), iterations)
+        compiled = measure(lambda i: matcher.search(text), iterations)
+        rows.append((f'{count} keywords: lower() in lower()', f'{baseline:,.0f} msgs/s'))
+        rows.append((f'{count} keywords: matcher', f'{compiled:,.0f} msgs/s ({compiled / baseline:.1f}x)'))
+    report(f'Keyword matching ({len(text)} chars, no match)', rows)
+
+
+async def drive_updates(limit, updates, latency):
+    """تمرير التحديثات إلى المعالج كما يفعل Application (مهمة لكل تحديث بترتيب الوصول)"""
+    processor = ChatOrderedUpdateProcessor(limit)
+    seen = {}
+
+    async def handle(update):
+        await asyncio.sleep(latency)
+        seen.setdefault(update.effective_chat.id, []).append(update.update_id)
+
+    await processor.initialize()
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        asyncio.create_task(processor.process_update(update, handle(update))) for update in updates
+    ])
+    elapsed = time.perf_counter() - start
+    in_order = all(ids == sorted(ids) for ids in seen.values())
+    return len(updates) / elapsed, in_order, processor.max_running
+
+
+@benchmark('updates')
+def bench_updates(count=1000, chats=50, latency=0.01):
+    """معدل معالجة التحديثات حسب حد التوازي، مع عُشر التحديثات من دردشة واحدة مزدحمة"""
+    updates = [
+        SimpleNamespace(update_id=i, effective_chat=SimpleNamespace(id=0 if i % 10 == 0 else i % chats))
+        for i in range(count)
+    ]
+    rows = []
+    for limit in (1, 4, 16, 64):
+        rate, in_order, max_running = asyncio.run(drive_updates(limit, updates, latency))
+        rows.append((
+            f'concurrency {limit}',
+            f'{rate:,.0f} updates/s (max running {max_running}, order {"ok" if in_order else "BROKEN"})'
+        ))
+    report(f'Update processing ({count} updates, {chats} chats, {latency * 1000:.0f}ms handler)', rows)
+
+
+def allocations(func, iterations):
+    """متوسط عدد الكتل والبايتات المحجوزة لكل استدعاء"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        kept = [func(i) for i in range(iterations)]
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    del kept
+    return blocks / iterations, size / iterations
+
+
+@benchmark('ui')
+def bench_ui(iterations=5000):
+    """بناء لوحات المفاتيح والنصوص لكل تفاعل مقارنة بالكتالوج المبني مسبقاً"""
+    languages = ['ar', 'en', 'ru', 'fr']
+
+    def rebuild(i):
+        # السلوك القديم: بناء كل الأزرار والبحث في سلسلة الاحتياط في كل استدعاء
+        language = languages[i % len(languages)]
+        text = TEXTS.get(language, TEXTS['ar']).get('main_menu', TEXTS['ar'].get('main_menu', 'main_menu'))
+        return (
+            text,
+            utils._build_main_menu_keyboard(language),
+            utils._build_yes_no_keyboard(language),
+            utils.InlineKeyboardMarkup([[utils._build_back_button(language)]]),
+        )
+
+    def cached(i):
+        language = languages[i % len(languages)]
+        return (
+            get_text(language, 'main_menu'),
+            utils.create_main_menu_keyboard(language),
+            utils.create_yes_no_keyboard(language),
+            utils.create_back_keyboard(language),
+        )
+
+    rows = []
+    for label, func in (('rebuild per call', rebuild), ('precompiled catalog', cached)):
+        rate = measure(func, iterations)
+        blocks, size = allocations(func, iterations)
+        rows.append((label, f'{rate:,.0f} interactions/s, {blocks:,.1f} blocks, {size:,.0f} bytes retained'))
+    report('UI per interaction (main menu + yes/no + back keyboards + main_menu text)', rows)
+
+
+def main(argv):
+    logging.disable(logging.INFO)
+    names = argv or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark: {name} (available: {', '.join(BENCHMARKS)})")
+            return 1
+        BENCHMARKS[name]()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,20 +1,39 @@
 # bot.py
+import time
+import signal
 import logging
 import asyncio
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update, ReplyParameters
 from telegram.ext import (
     Application, CommandHandler, CallbackQueryHandler, 
     MessageHandler, filters, ContextTypes, ConversationHandler
 )
 from telegram.error import BadRequest
 
-from config import BOT_TOKEN, REQUIRED_CHANNEL, PORT, WEBHOOK_URL
-from database import Database
+from config import (
+    BOT_TOKEN, BOT_API_URL, REQUIRED_CHANNEL, PORT, WEBHOOK_URL, WARNING_DELETE_TIMEOUT,
+    GROUP_STATS_TOP_OFFENDERS, METRICS_PORT, METRICS_HOST, WARNING_EDIT_INTERVAL, GLOBAL_RATE_LIMIT
+)
+from storage import open_database
+from async_database import AsyncDatabase
+from audit import AuditLogger
+from deleter import DeletionScheduler
+from outbound import OutboundScheduler
+from suppression import WarningSuppressor
+from timers import DeletionTimer
+from processor import ChatOrderedUpdateProcessor
+from retention import RetentionManager
+from registry import RegistryWatcher
+from catchup import BacklogCatchUp, GROUP_TEXT_MESSAGES
+from rollups import REASON_NOT_SUBSCRIBED, REASON_NO_USERNAME
+from metrics import REGISTRY, MetricsServer, instrument_handler
+from tracing import Tracer, NULL_TRACE
 from texts import get_text
 from utils import (
     create_main_menu_keyboard, create_language_keyboard, 
-    create_back_keyboard, create_yes_no_keyboard,
-    extract_username, check_subscription, delete_message_with_delay, escape_markdown
+    create_back_keyboard, create_yes_no_keyboard, create_group_stats_keyboard, create_recheck_keyboard,
+    extract_username, check_subscription, is_group_admin, escape_markdown,
+    subscription_cache
 )
 
 # تكوين التسجيل
@@ -23,58 +42,130 @@ logging.basicConfig(
     level=logging.INFO
 )
 
-# تهيئة قاعدة البيانات
-db = Database()
+# تهيئة قاعدة البيانات (تنفذ الاستعلامات على خيط مخصص خارج حلقة الأحداث)
+db = AsyncDatabase(open_database())
 
 # حالات المحادثة
 ADD_GROUP, ADD_KEYWORD, ADD_CHANNEL = range(3)
 
 class TelegramBot:
-    def __init__(self):
-        self.application = Application.builder().token(BOT_TOKEN).build()
+    def __init__(self, maintenance=True, request=None, base_url=BOT_API_URL, metrics_port=METRICS_PORT,
+                 catch_up=True, workers=1):
+        # في وضع العمليات المتعددة تشغل عملية واحدة فقط مهام الصيانة (الأرشفة)
+        self.maintenance = maintenance
+        self.audit = AuditLogger(db)
+        # حد Telegram العام للبوت كله، فيقسم على العمليات العاملة
+        self.outbound = OutboundScheduler(global_rate=GLOBAL_RATE_LIMIT / max(1, workers))
+        self.warnings = WarningSuppressor()
+        self.warnings_dropped = 0
+        self._background = set()
+        self.processor = ChatOrderedUpdateProcessor()
+        self.tracer = Tracer()
+        builder = (
+            Application.builder()
+            .token(BOT_TOKEN)
+            .concurrent_updates(self.processor)
+            .rate_limiter(self.outbound)
+            .post_init(self.post_init)
+            .post_stop(self.post_stop)
+            .post_shutdown(self.post_shutdown)
+        )
+        if base_url:
+            # خادم Bot API بديل (مثل fake_api.py لاختبارات الحمل المحلية)
+            builder = builder.base_url(base_url)
+        if request is not None:
+            # طبقة HTTP بديلة (مثل FakeRequest في اختبارات الأداء)
+            builder = builder.request(request).get_updates_request(request)
+        self.application = builder.build()
+        self.deleter = DeletionScheduler(self.application.bot)
+        self.timer = DeletionTimer(db, self.deleter)
+        self.retention = RetentionManager(db)
+        # الجروبات المضافة في عملية أخرى تصل عبر إصدار الفهرس في قاعدة البيانات
+        self.registry_watcher = RegistryWatcher(db) if workers > 1 else None
+        # في وضع العمليات المتعددة يستقبل المستقبل التحديثات المتراكمة عبر webhook
+        self.catch_up = BacklogCatchUp(db, self.deleter, self.audit) if catch_up else None
+        self.metrics = MetricsServer(metrics_port, METRICS_HOST)
+        self.setup_metrics()
         self.setup_handlers()
+        self.application.job_queue.run_repeating(self.log_runtime_stats, interval=600, first=600)
 
     def setup_handlers(self):
         """إعداد معالجات الأحداث"""
+        # كل معالج مغلف لقياس زمن تنفيذه في /metrics
+        timed = instrument_handler
+
         # معالجات الأوامر
-        self.application.add_handler(CommandHandler("start", self.start))
-        self.application.add_handler(CommandHandler("scan", self.scan_recent_messages))
+        self.application.add_handler(CommandHandler("start", timed(self.start)))
+        self.application.add_handler(CommandHandler("scan", timed(self.scan_recent_messages)))
         
         # معالجات الاستعلامات
-        self.application.add_handler(CallbackQueryHandler(self.handle_language_selection, pattern="^lang_"))
-        self.application.add_handler(CallbackQueryHandler(self.button_handler, pattern="^(add_group|active_groups|stats|check_subscription|change_language|scan_messages|back_to_main|settings|yes_channel|no_channel)$"))
+        self.application.add_handler(CallbackQueryHandler(timed(self.handle_language_selection), pattern="^lang_"))
+        self.application.add_handler(CallbackQueryHandler(timed(self.handle_group_stats_selection), pattern="^gstats:"))
+        self.application.add_handler(CallbackQueryHandler(timed(self.button_handler), pattern="^(add_group|active_groups|stats|group_stats|check_subscription|change_language|scan_messages|back_to_main|settings|yes_channel|no_channel)$"))
         
         # معالجات المحادثة
         conv_handler = ConversationHandler(
-            entry_points=[CallbackQueryHandler(self.start_add_group, pattern="^add_group$")],
+            entry_points=[CallbackQueryHandler(timed(self.start_add_group), pattern="^add_group$")],
             states={
-                ADD_GROUP: [MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_group_username)],
-                ADD_KEYWORD: [MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_keyword)],
-                ADD_CHANNEL: [MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_channel)],
+                ADD_GROUP: [MessageHandler(filters.TEXT & ~filters.COMMAND, timed(self.handle_group_username))],
+                ADD_KEYWORD: [MessageHandler(filters.TEXT & ~filters.COMMAND, timed(self.handle_keyword))],
+                ADD_CHANNEL: [MessageHandler(filters.TEXT & ~filters.COMMAND, timed(self.handle_channel))],
             },
-            fallbacks=[CommandHandler("cancel", self.cancel_conversation)],
+            fallbacks=[CommandHandler("cancel", timed(self.cancel_conversation))],
         )
         self.application.add_handler(conv_handler)
         
         # معالجات الرسائل في الجروبات
-        self.application.add_handler(MessageHandler(
-            filters.TEXT & ~filters.COMMAND & (filters.ChatType.GROUPS | filters.ChatType.SUPERGROUP), 
-            self.monitor_messages
-        ))
+        self.application.add_handler(MessageHandler(GROUP_TEXT_MESSAGES, timed(self.monitor_messages)))
         
         # معالجات الرسائل الخاصة
         self.application.add_handler(MessageHandler(
             filters.TEXT & ~filters.COMMAND & filters.ChatType.PRIVATE, 
-            self.handle_private_message
+            timed(self.handle_private_message)
         ))
 
+    def setup_metrics(self):
+        """تسجيل المقاييس اللحظية (نسب الذاكرة المؤقتة وأعماق الطوابير)"""
+        REGISTRY.gauge(
+            'botcheck_cache_hit_ratio', 'Cache hit ratio',
+            lambda: {'subscription': subscription_cache.hit_rate, 'user': db.users.hit_rate}, ('cache',)
+        )
+        REGISTRY.gauge(
+            'botcheck_cache_entries', 'Cache entries',
+            lambda: {'subscription': len(subscription_cache), 'user': len(db.users)}, ('cache',)
+        )
+        REGISTRY.gauge(
+            'botcheck_queue_depth', 'Pending items per internal queue',
+            lambda: {
+                'database': db.queue_depth,
+                'audit': self.audit.queue_depth,
+                'deletions': self.deleter.queue_depth,
+            }, ('queue',)
+        )
+        REGISTRY.gauge(
+            'botcheck_outbound_queued', 'Bot API requests waiting in the rate limiter',
+            lambda: {name: stats['queued'] for name, stats in self.outbound.stats().items()}, ('priority',)
+        )
+        REGISTRY.gauge(
+            'botcheck_updates_running', 'Updates being processed',
+            lambda: self.processor.stats()['running']
+        )
+        REGISTRY.gauge(
+            'botcheck_updates_waiting_chats', 'Chats with updates in flight',
+            lambda: self.processor.stats()['waiting_chats']
+        )
+        REGISTRY.summary(
+            'botcheck_update_phase_seconds', 'Per-phase latency of sampled updates',
+            self.tracer.percentiles, ('handler', 'phase')
+        )
+
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """معالج أمر /start"""
         user = update.effective_user
         chat = update.effective_chat
         
         # تسجيل المستخدم
-        db.add_user(user.id, user.username, user.first_name)
+        await db.add_user(user.id, user.username, user.first_name)
         
         # إرسال رسالة الترحيب
         await update.message.reply_text(
@@ -88,7 +179,7 @@ class TelegramBot:
         query = update.callback_query
         await query.answer()
         
-        user_data = db.get_user(query.from_user.id)
+        user_data = await db.get_user(query.from_user.id)
         language = user_data['language'] if user_data else 'ar'
         
         data = query.data
@@ -102,6 +193,9 @@ class TelegramBot:
         elif data == "stats":
             await self.show_stats(query, language)
         
+        elif data == "group_stats":
+            await self.show_group_stats_menu(query, language)
+        
         elif data == "check_subscription":
             await self.check_user_subscription(query, language)
         
@@ -140,7 +234,7 @@ class TelegramBot:
         query = update.callback_query
         await query.answer()
         
-        user_data = db.get_user(query.from_user.id)
+        user_data = await db.get_user(query.from_user.id)
         language = user_data['language'] if user_data else 'ar'
         
         await query.edit_message_text(
@@ -153,7 +247,7 @@ class TelegramBot:
     async def handle_group_username(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """معالجة اسم المستخدم للجروب"""
         user = update.effective_user
-        user_data = db.get_user(user.id)
+        user_data = await db.get_user(user.id)
         language = user_data['language'] if user_data else 'ar'
         
         group_input = update.message.text
@@ -196,7 +290,7 @@ class TelegramBot:
     async def handle_keyword(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """معالجة الكلمة المفتاحية"""
         user = update.effective_user
-        user_data = db.get_user(user.id)
+        user_data = await db.get_user(user.id)
         language = user_data['language'] if user_data else 'ar'
         
         keyword = update.message.text
@@ -205,7 +299,7 @@ class TelegramBot:
         group_username = context.user_data['group_username']
         group_chat_id = context.user_data['group_chat_id']
         
-        success = db.add_group(group_username, group_chat_id, keyword, language)
+        success = await db.add_group(group_username, group_chat_id, keyword, language)
         
         if success:
             await update.message.reply_text(
@@ -223,7 +317,7 @@ class TelegramBot:
     async def handle_channel(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """معالجة إضافة القناة"""
         user = update.effective_user
-        user_data = db.get_user(user.id)
+        user_data = await db.get_user(user.id)
         language = user_data['language'] if user_data else 'ar'
         
         channel_input = update.message.text
@@ -231,7 +325,7 @@ class TelegramBot:
         
         if channel_username:
             group_username = context.user_data['group_username']
-            db.add_group_channel(group_username, channel_username)
+            await db.add_group_channel(group_username, channel_username)
             
             await update.message.reply_text(
                 get_text(language, 'channel_added_success'),
@@ -249,7 +343,7 @@ class TelegramBot:
     async def cancel_conversation(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """إلغاء المحادثة"""
         user = update.effective_user
-        user_data = db.get_user(user.id)
+        user_data = await db.get_user(user.id)
         language = user_data['language'] if user_data else 'ar'
         
         await update.message.reply_text(
@@ -261,7 +355,7 @@ class TelegramBot:
 
     async def show_active_groups(self, query, language):
         """عرض الجروبات النشطة"""
-        groups = db.get_all_groups()
+        groups = await db.get_all_groups()
         
         if not groups:
             text = get_text(language, 'no_active_groups')
@@ -282,7 +376,7 @@ class TelegramBot:
 
     async def show_stats(self, query, language):
         """عرض الإحصائيات"""
-        stats = db.get_stats()
+        stats = await db.get_stats()
         
         text = get_text(language, 'stats')
         text += f"📊 {get_text(language, 'stats_groups').format(active_groups=stats['active_groups'])}\n"
@@ -295,22 +389,90 @@ class TelegramBot:
             parse_mode='Markdown'
         )
 
+    async def show_group_stats_menu(self, query, language):
+        """عرض قائمة الجروبات التي يديرها المستخدم لاختيار إحصائياتها"""
+        groups = await db.get_all_groups()
+        # الإحصائيات تكشف أسماء المخالفين وأرقامهم، فتعرض لأدمن الجروب فقط
+        admin = await asyncio.gather(*[
+            is_group_admin(query.get_bot(), group['group_chat_id'] or group['group_username'], query.from_user.id)
+            for group in groups
+        ])
+        groups = [group for group, is_admin in zip(groups, admin) if is_admin]
+        
+        if not groups:
+            await query.edit_message_text(
+                get_text(language, 'group_stats_no_groups'),
+                reply_markup=create_back_keyboard(language)
+            )
+            return
+        
+        await query.edit_message_text(
+            get_text(language, 'group_stats_choose'),
+            reply_markup=create_group_stats_keyboard(groups, language)
+        )
+
+    async def handle_group_stats_selection(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """عرض إحصائيات جروب من جداول التجميع"""
+        query = update.callback_query
+        await query.answer()
+        
+        user_data = await db.get_user(query.from_user.id)
+        language = user_data['language'] if user_data else 'ar'
+        
+        group_username = query.data.split(':', 1)[1]  # gstats:@group -> @group
+        # بيانات الزر يرسلها العميل، فيعاد التحقق من صلاحية المستخدم هنا
+        group = await db.get_group(group_username)
+        chat = (group['group_chat_id'] or group_username) if group else group_username
+        if not group or not await is_group_admin(context.bot, chat, query.from_user.id):
+            await query.edit_message_text(
+                get_text(language, 'group_stats_not_admin'),
+                reply_markup=create_back_keyboard(language)
+            )
+            return
+
+        stats = await db.get_group_stats(group_username, GROUP_STATS_TOP_OFFENDERS)
+        
+        text = get_text(language, 'group_stats').format(group_name=group_username)
+        if not stats or not stats['total']:
+            text += get_text(language, 'group_stats_empty')
+        else:
+            text += get_text(language, 'group_stats_totals').format(
+                total=stats['total'], last_24h=stats['last_24h'], last_7d=stats['last_7d']
+            )
+            text += get_text(language, 'group_stats_reasons')
+            reason_names = {
+                REASON_NOT_SUBSCRIBED: get_text(language, 'reason_not_subscribed'),
+                REASON_NO_USERNAME: get_text(language, 'reason_no_username'),
+            }
+            for reason, count in sorted(stats['reasons'].items(), key=lambda item: -item[1]):
+                text += get_text(language, 'group_stats_reason_item').format(
+                    reason=reason_names.get(reason, reason), count=count, share=count / stats['total']
+                )
+            if stats['top_offenders']:
+                text += get_text(language, 'group_stats_offenders')
+                for rank, offender in enumerate(stats['top_offenders'], 1):
+                    text += get_text(language, 'group_stats_offender_item').format(rank=rank, **offender)
+        
+        # بدون Markdown لأن أسماء المستخدمين قد تحتوي على رموز التنسيق
+        await query.edit_message_text(
+            text,
+            reply_markup=create_back_keyboard(language)
+        )
+
     async def check_user_subscription(self, query, language):
         """التحقق من اشتراك المستخدم"""
         user_id = query.from_user.id
         
-        # التحقق من الاشتراك في القناة الافتراضية
-        is_subscribed = await check_subscription(query.bot, user_id, REQUIRED_CHANNEL)
+        # التحقق من الاشتراك في القناة الافتراضية، بدون الذاكرة المؤقتة لأن المستخدم
+        # يضغط "تحقق مرة أخرى" غالباً بعد الاشتراك مباشرة
+        is_subscribed = await check_subscription(query.get_bot(), user_id, REQUIRED_CHANNEL, fresh=True)
         
         if is_subscribed:
             text = get_text(language, 'subscribed')
             keyboard = create_back_keyboard(language)
         else:
             text = get_text(language, 'not_subscribed').format(channel=REQUIRED_CHANNEL)
-            keyboard = InlineKeyboardMarkup([[
-                InlineKeyboardButton("🔍 تحقق مرة أخرى", callback_data="check_subscription"),
-                InlineKeyboardButton("↩️ رجوع", callback_data="back_to_main")
-            ]])
+            keyboard = create_recheck_keyboard()
         
         await query.edit_message_text(
             text,
@@ -334,7 +496,7 @@ class TelegramBot:
         user_id = query.from_user.id
         
         # تحديث لغة المستخدم
-        db.update_user_language(user_id, language)
+        await db.update_user_language(user_id, language)
         
         await query.edit_message_text(
             get_text(language, 'language_changed'),
@@ -365,26 +527,36 @@ class TelegramBot:
 
     async def monitor_messages(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """مراقبة الرسائل في الجروبات"""
+        # تتبع مراحل عينة من التحديثات (NULL_TRACE لغير المختارة)
+        trace = self.tracer.start('monitor_messages', update)
+        try:
+            await self.check_group_message(update, context, trace)
+        finally:
+            trace.finish()
+
+    async def check_group_message(self, update, context, trace):
+        """فحص رسالة جروب: الاشتراك ثم وجود username"""
         message = update.message
         chat = message.chat
         user = message.from_user
         
-        # الحصول على إعدادات الجروب
+        # الحصول على إعدادات الجروب من الفهرس في الذاكرة
         group_username = f"@{chat.username}" if chat.username else str(chat.id)
-        group_data = db.get_group(group_username)
+        group_data = db.groups.get(group_username, chat.id)
+        trace.lap('group_lookup')
         
-        if not group_data or not group_data['is_active']:
+        if not group_data or not group_data.is_active:
             return
         
         # الحصول على قناة الجروب المخصصة أو استخدام الافتراضية
-        group_channel = db.get_group_channel(group_username)
-        channel_username = group_channel['channel_username'] if group_channel else REQUIRED_CHANNEL
+        channel_username = group_data.channel_username or REQUIRED_CHANNEL
+        trace.lap('channel_lookup')
         
-        language = group_data['language']
-        keyword = group_data['keyword']
+        language = group_data.language
         
         # التحقق من اشتراك المستخدم
         is_subscribed = await check_subscription(context.bot, user.id, channel_username)
+        trace.lap('subscription_check')
         
         if not is_subscribed:
             # إرسال تحذير وحذف الرسالة
@@ -394,61 +566,120 @@ class TelegramBot:
             )
             
             try:
-                warning_msg = await message.reply_text(
-                    warning_text,
-                    reply_to_message_id=message.message_id,
-                    parse_mode='Markdown'
-                )
-                
-                # جدولة حذف التحذير بعد 3 دقائق
-                await delete_message_with_delay(context, chat.id, warning_msg.message_id)
-                
-                # حذف الرسالة الأصلية
-                await message.delete()
-                
-                # تسجيل الحذف
-                db.log_deleted_message(
-                    group_username, user.id, user.first_name,
-                    message.text, language, "لم يشترك في القناة"
+                await self.warn_and_delete(
+                    context, message, group_username, language, warning_text, REASON_NOT_SUBSCRIBED, trace
                 )
-                
             except Exception as e:
                 logging.error(f"❌ Error in subscription check: {e}")
             return
         
         # التحقق من وجود @username للمستخدم
-        if not user.username and keyword.lower() in message.text.lower():
+        needs_username = not user.username and group_data.matcher.search(message.text)
+        trace.lap('keyword_match')
+        if needs_username:
             # إرسال تحذير للمستخدم بدون username
             warning_text = get_text(language, 'no_username_warning').format(
                 user_name=user.first_name
             )
             
             try:
-                warning_msg = await message.reply_text(
-                    warning_text,
-                    reply_to_message_id=message.message_id,
-                    parse_mode='Markdown'
+                await self.warn_and_delete(
+                    context, message, group_username, language, warning_text, REASON_NO_USERNAME, trace
                 )
-                
-                # جدولة حذف التحذير بعد 3 دقائق
-                await delete_message_with_delay(context, chat.id, warning_msg.message_id)
-                
-                # حذف الرسالة الأصلية
-                await message.delete()
-                
-                # تسجيل الحذف
-                db.log_deleted_message(
-                    group_username, user.id, user.first_name,
-                    message.text, language, "لا يوجد username"
-                )
-                
             except Exception as e:
                 logging.error(f"❌ Error in username check: {e}")
 
+    async def warn_and_delete(self, context, message, group_username, language, warning_text, reason,
+                              trace=NULL_TRACE):
+        """إرسال تحذير (مرة واحدة خلال النافذة) وحذف الرسالة وتسجيلها"""
+        chat = message.chat
+        user = message.from_user
+        
+        # حذف الرسالة الأصلية ضمن دفعة الحذف الخاصة بالجروب
+        self.deleter.schedule(chat.id, message.message_id)
+        trace.lap('delete')
+        
+        # تسجيل الحذف
+        self.audit.log(
+            group_username, user.id, user.first_name,
+            message.text, language, reason
+        )
+        trace.lap('audit_insert')
+        
+        # التحذيرات ترسل في الخلفية حتى لا ينتظر حذف الرسائل التالية في الجروب حد الرسائل
+        entry = self.warnings.get(chat.id, user.id)
+        if entry is None:
+            if not self.outbound.has_group_capacity(chat.id):
+                # الجروب استنفد حد الرسائل (مثل هجوم سبام): الحذف يكفي
+                self.warnings_dropped += 1
+            else:
+                entry = self.warnings.record(chat.id, user.id, None, warning_text)
+                self.run_in_background(self.send_warning(context.bot, message, entry, language))
+        elif entry.message_id is not None and entry.refresh is None:
+            # تحديث التحذير الحالي بعداد بدلاً من إرسال تحذير جديد (تعديل واحد كل فترة)
+            entry.refresh = self.run_in_background(
+                self.update_warning_counter(context.bot, chat.id, entry, language)
+            )
+        trace.lap('reply')
+
+    def run_in_background(self, coroutine):
+        """تشغيل مهمة بدون انتظارها مع الاحتفاظ بمرجع لها حتى الإيقاف"""
+        task = asyncio.create_task(coroutine)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    async def send_warning(self, bot, message, entry, language):
+        """إرسال التحذير وجدولة حذفه"""
+        try:
+            # الرسالة الأصلية قد تحذف قبل إرسال التحذير
+            warning_msg = await message.reply_text(
+                entry.text,
+                reply_parameters=ReplyParameters(message.message_id, allow_sending_without_reply=True),
+                parse_mode='Markdown'
+            )
+            entry.message_id = warning_msg.message_id
+            
+            # جدولة حذف التحذير بعد 3 دقائق (محفوظة في قاعدة البيانات)
+            await self.timer.schedule(message.chat.id, warning_msg.message_id, WARNING_DELETE_TIMEOUT)
+        except Exception as e:
+            logging.error(f"❌ Error sending warning: {e}")
+            return
+        # تكرارات وصلت أثناء الإرسال
+        if entry.count > entry.shown_count and entry.refresh is None:
+            entry.refresh = asyncio.current_task()
+            await self.update_warning_counter(bot, message.chat.id, entry, language)
+
+    async def update_warning_counter(self, bot, chat_id, entry, language):
+        """تعديل عداد التحذير بحد أقصى مرة كل WARNING_EDIT_INTERVAL حتى يظهر آخر عدد"""
+        try:
+            while entry.shown_count < entry.count:
+                delay = entry.edited_at + WARNING_EDIT_INTERVAL - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+                entry.edited_at = time.monotonic()
+                if not self.outbound.has_group_capacity(chat_id):
+                    # حد رسائل الجروب مستنفد: المحاولة في الفترة التالية
+                    continue
+                count = entry.count
+                counter = get_text(language, 'warning_repeat_count').format(count=count)
+                await bot.edit_message_text(
+                    f"{entry.text}\n\n{counter}",
+                    chat_id=chat_id,
+                    message_id=entry.message_id,
+                    parse_mode='Markdown'
+                )
+                entry.shown_count = count
+        except Exception as e:
+            logging.error(f"❌ Error updating warning: {e}")
+        finally:
+            entry.refresh = None
+
     async def handle_private_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """معالجة الرسائل الخاصة"""
         user = update.effective_user
-        user_data = db.get_user(user.id)
+        user_data = await db.get_user(user.id)
         language = user_data['language'] if user_data else 'ar'
         
         await update.message.reply_text(
@@ -483,6 +714,104 @@ class TelegramBot:
         
         await update.message.reply_text("✅ تم الانتهاء من الفحص!")
 
+    async def post_init(self, application: Application):
+        """تشغيل المهام الخلفية بعد تهيئة البوت"""
+        await self.audit.start()
+        await self.timer.start()
+        await self.metrics.start()
+        if self.maintenance:
+            await self.retention.start()
+        if self.registry_watcher is not None:
+            await self.registry_watcher.start()
+        # تفريغ النسب المئوية لمراحل التحديثات عند الطلب: kill -USR1 <pid>
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, self.tracer.dump)
+        except (AttributeError, NotImplementedError, RuntimeError):
+            pass
+        # معالجة التحديثات المتراكمة قبل بدء الاستقبال العادي
+        if self.catch_up is not None:
+            await self.catch_up.run(application, self.processor)
+
+    async def post_stop(self, application: Application):
+        """إيقاف المهام الخلفية وتفريغ الحذف المعلق قبل إغلاق اتصال Bot API"""
+        try:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGUSR1)
+        except (AttributeError, NotImplementedError, RuntimeError):
+            pass
+        # التحذيرات المعلقة أقل أهمية من تفريغ الحذف
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        await self.metrics.stop()
+        if self.registry_watcher is not None:
+            await self.registry_watcher.stop()
+        await self.retention.stop()
+        await self.timer.stop()
+        await self.deleter.stop()
+        await self.audit.stop()
+
+    async def post_shutdown(self, application: Application):
+        """تحرير الموارد عند إيقاف البوت"""
+        await db.close()
+
+    async def log_runtime_stats(self, context: ContextTypes.DEFAULT_TYPE):
+        """تسجيل إحصائيات الذاكرة المؤقتة والسجل المؤجل"""
+        stats = subscription_cache.stats()
+        logging.info(
+            f"📦 Subscription cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.1%}), {stats['entries']} entries, {stats['evictions']} evictions"
+        )
+        stats = self.audit.stats()
+        logging.info(
+            f"📝 Audit log: queue depth {stats['queue_depth']}, {stats['flushed_records']} records "
+            f"in {stats['flushes']} flushes, last flush {stats['last_flush_latency'] * 1000:.1f}ms, "
+            f"max {stats['max_flush_latency'] * 1000:.1f}ms"
+        )
+        stats = self.deleter.stats()
+        logging.info(
+            f"🗑️ Deletions: {stats['deleted']} of {stats['scheduled']} messages in {stats['api_calls']} API calls, "
+            f"{stats['retries']} retries, {stats['failed']} failed, {stats['queue_depth']} pending"
+        )
+        logging.info(
+            f"⚠️ Warnings: {self.warnings.suppressed} repeats suppressed, "
+            f"{self.warnings_dropped} dropped while the group message limit was exhausted"
+        )
+        stats = db.users.stats()
+        logging.info(
+            f"👤 User cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.1%}), {stats['entries']} entries"
+        )
+        logging.info(
+            f"⏰ Deletion timer: {self.timer.scheduled} scheduled, {self.timer.fired} fired"
+        )
+        stats = self.processor.stats()
+        logging.info(
+            f"⚙️ Updates: {stats['processed']} processed, {stats['running']} running "
+            f"(max {stats['max_running']}), {stats['waiting_chats']} chats active, "
+            f"max per-chat backlog {stats['max_chat_backlog']}"
+        )
+        stats = self.retention.stats()
+        logging.info(
+            f"🗄️ Retention: {stats['archived']} messages archived in {stats['runs']} runs, "
+            f"{stats['vacuumed_pages']} pages vacuumed, last run {stats['last_run_duration'] * 1000:.1f}ms"
+        )
+        if self.registry_watcher is not None:
+            stats = self.registry_watcher.stats()
+            logging.info(f"🔄 Group registry: version {stats['version']}, {stats['reloads']} reloads")
+        stats = self.tracer.stats()
+        logging.info(
+            f"🔬 Traces: {stats['sampled']} updates sampled at {stats['sample_rate']:.2%}, "
+            f"{stats['slow']} slow"
+        )
+        for name, stats in self.outbound.stats().items():
+            logging.info(
+                f"📤 Outbound {name}: {stats['requests']} requests, {stats['queued']} queued, "
+                f"avg wait {stats['avg_wait'] * 1000:.1f}ms, max wait {stats['max_wait'] * 1000:.1f}ms"
+            )
+        logging.info(
+            f"🗄️ Database: {db.requests} requests in {db.batches} batches, queue depth {db.queue_depth}"
+        )
+
     def run(self):
         """تشغيل البوت"""
         if WEBHOOK_URL:
@@ -0,0 +1,187 @@
+# catchup.py
+"""وضع اللحاق بالتحديثات المتراكمة بعد إعادة التشغيل أو الانقطاع
+
+عند وجود عدد كبير من التحديثات المعلقة تسحب كلها قبل بدء الاستقبال العادي،
+ويفحص اشتراك كل مستخدم مرة واحدة فقط، وتحذف الرسائل القديمة المخالفة دفعة واحدة
+بدون تحذيرات. الرسائل الحديثة وباقي التحديثات تمرر إلى المعالجات العادية.
+"""
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from telegram.ext import filters
+
+from config import REQUIRED_CHANNEL, CATCH_UP_THRESHOLD, CATCH_UP_STALE_AGE, CATCH_UP_CONCURRENCY
+from rollups import REASON_NOT_SUBSCRIBED, REASON_NO_USERNAME
+from utils import check_subscription
+
+# نفس مرشح معالج monitor_messages (الرسائل الجديدة فقط، بدون التعديلات)
+GROUP_TEXT_MESSAGES = (
+    filters.UpdateType.MESSAGE & filters.TEXT & ~filters.COMMAND
+    & (filters.ChatType.GROUPS | filters.ChatType.SUPERGROUP)
+)
+
+# الحد الأقصى لـ getUpdates
+UPDATES_LIMIT = 100
+
+
+class BacklogCatchUp:
+    """معالجة التحديثات المتراكمة على دفعات قبل الانتقال للوضع العادي"""
+
+    def __init__(self, db, deleter, audit, threshold=CATCH_UP_THRESHOLD,
+                 stale_age=CATCH_UP_STALE_AGE, concurrency=CATCH_UP_CONCURRENCY):
+        self.db = db
+        self.deleter = deleter
+        self.audit = audit
+        self.threshold = threshold
+        self.stale_age = stale_age
+        self.concurrency = concurrency
+
+        # إحصائيات
+        self.drained = 0
+        self.checked_users = 0
+        self.stale_deleted = 0
+        self.handled = 0
+        self.duration = 0.0
+
+    async def run(self, application, processor):
+        """تشغيل وضع اللحاق إن تجاوز عدد التحديثات المعلقة الحد، ويعيد True إن شُغّل"""
+        if not self.threshold:
+            return False
+        bot = application.bot
+        try:
+            info = await bot.get_webhook_info()
+        except Exception as e:
+            logging.error(f"❌ Error reading pending updates: {e}")
+            return False
+        if info.pending_update_count < self.threshold:
+            return False
+
+        logging.info(f"⏩ Catch-up mode: {info.pending_update_count} pending updates")
+        start = time.perf_counter()
+        try:
+            if info.url:
+                # getUpdates لا يعمل مع webhook مفعل، ويعاد تعيينه عند بدء run_webhook
+                await bot.delete_webhook()
+            updates = await self.drain(bot)
+        except Exception as e:
+            # لم يؤكد شيء بعد، فيستلم الاستقبال العادي كل التحديثات
+            logging.error(f"❌ Error starting catch-up: {e}")
+            return False
+
+        # التحديثات المسحوبة مؤكدة، فلا يجوز أن يوقف خطأ معالجتها
+        try:
+            remaining = await self.process(bot, updates)
+        except Exception as e:
+            logging.error(f"❌ Error checking backlog, passing it to handlers: {e}")
+            remaining = updates
+
+        # الرسائل الحديثة وباقي التحديثات عبر المعالجات العادية (بترتيب كل دردشة)
+        results = await asyncio.gather(*[
+            asyncio.create_task(processor.process_update(update, application.process_update(update)))
+            for update in remaining
+        ], return_exceptions=True)
+        for update, result in zip(remaining, results):
+            if isinstance(result, Exception):
+                logging.error(f"❌ Error handling backlog update {update.update_id}: {result}")
+        self.handled += len(remaining)
+        self.duration = time.perf_counter() - start
+
+        logging.info(
+            f"⏩ Catch-up done: {len(updates)} updates in {self.duration:.1f}s, "
+            f"{self.checked_users} subscription checks, {self.stale_deleted} stale messages deleted "
+            f"without warning, {len(remaining)} passed to handlers"
+        )
+        return True
+
+    async def drain(self, bot):
+        """سحب كل التحديثات المعلقة وتأكيد استلامها"""
+        updates = []
+        offset = None
+        while True:
+            try:
+                batch = await bot.get_updates(offset=offset, limit=UPDATES_LIMIT, timeout=0)
+            except Exception as e:
+                if not updates:
+                    raise
+                # قد يعيد الاستقبال العادي الدفعة الأخيرة إن لم يصل تأكيدها، والتكرار أهون من ضياعها
+                logging.error(f"❌ Error draining pending updates: {e}")
+                break
+            if not batch:
+                # آخر طلب بـ offset يؤكد كل ما سبق فلا يعيده الاستقبال العادي
+                break
+            updates.extend(batch)
+            offset = batch[-1].update_id + 1
+        self.drained += len(updates)
+        return updates
+
+    async def process(self, bot, updates):
+        """فحص رسائل الجروبات دفعة واحدة، ويعيد التحديثات التي تحتاج المعالجات العادية"""
+        messages = []
+        remaining = []
+        for update in updates:
+            if not GROUP_TEXT_MESSAGES.check_update(update):
+                remaining.append(update)
+                continue
+            chat = update.message.chat
+            group_username = f"@{chat.username}" if chat.username else str(chat.id)
+            group_data = self.db.groups.get(group_username, chat.id)
+            if group_data and group_data.is_active:
+                messages.append((update, group_username, group_data))
+
+        # فحص اشتراك كل مستخدم مرة واحدة لكل قناة (النتائج تبقى في الذاكرة المؤقتة للمعالجات)
+        pairs = {
+            (group_data.channel_username or REQUIRED_CHANNEL, update.message.from_user.id)
+            for update, _, group_data in messages
+        }
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def check(channel_username, user_id):
+            async with semaphore:
+                return await check_subscription(bot, user_id, channel_username)
+
+        results = await asyncio.gather(*[check(*pair) for pair in pairs])
+        subscribed = dict(zip(pairs, results))
+        self.checked_users += len(pairs)
+
+        stale_before = datetime.now(timezone.utc).timestamp() - self.stale_age
+        for update, group_username, group_data in messages:
+            message = update.message
+            user = message.from_user
+            channel_username = group_data.channel_username or REQUIRED_CHANNEL
+            if not subscribed[(channel_username, user.id)]:
+                reason = REASON_NOT_SUBSCRIBED
+            elif not user.username and group_data.matcher.search(message.text):
+                reason = REASON_NO_USERNAME
+            else:
+                continue
+
+            if message.date.timestamp() >= stale_before:
+                # رسالة حديثة: التحذير ما زال مفيداً
+                remaining.append(update)
+                continue
+
+            try:
+                self.deleter.schedule(message.chat.id, message.message_id)
+                self.audit.log(
+                    group_username, user.id, user.first_name,
+                    message.text, group_data.language, reason
+                )
+                self.stale_deleted += 1
+            except Exception as e:
+                logging.error(f"❌ Error deleting stale message {message.message_id}: {e}")
+
+        # المحافظة على ترتيب الوصول
+        remaining.sort(key=lambda update: update.update_id)
+        return remaining
+
+    def stats(self):
+        """إحصائيات وضع اللحاق"""
+        return {
+            'drained': self.drained,
+            'checked_users': self.checked_users,
+            'stale_deleted': self.stale_deleted,
+            'handled': self.handled,
+            'duration': self.duration
+        }
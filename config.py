@@ -13,9 +13,94 @@ DATABASE_URL = os.environ.get('DATABASE_URL', 'sqlite:///bot_data.db')
 if DATABASE_URL and DATABASE_URL.startswith('postgres://'):
     DATABASE_URL = DATABASE_URL.replace('postgres://', 'postgresql://', 1)
 
+# مسار ملف SQLite المحلي
+DB_NAME = DATABASE_URL[len('sqlite:///'):] if DATABASE_URL.startswith('sqlite:///') else 'bot_data.db'
+SQLITE_BUSY_TIMEOUT = float(os.environ.get('SQLITE_BUSY_TIMEOUT', 5.0))
+SQLITE_STATEMENT_CACHE = int(os.environ.get('SQLITE_STATEMENT_CACHE', 256))
+DB_BATCH_SIZE = int(os.environ.get('DB_BATCH_SIZE', 64))
+PG_POOL_MIN = int(os.environ.get('PG_POOL_MIN', 1))
+PG_POOL_MAX = int(os.environ.get('PG_POOL_MAX', 5))
+
 # إعدادات التوقيت
 WARNING_DELETE_TIMEOUT = 180
 
+# مؤقت الحذف المؤجل المحفوظ في قاعدة البيانات
+DELETION_TIMER_BATCH_SIZE = int(os.environ.get('DELETION_TIMER_BATCH_SIZE', 500))
+DELETION_TIMER_MAX_SLEEP = float(os.environ.get('DELETION_TIMER_MAX_SLEEP', 60))
+
+# منع تكرار التحذيرات لنفس المستخدم في نفس الجروب (بالثواني)
+WARNING_SUPPRESS_WINDOW = int(os.environ.get('WARNING_SUPPRESS_WINDOW', 60))
+WARNING_SUPPRESS_MAX_ENTRIES = int(os.environ.get('WARNING_SUPPRESS_MAX_ENTRIES', 20000))
+# أقل مدة بين تعديلين لعداد التحذير (بالثواني)
+WARNING_EDIT_INTERVAL = float(os.environ.get('WARNING_EDIT_INTERVAL', 15))
+
+# حدود معدل طلبات Bot API الصادرة
+GLOBAL_RATE_LIMIT = float(os.environ.get('GLOBAL_RATE_LIMIT', 30))
+GROUP_RATE_LIMIT = float(os.environ.get('GROUP_RATE_LIMIT', 20))
+GROUP_RATE_PERIOD = float(os.environ.get('GROUP_RATE_PERIOD', 60))
+OUTBOUND_MAX_RETRIES = int(os.environ.get('OUTBOUND_MAX_RETRIES', 3))
+
+# إعدادات الحذف الجماعي للرسائل
+DELETE_BATCH_WINDOW = float(os.environ.get('DELETE_BATCH_WINDOW', 0.5))
+DELETE_MAX_RETRIES = int(os.environ.get('DELETE_MAX_RETRIES', 3))
+
+# إعدادات الذاكرة المؤقتة لحالة الاشتراك
+SUBSCRIPTION_CACHE_TTL = int(os.environ.get('SUBSCRIPTION_CACHE_TTL', 300))
+SUBSCRIPTION_CACHE_NEGATIVE_TTL = int(os.environ.get('SUBSCRIPTION_CACHE_NEGATIVE_TTL', 20))
+SUBSCRIPTION_CACHE_MAX_ENTRIES = int(os.environ.get('SUBSCRIPTION_CACHE_MAX_ENTRIES', 50000))
+
+# الذاكرة المؤقتة لإعدادات المستخدمين
+USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 3600))
+USER_CACHE_MAX_ENTRIES = int(os.environ.get('USER_CACHE_MAX_ENTRIES', 20000))
+
+# إعدادات السجل المؤجل للرسائل المحذوفة
+AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', 200))
+AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL', 2.0))
+AUDIT_MAX_PENDING = int(os.environ.get('AUDIT_MAX_PENDING', 50000))
+
+# معالجة التحديثات بالتوازي (بالترتيب داخل كل دردشة)
+CONCURRENT_UPDATES = int(os.environ.get('CONCURRENT_UPDATES', 32))
+MAX_PENDING_UPDATES = int(os.environ.get('MAX_PENDING_UPDATES', 10000))
+
+# سياسة الاحتفاظ بسجل الرسائل المحذوفة (0 = الاحتفاظ للأبد)
+# معطلة افتراضياً: الأرشيف يكتب في ARCHIVE_DIR على القرص المحلي الذي يمسح عند إعادة النشر على Railway،
+# لذلك يجب أن يشير ARCHIVE_DIR إلى قرص دائم (volume) قبل تفعيلها
+RETENTION_DAYS = int(os.environ.get('RETENTION_DAYS', 0))
+RETENTION_BATCH_SIZE = int(os.environ.get('RETENTION_BATCH_SIZE', 500))
+RETENTION_INTERVAL = float(os.environ.get('RETENTION_INTERVAL', 3600))
+ARCHIVE_DIR = os.environ.get('ARCHIVE_DIR', 'archive')
+VACUUM_PAGES = int(os.environ.get('VACUUM_PAGES', 2000))
+
+# وضع اللحاق بعد إعادة التشغيل: يبدأ عند تجاوز عدد التحديثات المعلقة الحد (0 = تعطيل)
+CATCH_UP_THRESHOLD = int(os.environ.get('CATCH_UP_THRESHOLD', 500))
+# الرسائل الأقدم من هذا العمر (بالثواني) تحذف بدون تحذير
+CATCH_UP_STALE_AGE = float(os.environ.get('CATCH_UP_STALE_AGE', 120))
+CATCH_UP_CONCURRENCY = int(os.environ.get('CATCH_UP_CONCURRENCY', 20))
+
+# عدد أكثر المخالفين المعروضين في إحصائيات الجروب
+GROUP_STATS_TOP_OFFENDERS = int(os.environ.get('GROUP_STATS_TOP_OFFENDERS', 5))
+
 # إعدادات التطوير
 DEBUG = os.environ.get('DEBUG', 'False').lower() == 'true'
 PORT = int(os.environ.get('PORT', 8080))
+WEBHOOK_URL = os.environ.get('WEBHOOK_URL')
+WEBHOOK_SECRET = os.environ.get('WEBHOOK_SECRET')
+# منفذ مقاييس Prometheus (0 = تعطيل)، وكل عملية عاملة تستخدم المنفذ التالي
+# 9464 بعيد عن PORT وعن منفذ fake_api الافتراضي (8081)
+METRICS_PORT = int(os.environ.get('METRICS_PORT', 9464))
+METRICS_HOST = os.environ.get('METRICS_HOST', '127.0.0.1')
+
+# تتبع مراحل التحديثات: نسبة العينة (0 = تعطيل)، وحد التحديث البطيء بالثواني، وعدد العينات لكل مرحلة
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', 0.01))
+TRACE_SLOW_THRESHOLD = float(os.environ.get('TRACE_SLOW_THRESHOLD', 1.0))
+TRACE_WINDOW = int(os.environ.get('TRACE_WINDOW', 1000))
+# عنوان Bot API بديل (مثل واجهة fake_api.py المحلية)، بصيغة http://host:port/bot
+BOT_API_URL = os.environ.get('BOT_API_URL')
+
+# وضع العمليات المتعددة: مستقبل webhook يوزع التحديثات على عمليات عاملة
+WORKER_PROCESSES = int(os.environ.get('WORKER_PROCESSES', os.cpu_count() or 1))
+# فحص العمليات العاملة وإعادة تشغيل المتوقفة، ويتوقف المستقبل إذا تكرر التوقف في دقيقة واحدة
+WORKER_CHECK_INTERVAL = float(os.environ.get('WORKER_CHECK_INTERVAL', 1))
+WORKER_MAX_RESTARTS = int(os.environ.get('WORKER_MAX_RESTARTS', 5))
+# فترة فحص تغييرات الجروبات من العمليات الأخرى (بالثواني)
+REGISTRY_POLL_INTERVAL = float(os.environ.get('REGISTRY_POLL_INTERVAL', 5))
@@ -1,88 +1,121 @@
 # database.py
 import sqlite3
 import logging
-from config import DB_NAME
+import threading
+from contextlib import contextmanager
+from config import DB_NAME, SQLITE_BUSY_TIMEOUT, SQLITE_STATEMENT_CACHE, RETENTION_DAYS
+from storage import Storage
+from migrations import run_migrations, SQLITE_MIGRATIONS
+from rollups import aggregate, hour_bucket, stats_windows
 
-class Database:
-    def __init__(self):
-        self.db_name = DB_NAME
+class Database(Storage):
+    def __init__(self, db_name=None):
+        super().__init__()
+        self.db_name = db_name or DB_NAME
+        self._lock = threading.RLock()
+        self._conn = None
+        self._transaction_depth = 0
         self.init_database()
+        self.load_group_registry()
 
-    def get_connection(self):
-        """إنشاء اتصال قاعدة البيانات"""
-        conn = sqlite3.connect(self.db_name, check_same_thread=False)
+    def connect(self):
+        """فتح اتصال دائم مع وضع WAL"""
+        conn = sqlite3.connect(
+            self.db_name,
+            timeout=SQLITE_BUSY_TIMEOUT,
+            check_same_thread=False,
+            cached_statements=SQLITE_STATEMENT_CACHE,
+            # المعاملات الضمنية خارج transaction() تحجز الكتابة أيضاً من البداية
+            isolation_level='IMMEDIATE'
+        )
         conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT * 1000)}')
         return conn
 
+    @contextmanager
+    def get_connection(self):
+        """الحصول على الاتصال الدائم داخل معاملة واحدة"""
+        with self._lock:
+            if self._conn is None:
+                self._conn = self.connect()
+            if self._transaction_depth:
+                # داخل معاملة خارجية: نقطة حفظ حتى لا يحفظ خطأ واحد كتابات ناقصة مع بقية الدفعة
+                self._conn.execute('SAVEPOINT operation')
+                try:
+                    yield self._conn
+                except Exception:
+                    self._conn.execute('ROLLBACK TO SAVEPOINT operation')
+                    self._conn.execute('RELEASE SAVEPOINT operation')
+                    raise
+                self._conn.execute('RELEASE SAVEPOINT operation')
+                return
+            with self._conn:
+                yield self._conn
+
+    @contextmanager
+    def transaction(self):
+        """تجميع عدة عمليات في معاملة واحدة"""
+        with self.get_connection() as conn:
+            if not conn.in_transaction:
+                # بدء المعاملة صراحة حتى لا يصبح أول SAVEPOINT هو المعاملة نفسها، و IMMEDIATE
+                # يحجز الكتابة من البداية: مع عدة عمليات على نفس الملف تفشل ترقية معاملة
+                # مؤجلة من القراءة إلى الكتابة فوراً (SQLITE_BUSY) بدلاً من انتظار busy_timeout
+                conn.execute('BEGIN IMMEDIATE')
+            self._transaction_depth += 1
+            try:
+                yield conn
+            finally:
+                self._transaction_depth -= 1
+
+    def close(self):
+        """إغلاق الاتصال الدائم"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
     def init_database(self):
-        """تهيئة جداول قاعدة البيانات"""
+        """تهيئة جداول قاعدة البيانات وتطبيق الترحيلات"""
         try:
             with self.get_connection() as conn:
-                # جدول إعدادات الجروبات
-                conn.execute('''
-                    CREATE TABLE IF NOT EXISTS group_settings (
-                        group_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        group_username TEXT UNIQUE,
-                        group_chat_id INTEGER,
-                        keyword TEXT,
-                        is_active BOOLEAN DEFAULT 1,
-                        language TEXT DEFAULT 'ar',
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-
-                # جدول قنوات الجروبات
-                conn.execute('''
-                    CREATE TABLE IF NOT EXISTS group_channels (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        group_username TEXT,
-                        channel_username TEXT,
-                        is_active BOOLEAN DEFAULT 1,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-
-                # جدول الرسائل المحذوفة
-                conn.execute('''
-                    CREATE TABLE IF NOT EXISTS deleted_messages (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        group_username TEXT,
-                        user_id INTEGER,
-                        user_name TEXT,
-                        message_text TEXT,
-                        language TEXT,
-                        reason TEXT,
-                        deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-
-                # جدول إعدادات المستخدمين
-                conn.execute('''
-                    CREATE TABLE IF NOT EXISTS user_settings (
-                        user_id INTEGER PRIMARY KEY,
-                        username TEXT,
-                        first_name TEXT,
-                        language TEXT DEFAULT 'ar',
-                        is_subscribed BOOLEAN DEFAULT 0,
-                        joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-
-                logging.info("✅ تم تهيئة قاعدة البيانات بنجاح")
+                version = run_migrations(conn, SQLITE_MIGRATIONS)
+                logging.info(f"✅ تم تهيئة قاعدة البيانات بنجاح (إصدار المخطط {version})")
+            if RETENTION_DAYS > 0:
+                # VACUUM الكامل يحجب بدء التشغيل على القواعد الكبيرة، فلا يشغل إلا عند تفعيل الأرشفة
+                self._enable_incremental_vacuum()
         except Exception as e:
             logging.error(f"❌ خطأ في تهيئة قاعدة البيانات: {e}")
 
+    def _enable_incremental_vacuum(self):
+        """تفعيل auto_vacuum=INCREMENTAL (يتطلب VACUUM كاملاً مرة واحدة للقواعد الموجودة)"""
+        with self.get_connection() as conn:
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+                return
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('VACUUM')
+            logging.info("✅ تم تفعيل auto_vacuum التدريجي لقاعدة البيانات")
+
     # دوال الجروبات
     def add_group(self, group_username, group_chat_id, keyword, language='ar'):
         """إضافة جروب جديد"""
         try:
             with self.get_connection() as conn:
+                existing = conn.execute(
+                    'SELECT is_active FROM group_settings WHERE group_username = ?',
+                    (group_username,)
+                ).fetchone()
+                if existing is None or not existing['is_active']:
+                    self._increment_counter(conn, 'active_groups')
                 conn.execute('''
                     INSERT OR REPLACE INTO group_settings 
                     (group_username, group_chat_id, keyword, language) 
                     VALUES (?, ?, ?, ?)
                 ''', (group_username, group_chat_id, keyword, language))
-                return True
+                self._increment_counter(conn, 'registry_version')
+            self.groups.put_group(group_username, group_chat_id, keyword, language)
+            return True
         except Exception as e:
             logging.error(f"❌ خطأ في إضافة الجروب: {e}")
             return False
@@ -110,6 +143,31 @@ class Database:
             logging.error(f"❌ خطأ في جلب الجروبات: {e}")
             return []
 
+    def load_group_registry(self):
+        """تحميل إعدادات الجروبات وقنواتها إلى الفهرس في الذاكرة"""
+        try:
+            with self.get_connection() as conn:
+                group_rows = conn.execute('SELECT * FROM group_settings').fetchall()
+                channel_rows = conn.execute(
+                    'SELECT * FROM group_channels WHERE is_active = 1 ORDER BY id'
+                ).fetchall()
+            self.groups.load(group_rows, channel_rows)
+            logging.info(f"✅ تم تحميل {len(self.groups)} جروب إلى الذاكرة")
+        except Exception as e:
+            logging.error(f"❌ خطأ في تحميل فهرس الجروبات: {e}")
+
+    def get_registry_version(self):
+        """رقم إصدار إعدادات الجروبات (يزيد مع كل تعديل)"""
+        try:
+            with self.get_connection() as conn:
+                row = conn.execute(
+                    "SELECT value FROM stats_counters WHERE name = 'registry_version'"
+                ).fetchone()
+                return row[0] if row else 0
+        except Exception as e:
+            logging.error(f"❌ خطأ في قراءة إصدار الجروبات: {e}")
+            return None
+
     # دوال القنوات
     def add_group_channel(self, group_username, channel_username):
         """إضافة قناة للجروب"""
@@ -120,7 +178,9 @@ class Database:
                     (group_username, channel_username) 
                     VALUES (?, ?)
                 ''', (group_username, channel_username))
-                return True
+                self._increment_counter(conn, 'registry_version')
+            self.groups.put_channel(group_username, channel_username)
+            return True
         except Exception as e:
             logging.error(f"❌ خطأ في إضافة القناة: {e}")
             return False
@@ -143,25 +203,40 @@ class Database:
         """إضافة/تحديث مستخدم"""
         try:
             with self.get_connection() as conn:
+                existing = conn.execute(
+                    'SELECT 1 FROM user_settings WHERE user_id = ?',
+                    (user_id,)
+                ).fetchone()
+                if existing is None:
+                    self._increment_counter(conn, 'total_users')
                 conn.execute('''
                     INSERT OR REPLACE INTO user_settings 
                     (user_id, username, first_name, language) 
                     VALUES (?, ?, ?, ?)
                 ''', (user_id, username, first_name, language))
-                return True
+                row = conn.execute(
+                    'SELECT * FROM user_settings WHERE user_id = ?', 
+                    (user_id,)
+                ).fetchone()
+            self.users.set(user_id, row)
+            return True
         except Exception as e:
+            self.users.invalidate(user_id)
             logging.error(f"❌ خطأ في إضافة المستخدم: {e}")
             return False
 
-    def get_user(self, user_id):
-        """الحصول على بيانات المستخدم"""
+    def load_user(self, user_id):
+        """قراءة بيانات المستخدم من قاعدة البيانات وتخزينها مؤقتاً"""
         try:
             with self.get_connection() as conn:
                 cursor = conn.execute(
                     'SELECT * FROM user_settings WHERE user_id = ?', 
                     (user_id,)
                 )
-                return cursor.fetchone()
+                row = cursor.fetchone()
+            # تخزين المستخدمين غير المسجلين أيضاً لتجنب قراءتهم في كل ضغطة زر
+            self.users.set(user_id, row)
+            return row
         except Exception as e:
             logging.error(f"❌ خطأ في جلب بيانات المستخدم: {e}")
             return None
@@ -174,40 +249,114 @@ class Database:
                     'UPDATE user_settings SET language = ? WHERE user_id = ?', 
                     (language, user_id)
                 )
-                return True
+            self._cache_user_language(user_id, language)
+            return True
         except Exception as e:
+            self.users.invalidate(user_id)
             logging.error(f"❌ خطأ في تحديث لغة المستخدم: {e}")
             return False
 
     # دوال الإحصائيات
+    def _increment_counter(self, conn, name, amount=1):
+        """زيادة عداد داخل نفس معاملة الكتابة"""
+        conn.execute(
+            'UPDATE stats_counters SET value = value + ? WHERE name = ?',
+            (amount, name)
+        )
+
     def get_stats(self):
-        """الحصول على الإحصائيات"""
+        """الحصول على الإحصائيات من العدادات"""
         try:
             with self.get_connection() as conn:
-                # عدد الجروبات النشطة
-                active_groups = conn.execute(
-                    'SELECT COUNT(*) FROM group_settings WHERE is_active = 1'
-                ).fetchone()[0]
-
-                # عدد الرسائل المحذوفة
-                deleted_messages = conn.execute(
-                    'SELECT COUNT(*) FROM deleted_messages'
-                ).fetchone()[0]
-
-                # عدد المستخدمين
-                total_users = conn.execute(
-                    'SELECT COUNT(*) FROM user_settings'
-                ).fetchone()[0]
-
+                counters = dict(conn.execute('SELECT name, value FROM stats_counters').fetchall())
                 return {
-                    'active_groups': active_groups,
-                    'deleted_messages': deleted_messages,
-                    'total_users': total_users
+                    'active_groups': counters.get('active_groups', 0),
+                    'deleted_messages': counters.get('deleted_messages', 0),
+                    'total_users': counters.get('total_users', 0)
                 }
         except Exception as e:
             logging.error(f"❌ خطأ في جلب الإحصائيات: {e}")
             return {'active_groups': 0, 'deleted_messages': 0, 'total_users': 0}
 
+    def rebuild_counters(self):
+        """إعادة حساب العدادات من الجداول (للمطابقة اليدوية)"""
+        try:
+            with self.get_connection() as conn:
+                counts = {
+                    'active_groups': conn.execute(
+                        'SELECT COUNT(*) FROM group_settings WHERE is_active = 1'
+                    ).fetchone()[0],
+                    'deleted_messages': conn.execute(
+                        'SELECT COUNT(*) FROM deleted_messages'
+                    ).fetchone()[0],
+                    'total_users': conn.execute(
+                        'SELECT COUNT(*) FROM user_settings'
+                    ).fetchone()[0]
+                }
+                # السجلات المؤرشفة حذفت من الجدول لكنها تبقى في العدد الكلي
+                archived = conn.execute(
+                    "SELECT value FROM stats_counters WHERE name = 'archived_messages'"
+                ).fetchone()
+                counts['deleted_messages'] += archived[0] if archived else 0
+                conn.executemany(
+                    'INSERT OR REPLACE INTO stats_counters (name, value) VALUES (?, ?)',
+                    list(counts.items())
+                )
+                return counts
+        except Exception as e:
+            logging.error(f"❌ خطأ في إعادة حساب العدادات: {e}")
+            return None
+
+    def get_group_stats(self, group_username, top=5):
+        """إحصائيات جروب واحد من جداول التجميع فقط"""
+        since_day, since_week = stats_windows()
+        try:
+            with self.get_connection() as conn:
+                reasons = dict(conn.execute(
+                    'SELECT reason, count FROM group_reason_totals WHERE group_username = ?',
+                    (group_username,)
+                ).fetchall())
+                last_24h, last_7d = conn.execute('''
+                    SELECT COALESCE(SUM(CASE WHEN bucket >= ? THEN count END), 0),
+                           COALESCE(SUM(count), 0)
+                    FROM deletion_rollups WHERE group_username = ? AND bucket >= ?
+                ''', (since_day, group_username, since_week)).fetchone()
+                offenders = conn.execute('''
+                    SELECT user_id, user_name, count FROM offender_rollups
+                    WHERE group_username = ? ORDER BY count DESC LIMIT ?
+                ''', (group_username, top)).fetchall()
+                return {
+                    'total': sum(reasons.values()),
+                    'last_24h': last_24h,
+                    'last_7d': last_7d,
+                    'reasons': reasons,
+                    'top_offenders': [dict(row) for row in offenders]
+                }
+        except Exception as e:
+            logging.error(f"❌ خطأ في جلب إحصائيات الجروب: {e}")
+            return None
+
+    def _update_rollups(self, conn, records):
+        """تحديث جداول التجميع داخل نفس معاملة تسجيل الرسائل"""
+        bucket = hour_bucket()
+        reasons, offenders = aggregate(records)
+        conn.executemany('''
+            INSERT INTO deletion_rollups (group_username, bucket, reason, count) VALUES (?, ?, ?, ?)
+            ON CONFLICT (group_username, bucket, reason) DO UPDATE SET count = count + excluded.count
+        ''', [(group, bucket, reason, count) for (group, reason), count in reasons.items()])
+        conn.executemany('''
+            INSERT INTO group_reason_totals (group_username, reason, count) VALUES (?, ?, ?)
+            ON CONFLICT (group_username, reason) DO UPDATE SET count = count + excluded.count
+        ''', [(group, reason, count) for (group, reason), count in reasons.items()])
+        conn.executemany('''
+            INSERT INTO offender_rollups (group_username, user_id, user_name, count, last_deleted_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (group_username, user_id) DO UPDATE SET
+            user_name = excluded.user_name,
+            count = count + excluded.count,
+            last_deleted_at = excluded.last_deleted_at
+        ''', [(group, user_id, user_name, count) for (group, user_id), user_name, count in offenders])
+
     # دوال التسجيل
     def log_deleted_message(self, group_username, user_id, user_name, message_text, language, reason):
         """تسجيل الرسائل المحذوفة"""
@@ -218,7 +367,104 @@ class Database:
                     (group_username, user_id, user_name, message_text, language, reason) 
                     VALUES (?, ?, ?, ?, ?, ?)
                 ''', (group_username, user_id, user_name, message_text, language, reason))
+                self._increment_counter(conn, 'deleted_messages')
+                self._update_rollups(conn, [(group_username, user_id, user_name, message_text, language, reason)])
                 return True
         except Exception as e:
             logging.error(f"❌ خطأ في تسجيل الرسالة المحذوفة: {e}")
             return False
+
+    def log_deleted_messages(self, records):
+        """تسجيل دفعة من الرسائل المحذوفة في معاملة واحدة"""
+        try:
+            with self.get_connection() as conn:
+                conn.executemany('''
+                    INSERT INTO deleted_messages 
+                    (group_username, user_id, user_name, message_text, language, reason) 
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', records)
+                self._increment_counter(conn, 'deleted_messages', len(records))
+                self._update_rollups(conn, records)
+                return True
+        except Exception as e:
+            logging.error(f"❌ خطأ في تسجيل دفعة الرسائل المحذوفة: {e}")
+            return False
+
+    # دوال الاحتفاظ والأرشفة
+    def fetch_expired_messages(self, before, limit):
+        """أقدم دفعة من الرسائل المحذوفة قبل وقت الاحتفاظ"""
+        try:
+            with self.get_connection() as conn:
+                rows = conn.execute(
+                    'SELECT * FROM deleted_messages WHERE deleted_at < ? ORDER BY id LIMIT ?',
+                    (before, limit)
+                ).fetchall()
+                return [dict(row) for row in rows]
+        except Exception as e:
+            logging.error(f"❌ خطأ في جلب الرسائل المنتهية: {e}")
+            return []
+
+    def delete_archived_messages(self, ids):
+        """حذف دفعة مؤرشفة وزيادة عداد المؤرشف في نفس المعاملة"""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.executemany('DELETE FROM deleted_messages WHERE id = ?', [(i,) for i in ids])
+                self._increment_counter(conn, 'archived_messages', cursor.rowcount)
+                return True
+        except Exception as e:
+            logging.error(f"❌ خطأ في حذف الرسائل المؤرشفة: {e}")
+            return False
+
+    def incremental_vacuum(self, pages):
+        """إعادة عدد محدود من الصفحات الفارغة إلى نظام الملفات"""
+        try:
+            with self.get_connection() as conn:
+                before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+                # كل تنفيذ يحرر صفحة واحدة فقط؛ executescript غير مناسب لأنه ينهي المعاملة الحالية
+                for _ in range(min(int(pages), before)):
+                    conn.execute('PRAGMA incremental_vacuum(1)')
+                return before - conn.execute('PRAGMA freelist_count').fetchone()[0]
+        except Exception as e:
+            logging.error(f"❌ خطأ في التفريغ التدريجي: {e}")
+            return 0
+
+    # دوال الحذف المؤجل
+    def schedule_deletion(self, chat_id, message_id, due_at):
+        """جدولة حذف رسالة في وقت محدد"""
+        try:
+            with self.get_connection() as conn:
+                conn.execute(
+                    'INSERT INTO scheduled_deletions (chat_id, message_id, due_at) VALUES (?, ?, ?)',
+                    (chat_id, message_id, due_at)
+                )
+                return True
+        except Exception as e:
+            logging.error(f"❌ خطأ في جدولة حذف الرسالة: {e}")
+            return False
+
+    def pop_due_deletions(self, now, limit):
+        """سحب دفعة من عمليات الحذف المستحقة وإزالتها من الجدول"""
+        try:
+            with self.get_connection() as conn:
+                rows = conn.execute(
+                    'SELECT id, chat_id, message_id FROM scheduled_deletions '
+                    'WHERE due_at <= ? ORDER BY due_at LIMIT ?',
+                    (now, limit)
+                ).fetchall()
+                conn.executemany(
+                    'DELETE FROM scheduled_deletions WHERE id = ?',
+                    [(row['id'],) for row in rows]
+                )
+                return [(row['chat_id'], row['message_id']) for row in rows]
+        except Exception as e:
+            logging.error(f"❌ خطأ في جلب عمليات الحذف المستحقة: {e}")
+            return []
+
+    def next_deletion_due(self):
+        """موعد أقرب عملية حذف مجدولة"""
+        try:
+            with self.get_connection() as conn:
+                return conn.execute('SELECT MIN(due_at) FROM scheduled_deletions').fetchone()[0]
+        except Exception as e:
+            logging.error(f"❌ خطأ في جلب موعد الحذف التالي: {e}")
+            return None
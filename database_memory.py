@@ -0,0 +1,277 @@
+# database_memory.py
+import heapq
+import threading
+import itertools
+from datetime import datetime, timezone
+from contextlib import contextmanager
+
+from storage import Storage
+from rollups import aggregate, hour_bucket, stats_windows
+
+
+def _now():
+    # نفس تنسيق CURRENT_TIMESTAMP في SQLite
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class MemoryDatabase(Storage):
+    """محرك تخزين في الذاكرة بالكامل للاختبارات وقياس الأداء بدون قرص"""
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.RLock()
+        self.init_database()
+        self.load_group_registry()
+
+    def init_database(self):
+        """تهيئة الجداول في الذاكرة"""
+        self.group_settings = {}
+        self.group_channels = []
+        self.deleted_messages = []
+        self.user_settings = {}
+        self.scheduled_deletions = []
+        self.stats_counters = {
+            'active_groups': 0, 'deleted_messages': 0, 'total_users': 0,
+            'archived_messages': 0, 'registry_version': 0
+        }
+        self.deletion_rollups = {}
+        self.group_reason_totals = {}
+        self.offender_rollups = {}
+        self._group_ids = itertools.count(1)
+        self._ids = itertools.count(1)
+
+    @contextmanager
+    def transaction(self):
+        """تجميع عدة عمليات (القفل فقط، لا يوجد تراجع)"""
+        with self._lock:
+            yield self
+
+    def close(self):
+        pass
+
+    # دوال الجروبات
+    def add_group(self, group_username, group_chat_id, keyword, language='ar'):
+        """إضافة جروب جديد"""
+        with self._lock:
+            existing = self.group_settings.get(group_username)
+            if existing is None or not existing['is_active']:
+                self.stats_counters['active_groups'] += 1
+            self.group_settings[group_username] = {
+                'group_id': next(self._group_ids),
+                'group_username': group_username,
+                'group_chat_id': group_chat_id,
+                'keyword': keyword,
+                'is_active': 1,
+                'language': language,
+                'created_at': _now()
+            }
+            self.stats_counters['registry_version'] += 1
+        self.groups.put_group(group_username, group_chat_id, keyword, language)
+        return True
+
+    def get_group(self, group_username):
+        """الحصول على بيانات الجروب"""
+        row = self.group_settings.get(group_username)
+        return dict(row) if row else None
+
+    def get_all_groups(self):
+        """الحصول على جميع الجروبات"""
+        with self._lock:
+            return [dict(row) for row in self.group_settings.values() if row['is_active']]
+
+    def load_group_registry(self):
+        """تحميل إعدادات الجروبات وقنواتها إلى الفهرس في الذاكرة"""
+        with self._lock:
+            channels = [row for row in self.group_channels if row['is_active']]
+            self.groups.load(list(self.group_settings.values()), channels)
+
+    def get_registry_version(self):
+        """رقم إصدار إعدادات الجروبات (يزيد مع كل تعديل)"""
+        return self.stats_counters['registry_version']
+
+    # دوال القنوات
+    def add_group_channel(self, group_username, channel_username):
+        """إضافة قناة للجروب"""
+        with self._lock:
+            self.group_channels.append({
+                'id': next(self._ids),
+                'group_username': group_username,
+                'channel_username': channel_username,
+                'is_active': 1,
+                'created_at': _now()
+            })
+            self.stats_counters['registry_version'] += 1
+        self.groups.put_channel(group_username, channel_username)
+        return True
+
+    def get_group_channel(self, group_username):
+        """الحصول على قناة الجروب"""
+        with self._lock:
+            for row in self.group_channels:
+                if row['group_username'] == group_username and row['is_active']:
+                    return dict(row)
+        return None
+
+    # دوال المستخدمين
+    def add_user(self, user_id, username, first_name, language='ar'):
+        """إضافة/تحديث مستخدم"""
+        row = {
+            'user_id': user_id,
+            'username': username,
+            'first_name': first_name,
+            'language': language,
+            'is_subscribed': 0,
+            'joined_at': _now()
+        }
+        with self._lock:
+            if user_id not in self.user_settings:
+                self.stats_counters['total_users'] += 1
+            self.user_settings[user_id] = row
+        self.users.set(user_id, dict(row))
+        return True
+
+    def load_user(self, user_id):
+        """قراءة بيانات المستخدم وتخزينها مؤقتاً"""
+        row = self.user_settings.get(user_id)
+        row = dict(row) if row else None
+        self.users.set(user_id, row)
+        return row
+
+    def update_user_language(self, user_id, language):
+        """تحديث لغة المستخدم"""
+        with self._lock:
+            row = self.user_settings.get(user_id)
+            if row is not None:
+                row['language'] = language
+        self._cache_user_language(user_id, language)
+        return True
+
+    # دوال الإحصائيات
+    def get_stats(self):
+        """الحصول على الإحصائيات من العدادات"""
+        with self._lock:
+            return {
+                'active_groups': self.stats_counters['active_groups'],
+                'deleted_messages': self.stats_counters['deleted_messages'],
+                'total_users': self.stats_counters['total_users']
+            }
+
+    def rebuild_counters(self):
+        """إعادة حساب العدادات من الجداول"""
+        with self._lock:
+            archived = self.stats_counters['archived_messages']
+            self.stats_counters.update({
+                'active_groups': sum(1 for row in self.group_settings.values() if row['is_active']),
+                'deleted_messages': len(self.deleted_messages) + archived,
+                'total_users': len(self.user_settings)
+            })
+            return self.get_stats()
+
+    def get_group_stats(self, group_username, top=5):
+        """إحصائيات جروب واحد من جداول التجميع فقط"""
+        since_day, since_week = stats_windows()
+        with self._lock:
+            reasons = dict(self.group_reason_totals.get(group_username, {}))
+            buckets = self.deletion_rollups.get(group_username, {})
+            offenders = self.offender_rollups.get(group_username, {})
+            last_24h = sum(count for (bucket, _), count in buckets.items() if bucket >= since_day)
+            last_7d = sum(count for (bucket, _), count in buckets.items() if bucket >= since_week)
+            top_offenders = sorted(offenders.values(), key=lambda row: row['count'], reverse=True)[:top]
+            return {
+                'total': sum(reasons.values()),
+                'last_24h': last_24h,
+                'last_7d': last_7d,
+                'reasons': reasons,
+                'top_offenders': [
+                    {'user_id': row['user_id'], 'user_name': row['user_name'], 'count': row['count']}
+                    for row in top_offenders
+                ]
+            }
+
+    def _update_rollups(self, records, deleted_at):
+        """تحديث جداول التجميع مع تسجيل الرسائل"""
+        bucket = hour_bucket()
+        reasons, offenders = aggregate(records)
+        for (group, reason), count in reasons.items():
+            buckets = self.deletion_rollups.setdefault(group, {})
+            buckets[(bucket, reason)] = buckets.get((bucket, reason), 0) + count
+            totals = self.group_reason_totals.setdefault(group, {})
+            totals[reason] = totals.get(reason, 0) + count
+        for (group, user_id), user_name, count in offenders:
+            row = self.offender_rollups.setdefault(group, {}).setdefault(
+                user_id, {'user_id': user_id, 'count': 0}
+            )
+            row['user_name'] = user_name
+            row['count'] += count
+            row['last_deleted_at'] = deleted_at
+
+    # دوال التسجيل
+    def log_deleted_message(self, group_username, user_id, user_name, message_text, language, reason):
+        """تسجيل الرسائل المحذوفة"""
+        return self.log_deleted_messages([
+            (group_username, user_id, user_name, message_text, language, reason)
+        ])
+
+    def log_deleted_messages(self, records):
+        """تسجيل دفعة من الرسائل المحذوفة"""
+        deleted_at = _now()
+        with self._lock:
+            for group_username, user_id, user_name, message_text, language, reason in records:
+                self.deleted_messages.append({
+                    'id': next(self._ids),
+                    'group_username': group_username,
+                    'user_id': user_id,
+                    'user_name': user_name,
+                    'message_text': message_text,
+                    'language': language,
+                    'reason': reason,
+                    'deleted_at': deleted_at
+                })
+            self.stats_counters['deleted_messages'] += len(records)
+            self._update_rollups(records, deleted_at)
+        return True
+
+    # دوال الاحتفاظ والأرشفة
+    def fetch_expired_messages(self, before, limit):
+        """أقدم دفعة من الرسائل المحذوفة قبل وقت الاحتفاظ"""
+        with self._lock:
+            rows = []
+            for row in self.deleted_messages:
+                if len(rows) >= limit:
+                    break
+                if row['deleted_at'] < before:
+                    rows.append(dict(row))
+            return rows
+
+    def delete_archived_messages(self, ids):
+        """حذف دفعة مؤرشفة وزيادة عداد المؤرشف"""
+        ids = set(ids)
+        with self._lock:
+            remaining = [row for row in self.deleted_messages if row['id'] not in ids]
+            self.stats_counters['archived_messages'] += len(self.deleted_messages) - len(remaining)
+            self.deleted_messages = remaining
+        return True
+
+    def incremental_vacuum(self, pages):
+        return 0
+
+    # دوال الحذف المؤجل
+    def schedule_deletion(self, chat_id, message_id, due_at):
+        """جدولة حذف رسالة في وقت محدد"""
+        with self._lock:
+            heapq.heappush(self.scheduled_deletions, (due_at, next(self._ids), chat_id, message_id))
+        return True
+
+    def pop_due_deletions(self, now, limit):
+        """سحب دفعة من عمليات الحذف المستحقة"""
+        due = []
+        with self._lock:
+            while self.scheduled_deletions and len(due) < limit and self.scheduled_deletions[0][0] <= now:
+                _, _, chat_id, message_id = heapq.heappop(self.scheduled_deletions)
+                due.append((chat_id, message_id))
+        return due
+
+    def next_deletion_due(self):
+        """موعد أقرب عملية حذف مجدولة"""
+        with self._lock:
+            return self.scheduled_deletions[0][0] if self.scheduled_deletions else None
@@ -1,171 +1,480 @@
 # database_railway.py
-import os
-import sqlite3
 import logging
-from config import DATABASE_URL
+import threading
+from contextlib import contextmanager
 
-class Database:
-    def __init__(self):
-        self.db_url = DATABASE_URL
+import psycopg2
+import psycopg2.extras
+import psycopg2.extensions
+from psycopg2.pool import ThreadedConnectionPool
+
+from config import DATABASE_URL, PG_POOL_MIN, PG_POOL_MAX
+from storage import Storage
+from migrations import run_migrations, POSTGRES_MIGRATIONS
+from rollups import aggregate, hour_bucket, stats_windows
+
+# الاستعلامات المجهزة على الخادم (PREPARE) مرة واحدة لكل اتصال
+STATEMENTS = {
+    'add_group': '''
+        INSERT INTO group_settings (group_username, group_chat_id, keyword, language)
+        VALUES ($1, $2, $3, $4)
+        ON CONFLICT (group_username) DO UPDATE SET
+        group_chat_id = EXCLUDED.group_chat_id,
+        keyword = EXCLUDED.keyword,
+        language = EXCLUDED.language,
+        is_active = TRUE
+    ''',
+    'get_group': 'SELECT * FROM group_settings WHERE group_username = $1',
+    'group_is_active': 'SELECT is_active FROM group_settings WHERE group_username = $1 FOR UPDATE',
+    'get_all_groups': 'SELECT * FROM group_settings WHERE is_active = TRUE',
+    'all_group_settings': 'SELECT * FROM group_settings',
+    'active_group_channels': 'SELECT * FROM group_channels WHERE is_active = TRUE ORDER BY id',
+    'add_group_channel': '''
+        INSERT INTO group_channels (group_username, channel_username) VALUES ($1, $2)
+    ''',
+    'get_group_channel': '''
+        SELECT * FROM group_channels WHERE group_username = $1 AND is_active = TRUE
+        ORDER BY id LIMIT 1
+    ''',
+    'add_user': '''
+        INSERT INTO user_settings (user_id, username, first_name, language)
+        VALUES ($1, $2, $3, $4)
+        ON CONFLICT (user_id) DO UPDATE SET
+        username = EXCLUDED.username,
+        first_name = EXCLUDED.first_name,
+        language = EXCLUDED.language,
+        is_subscribed = FALSE,
+        joined_at = CURRENT_TIMESTAMP
+        RETURNING *
+    ''',
+    'get_user': 'SELECT * FROM user_settings WHERE user_id = $1',
+    'user_exists': 'SELECT 1 FROM user_settings WHERE user_id = $1 FOR UPDATE',
+    'update_user_language': 'UPDATE user_settings SET language = $1 WHERE user_id = $2',
+    'count_active_groups': 'SELECT COUNT(*) AS count FROM group_settings WHERE is_active = TRUE',
+    'count_deleted_messages': 'SELECT COUNT(*) AS count FROM deleted_messages',
+    'count_users': 'SELECT COUNT(*) AS count FROM user_settings',
+    'get_counters': 'SELECT name, value FROM stats_counters',
+    'increment_counter': 'UPDATE stats_counters SET value = value + $2 WHERE name = $1',
+    'set_counter': '''
+        INSERT INTO stats_counters (name, value) VALUES ($1, $2)
+        ON CONFLICT (name) DO UPDATE SET value = EXCLUDED.value
+    ''',
+    'log_deleted_message': '''
+        INSERT INTO deleted_messages
+        (group_username, user_id, user_name, message_text, language, reason)
+        VALUES ($1, $2, $3, $4, $5, $6)
+    ''',
+    'add_deletion_rollup': '''
+        INSERT INTO deletion_rollups (group_username, bucket, reason, count) VALUES ($1, $2, $3, $4)
+        ON CONFLICT (group_username, bucket, reason) DO UPDATE SET
+        count = deletion_rollups.count + EXCLUDED.count
+    ''',
+    'add_reason_total': '''
+        INSERT INTO group_reason_totals (group_username, reason, count) VALUES ($1, $2, $3)
+        ON CONFLICT (group_username, reason) DO UPDATE SET
+        count = group_reason_totals.count + EXCLUDED.count
+    ''',
+    'add_offender_rollup': '''
+        INSERT INTO offender_rollups (group_username, user_id, user_name, count, last_deleted_at)
+        VALUES ($1, $2, $3, $4, CURRENT_TIMESTAMP)
+        ON CONFLICT (group_username, user_id) DO UPDATE SET
+        user_name = EXCLUDED.user_name,
+        count = offender_rollups.count + EXCLUDED.count,
+        last_deleted_at = EXCLUDED.last_deleted_at
+    ''',
+    'group_reason_totals': 'SELECT reason, count FROM group_reason_totals WHERE group_username = $1',
+    'group_recent_deletions': '''
+        SELECT COALESCE(SUM(count) FILTER (WHERE bucket >= $2), 0) AS last_24h,
+               COALESCE(SUM(count), 0) AS last_7d
+        FROM deletion_rollups WHERE group_username = $1 AND bucket >= $3
+    ''',
+    'group_top_offenders': '''
+        SELECT user_id, user_name, count FROM offender_rollups
+        WHERE group_username = $1 ORDER BY count DESC LIMIT $2
+    ''',
+    'expired_messages': '''
+        SELECT * FROM deleted_messages WHERE deleted_at < $1 ORDER BY id LIMIT $2
+    ''',
+    'delete_messages_by_id': 'DELETE FROM deleted_messages WHERE id = ANY($1)',
+    'get_counter': 'SELECT value FROM stats_counters WHERE name = $1',
+    'schedule_deletion': '''
+        INSERT INTO scheduled_deletions (chat_id, message_id, due_at) VALUES ($1, $2, $3)
+    ''',
+    'pop_due_deletions': '''
+        DELETE FROM scheduled_deletions WHERE id IN (
+            SELECT id FROM scheduled_deletions WHERE due_at <= $1
+            ORDER BY due_at LIMIT $2 FOR UPDATE SKIP LOCKED
+        )
+        RETURNING chat_id, message_id
+    ''',
+    'next_deletion_due': 'SELECT MIN(due_at) AS due_at FROM scheduled_deletions',
+}
+
+
+# أخطاء تعني أن جلسة الاتصال نفسها لم تعد صالحة
+DISCONNECT_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+class PreparedConnection(psycopg2.extensions.connection):
+    """اتصال يتذكر الاستعلامات المجهزة عليه"""
+
+    opened = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        PreparedConnection.opened += 1
+
+
+class Database(Storage):
+    def __init__(self, db_url=None, minconn=PG_POOL_MIN, maxconn=PG_POOL_MAX):
+        super().__init__()
+        self.db_url = db_url or DATABASE_URL
+        self.pool = ThreadedConnectionPool(
+            minconn, maxconn, self.db_url, connection_factory=PreparedConnection
+        )
+        self._local = threading.local()
         self.init_database()
+        self.load_group_registry()
 
+    @contextmanager
     def get_connection(self):
-        """إنشاء اتصال قاعدة البيانات"""
-        if self.db_url.startswith('postgresql://'):
-            # استخدم PostgreSQL على Railway
-            import psycopg2
-            from urllib.parse import urlparse
-            result = urlparse(self.db_url)
-            conn = psycopg2.connect(
-                database=result.path[1:],
-                user=result.username,
-                password=result.password,
-                host=result.hostname,
-                port=result.port
-            )
-            return conn
+        """استعارة اتصال من المجمع داخل معاملة واحدة"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            # داخل معاملة خارجية: نقطة حفظ حتى لا يفسد خطأ واحد بقية الدفعة
+            cursor = conn.cursor()
+            cursor.execute('SAVEPOINT operation')
+            try:
+                yield conn
+            except Exception:
+                cursor.execute('ROLLBACK TO SAVEPOINT operation')
+                cursor.execute('RELEASE SAVEPOINT operation')
+                raise
+            cursor.execute('RELEASE SAVEPOINT operation')
+            return
+
+        conn = self.pool.getconn()
+        broken = False
+        try:
+            yield conn
+            conn.commit()
+        except Exception as e:
+            broken = isinstance(e, DISCONNECT_ERRORS)
+            if not conn.closed:
+                try:
+                    conn.rollback()
+                except DISCONNECT_ERRORS:
+                    broken = True
+            raise
+        finally:
+            # الاتصال المقطوع يغلق بدلاً من إعادته للمجمع مع استعلاماته المجهزة القديمة
+            self.pool.putconn(conn, close=broken or bool(conn.closed))
+
+    @contextmanager
+    def transaction(self):
+        """تجميع عدة عمليات في معاملة واحدة"""
+        with self.get_connection() as conn:
+            self._local.conn = conn
+            try:
+                yield conn
+            finally:
+                self._local.conn = None
+
+    def close(self):
+        """إغلاق كل اتصالات المجمع"""
+        if not self.pool.closed:
+            self.pool.closeall()
+
+    def execute(self, conn, name, params=()):
+        """تنفيذ استعلام مجهز مسبقاً على الخادم"""
+        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        if name not in conn.prepared:
+            cursor.execute(f'PREPARE {name} AS {STATEMENTS[name]}')
+            conn.prepared.add(name)
+        if params:
+            placeholders = ', '.join(['%s'] * len(params))
+            cursor.execute(f'EXECUTE {name} ({placeholders})', params)
         else:
-            # استخدم SQLite محلياً
-            conn = sqlite3.connect('bot_data.db', check_same_thread=False)
-            conn.row_factory = sqlite3.Row
-            return conn
+            cursor.execute(f'EXECUTE {name}')
+        return cursor
 
     def init_database(self):
-        """تهيئة جداول قاعدة البيانات"""
+        """تهيئة جداول قاعدة البيانات وتطبيق الترحيلات"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            if self.db_url.startswith('postgresql://'):
-                # إنشاء الجداول في PostgreSQL
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS group_settings (
-                        group_id SERIAL PRIMARY KEY,
-                        group_username TEXT UNIQUE,
-                        group_chat_id INTEGER,
-                        keyword TEXT,
-                        is_active BOOLEAN DEFAULT TRUE,
-                        language TEXT DEFAULT 'ar',
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS group_channels (
-                        id SERIAL PRIMARY KEY,
-                        group_username TEXT,
-                        channel_username TEXT,
-                        is_active BOOLEAN DEFAULT TRUE,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS deleted_messages (
-                        id SERIAL PRIMARY KEY,
-                        group_username TEXT,
-                        user_id INTEGER,
-                        user_name TEXT,
-                        message_text TEXT,
-                        language TEXT,
-                        reason TEXT,
-                        deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS user_settings (
-                        user_id INTEGER PRIMARY KEY,
-                        username TEXT,
-                        first_name TEXT,
-                        language TEXT DEFAULT 'ar',
-                        is_subscribed BOOLEAN DEFAULT FALSE,
-                        joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-            else:
-                # إنشاء الجداول في SQLite
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS group_settings (
-                        group_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        group_username TEXT UNIQUE,
-                        group_chat_id INTEGER,
-                        keyword TEXT,
-                        is_active BOOLEAN DEFAULT 1,
-                        language TEXT DEFAULT 'ar',
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS group_channels (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        group_username TEXT,
-                        channel_username TEXT,
-                        is_active BOOLEAN DEFAULT 1,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS deleted_messages (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        group_username TEXT,
-                        user_id INTEGER,
-                        user_name TEXT,
-                        message_text TEXT,
-                        language TEXT,
-                        reason TEXT,
-                        deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS user_settings (
-                        user_id INTEGER PRIMARY KEY,
-                        username TEXT,
-                        first_name TEXT,
-                        language TEXT DEFAULT 'ar',
-                        is_subscribed BOOLEAN DEFAULT 0,
-                        joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-            
-            conn.commit()
-            conn.close()
-            logging.info("✅ تم تهيئة قاعدة البيانات بنجاح")
+            with self.get_connection() as conn:
+                version = run_migrations(conn, POSTGRES_MIGRATIONS, placeholder='%s')
+            logging.info(f"✅ تم تهيئة قاعدة البيانات بنجاح (إصدار المخطط {version})")
         except Exception as e:
             logging.error(f"❌ خطأ في تهيئة قاعدة البيانات: {e}")
 
-    # باقي الدوال تبقى كما هي مع تعديلات بسيطة للتوافق
+    # دوال الجروبات
     def add_group(self, group_username, group_chat_id, keyword, language='ar'):
         """إضافة جروب جديد"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            if self.db_url.startswith('postgresql://'):
-                cursor.execute('''
-                    INSERT INTO group_settings 
-                    (group_username, group_chat_id, keyword, language) 
-                    VALUES (%s, %s, %s, %s)
-                    ON CONFLICT (group_username) DO UPDATE SET
-                    group_chat_id = EXCLUDED.group_chat_id,
-                    keyword = EXCLUDED.keyword,
-                    language = EXCLUDED.language
-                ''', (group_username, group_chat_id, keyword, language))
-            else:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO group_settings 
-                    (group_username, group_chat_id, keyword, language) 
-                    VALUES (?, ?, ?, ?)
-                ''', (group_username, group_chat_id, keyword, language))
-            
-            conn.commit()
-            conn.close()
+            with self.get_connection() as conn:
+                existing = self.execute(conn, 'group_is_active', (group_username,)).fetchone()
+                if existing is None or not existing['is_active']:
+                    self.execute(conn, 'increment_counter', ('active_groups', 1))
+                self.execute(conn, 'add_group', (group_username, group_chat_id, keyword, language))
+                self.execute(conn, 'increment_counter', ('registry_version', 1))
+            self.groups.put_group(group_username, group_chat_id, keyword, language)
             return True
         except Exception as e:
             logging.error(f"❌ خطأ في إضافة الجروب: {e}")
             return False
 
-    # ... باقي الدوال بنفس المنطق مع تعديل ? إلى %s لـ PostgreSQL
+    def get_group(self, group_username):
+        """الحصول على بيانات الجروب"""
+        try:
+            with self.get_connection() as conn:
+                return self.execute(conn, 'get_group', (group_username,)).fetchone()
+        except Exception as e:
+            logging.error(f"❌ خطأ في جلب بيانات الجروب: {e}")
+            return None
+
+    def get_all_groups(self):
+        """الحصول على جميع الجروبات"""
+        try:
+            with self.get_connection() as conn:
+                return self.execute(conn, 'get_all_groups').fetchall()
+        except Exception as e:
+            logging.error(f"❌ خطأ في جلب الجروبات: {e}")
+            return []
+
+    def load_group_registry(self):
+        """تحميل إعدادات الجروبات وقنواتها إلى الفهرس في الذاكرة"""
+        try:
+            with self.get_connection() as conn:
+                group_rows = self.execute(conn, 'all_group_settings').fetchall()
+                channel_rows = self.execute(conn, 'active_group_channels').fetchall()
+            self.groups.load(group_rows, channel_rows)
+            logging.info(f"✅ تم تحميل {len(self.groups)} جروب إلى الذاكرة")
+        except Exception as e:
+            logging.error(f"❌ خطأ في تحميل فهرس الجروبات: {e}")
+
+    def get_registry_version(self):
+        """رقم إصدار إعدادات الجروبات (يزيد مع كل تعديل)"""
+        try:
+            with self.get_connection() as conn:
+                row = self.execute(conn, 'get_counter', ('registry_version',)).fetchone()
+                return row['value'] if row else 0
+        except Exception as e:
+            logging.error(f"❌ خطأ في قراءة إصدار الجروبات: {e}")
+            return None
+
+    # دوال القنوات
+    def add_group_channel(self, group_username, channel_username):
+        """إضافة قناة للجروب"""
+        try:
+            with self.get_connection() as conn:
+                self.execute(conn, 'add_group_channel', (group_username, channel_username))
+                self.execute(conn, 'increment_counter', ('registry_version', 1))
+            self.groups.put_channel(group_username, channel_username)
+            return True
+        except Exception as e:
+            logging.error(f"❌ خطأ في إضافة القناة: {e}")
+            return False
+
+    def get_group_channel(self, group_username):
+        """الحصول على قناة الجروب"""
+        try:
+            with self.get_connection() as conn:
+                return self.execute(conn, 'get_group_channel', (group_username,)).fetchone()
+        except Exception as e:
+            logging.error(f"❌ خطأ في جلب قناة الجروب: {e}")
+            return None
+
+    # دوال المستخدمين
+    def add_user(self, user_id, username, first_name, language='ar'):
+        """إضافة/تحديث مستخدم"""
+        try:
+            with self.get_connection() as conn:
+                if self.execute(conn, 'user_exists', (user_id,)).fetchone() is None:
+                    self.execute(conn, 'increment_counter', ('total_users', 1))
+                row = self.execute(conn, 'add_user', (user_id, username, first_name, language)).fetchone()
+            self.users.set(user_id, row)
+            return True
+        except Exception as e:
+            self.users.invalidate(user_id)
+            logging.error(f"❌ خطأ في إضافة المستخدم: {e}")
+            return False
+
+    def load_user(self, user_id):
+        """قراءة بيانات المستخدم من قاعدة البيانات وتخزينها مؤقتاً"""
+        try:
+            with self.get_connection() as conn:
+                row = self.execute(conn, 'get_user', (user_id,)).fetchone()
+            self.users.set(user_id, row)
+            return row
+        except Exception as e:
+            logging.error(f"❌ خطأ في جلب بيانات المستخدم: {e}")
+            return None
+
+    def update_user_language(self, user_id, language):
+        """تحديث لغة المستخدم"""
+        try:
+            with self.get_connection() as conn:
+                self.execute(conn, 'update_user_language', (language, user_id))
+            self._cache_user_language(user_id, language)
+            return True
+        except Exception as e:
+            self.users.invalidate(user_id)
+            logging.error(f"❌ خطأ في تحديث لغة المستخدم: {e}")
+            return False
+
+    # دوال الإحصائيات
+    def get_stats(self):
+        """الحصول على الإحصائيات من العدادات"""
+        try:
+            with self.get_connection() as conn:
+                counters = {row['name']: row['value'] for row in self.execute(conn, 'get_counters').fetchall()}
+                return {
+                    'active_groups': counters.get('active_groups', 0),
+                    'deleted_messages': counters.get('deleted_messages', 0),
+                    'total_users': counters.get('total_users', 0)
+                }
+        except Exception as e:
+            logging.error(f"❌ خطأ في جلب الإحصائيات: {e}")
+            return {'active_groups': 0, 'deleted_messages': 0, 'total_users': 0}
+
+    def rebuild_counters(self):
+        """إعادة حساب العدادات من الجداول (للمطابقة اليدوية)"""
+        try:
+            with self.get_connection() as conn:
+                counts = {
+                    'active_groups': self.execute(conn, 'count_active_groups').fetchone()['count'],
+                    'deleted_messages': self.execute(conn, 'count_deleted_messages').fetchone()['count'],
+                    'total_users': self.execute(conn, 'count_users').fetchone()['count']
+                }
+                # السجلات المؤرشفة حذفت من الجدول لكنها تبقى في العدد الكلي
+                archived = self.execute(conn, 'get_counter', ('archived_messages',)).fetchone()
+                counts['deleted_messages'] += archived['value'] if archived else 0
+                for name, value in counts.items():
+                    self.execute(conn, 'set_counter', (name, value))
+                return counts
+        except Exception as e:
+            logging.error(f"❌ خطأ في إعادة حساب العدادات: {e}")
+            return None
+
+    def get_group_stats(self, group_username, top=5):
+        """إحصائيات جروب واحد من جداول التجميع فقط"""
+        since_day, since_week = stats_windows()
+        try:
+            with self.get_connection() as conn:
+                reasons = {
+                    row['reason']: row['count']
+                    for row in self.execute(conn, 'group_reason_totals', (group_username,)).fetchall()
+                }
+                recent = self.execute(
+                    conn, 'group_recent_deletions', (group_username, since_day, since_week)
+                ).fetchone()
+                offenders = self.execute(conn, 'group_top_offenders', (group_username, top)).fetchall()
+                return {
+                    'total': sum(reasons.values()),
+                    'last_24h': recent['last_24h'],
+                    'last_7d': recent['last_7d'],
+                    'reasons': reasons,
+                    'top_offenders': [dict(row) for row in offenders]
+                }
+        except Exception as e:
+            logging.error(f"❌ خطأ في جلب إحصائيات الجروب: {e}")
+            return None
+
+    def _update_rollups(self, conn, records):
+        """تحديث جداول التجميع داخل نفس معاملة تسجيل الرسائل"""
+        bucket = hour_bucket()
+        reasons, offenders = aggregate(records)
+        for (group, reason), count in reasons.items():
+            self.execute(conn, 'add_deletion_rollup', (group, bucket, reason, count))
+            self.execute(conn, 'add_reason_total', (group, reason, count))
+        for (group, user_id), user_name, count in offenders:
+            self.execute(conn, 'add_offender_rollup', (group, user_id, user_name, count))
+
+    # دوال التسجيل
+    def log_deleted_message(self, group_username, user_id, user_name, message_text, language, reason):
+        """تسجيل الرسائل المحذوفة"""
+        try:
+            with self.get_connection() as conn:
+                self.execute(
+                    conn, 'log_deleted_message',
+                    (group_username, user_id, user_name, message_text, language, reason)
+                )
+                self.execute(conn, 'increment_counter', ('deleted_messages', 1))
+                self._update_rollups(conn, [(group_username, user_id, user_name, message_text, language, reason)])
+                return True
+        except Exception as e:
+            logging.error(f"❌ خطأ في تسجيل الرسالة المحذوفة: {e}")
+            return False
+
+    def log_deleted_messages(self, records):
+        """تسجيل دفعة من الرسائل المحذوفة في معاملة واحدة"""
+        if not records:
+            return True
+        try:
+            with self.get_connection() as conn:
+                cursor = self.execute(conn, 'log_deleted_message', records[0])
+                psycopg2.extras.execute_batch(
+                    cursor, 'EXECUTE log_deleted_message (%s, %s, %s, %s, %s, %s)', records[1:]
+                )
+                self.execute(conn, 'increment_counter', ('deleted_messages', len(records)))
+                self._update_rollups(conn, records)
+                return True
+        except Exception as e:
+            logging.error(f"❌ خطأ في تسجيل دفعة الرسائل المحذوفة: {e}")
+            return False
+
+    # دوال الاحتفاظ والأرشفة
+    def fetch_expired_messages(self, before, limit):
+        """أقدم دفعة من الرسائل المحذوفة قبل وقت الاحتفاظ"""
+        try:
+            with self.get_connection() as conn:
+                return [dict(row) for row in self.execute(conn, 'expired_messages', (before, limit)).fetchall()]
+        except Exception as e:
+            logging.error(f"❌ خطأ في جلب الرسائل المنتهية: {e}")
+            return []
+
+    def delete_archived_messages(self, ids):
+        """حذف دفعة مؤرشفة وزيادة عداد المؤرشف في نفس المعاملة"""
+        try:
+            with self.get_connection() as conn:
+                cursor = self.execute(conn, 'delete_messages_by_id', (list(ids),))
+                self.execute(conn, 'increment_counter', ('archived_messages', cursor.rowcount))
+                return True
+        except Exception as e:
+            logging.error(f"❌ خطأ في حذف الرسائل المؤرشفة: {e}")
+            return False
+
+    def incremental_vacuum(self, pages):
+        """لا شيء: autovacuum في PostgreSQL يعيد استخدام المساحة تلقائياً"""
+        return 0
+
+    # دوال الحذف المؤجل
+    def schedule_deletion(self, chat_id, message_id, due_at):
+        """جدولة حذف رسالة في وقت محدد"""
+        try:
+            with self.get_connection() as conn:
+                self.execute(conn, 'schedule_deletion', (chat_id, message_id, due_at))
+                return True
+        except Exception as e:
+            logging.error(f"❌ خطأ في جدولة حذف الرسالة: {e}")
+            return False
+
+    def pop_due_deletions(self, now, limit):
+        """سحب دفعة من عمليات الحذف المستحقة وإزالتها من الجدول"""
+        try:
+            with self.get_connection() as conn:
+                rows = self.execute(conn, 'pop_due_deletions', (now, limit)).fetchall()
+                return [(row['chat_id'], row['message_id']) for row in rows]
+        except Exception as e:
+            logging.error(f"❌ خطأ في جلب عمليات الحذف المستحقة: {e}")
+            return []
+
+    def next_deletion_due(self):
+        """موعد أقرب عملية حذف مجدولة"""
+        try:
+            with self.get_connection() as conn:
+                return self.execute(conn, 'next_deletion_due').fetchone()['due_at']
+        except Exception as e:
+            logging.error(f"❌ خطأ في جلب موعد الحذف التالي: {e}")
+            return None
@@ -0,0 +1,133 @@
+# deleter.py
+import asyncio
+import logging
+
+from telegram.error import RetryAfter, TimedOut, NetworkError, BadRequest, Forbidden
+
+from config import DELETE_BATCH_WINDOW, DELETE_MAX_RETRIES
+
+# الحد الأقصى لعدد الرسائل في طلب deleteMessages واحد
+MAX_BULK_DELETE = 100
+
+
+class DeletionScheduler:
+    """تجميع عمليات حذف الرسائل لكل دردشة وإرسالها كطلبات حذف جماعية"""
+
+    def __init__(self, bot, window=DELETE_BATCH_WINDOW, max_retries=DELETE_MAX_RETRIES):
+        self.bot = bot
+        self.window = window
+        self.max_retries = max_retries
+        self._pending = {}
+        self._timers = {}
+        self._inflight = set()
+
+        # إحصائيات
+        self.scheduled = 0
+        self.deleted = 0
+        self.api_calls = 0
+        self.retries = 0
+        self.failed = 0
+
+    @property
+    def supports_bulk(self):
+        # deleteMessages متاح فقط في إصدارات Bot API الأحدث
+        return hasattr(self.bot, 'delete_messages')
+
+    def schedule(self, chat_id, message_id):
+        """إضافة رسالة إلى دفعة الحذف الخاصة بالدردشة"""
+        self.scheduled += 1
+        self._pending.setdefault(chat_id, []).append(message_id)
+        if chat_id not in self._timers:
+            # بدون deleteMessages لا فائدة من الانتظار: كل رسالة تحتاج طلباً مستقلاً
+            delay = self.window if self.supports_bulk else 0
+            self._timers[chat_id] = asyncio.create_task(self._flush_later(chat_id, delay))
+
+    def schedule_many(self, chat_id, message_ids):
+        """إضافة عدة رسائل إلى دفعة الحذف"""
+        for message_id in message_ids:
+            self.schedule(chat_id, message_id)
+
+    async def _flush_later(self, chat_id, delay):
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self._timers.pop(chat_id, None)
+        await self.flush(chat_id)
+
+    async def flush(self, chat_id):
+        """حذف كل الرسائل المعلقة في الدردشة"""
+        message_ids = self._pending.pop(chat_id, None)
+        if not message_ids:
+            return
+
+        task = asyncio.current_task()
+        self._inflight.add(task)
+        try:
+            if self.supports_bulk and len(message_ids) > 1:
+                for start in range(0, len(message_ids), MAX_BULK_DELETE):
+                    chunk = message_ids[start:start + MAX_BULK_DELETE]
+                    if await self._call(self.bot.delete_messages, chat_id, chunk):
+                        self.deleted += len(chunk)
+            else:
+                results = await asyncio.gather(*[
+                    self._call(self.bot.delete_message, chat_id, message_id)
+                    for message_id in message_ids
+                ])
+                self.deleted += sum(1 for result in results if result)
+        finally:
+            self._inflight.discard(task)
+
+    async def _call(self, method, *args):
+        """تنفيذ طلب حذف مع إعادة المحاولة عند تجاوز حد الطلبات"""
+        delay = 1.0
+        for attempt in range(self.max_retries + 1):
+            self.api_calls += 1
+            try:
+                await method(*args)
+                return True
+            except RetryAfter as e:
+                wait = e.retry_after
+            except (BadRequest, Forbidden) as e:
+                # الرسالة محذوفة مسبقاً أو لا توجد صلاحية - لا فائدة من الإعادة
+                logging.error(f"❌ Error deleting message: {e}")
+                self.failed += 1
+                return False
+            except (TimedOut, NetworkError):
+                wait = delay
+                delay *= 2
+            except Exception as e:
+                logging.error(f"❌ Error deleting message: {e}")
+                self.failed += 1
+                return False
+
+            if attempt < self.max_retries:
+                self.retries += 1
+                await asyncio.sleep(wait)
+
+        logging.error(f"❌ Giving up deleting messages in {args[0]} after {self.max_retries} retries")
+        self.failed += 1
+        return False
+
+    async def stop(self):
+        """حذف كل الرسائل المعلقة فوراً عند الإيقاف"""
+        for timer in list(self._timers.values()):
+            timer.cancel()
+        self._timers.clear()
+        await asyncio.gather(*[self.flush(chat_id) for chat_id in list(self._pending)])
+        if self._inflight:
+            await asyncio.gather(*list(self._inflight), return_exceptions=True)
+
+    @property
+    def queue_depth(self):
+        return sum(len(ids) for ids in self._pending.values())
+
+    def stats(self):
+        """إحصائيات الحذف"""
+        return {
+            'queue_depth': self.queue_depth,
+            'scheduled': self.scheduled,
+            'deleted': self.deleted,
+            'api_calls': self.api_calls,
+            'retries': self.retries,
+            'failed': self.failed
+        }
@@ -0,0 +1,316 @@
+# fake_api.py
+"""محاكاة محلية لـ Bot API لاختبارات الأداء بدون اتصال بتيليجرام
+
+الاستخدام (خادم HTTP مستقل يشير إليه البوت عبر BOT_API_URL):
+    python fake_api.py --port 8081 --latency 30 --flood-rate 0.01 --subscribed 0.8 --rate 200
+    BOT_API_URL=http://127.0.0.1:8081/bot python bot.py
+
+    # وضع webhook: المولد يرسل التحديثات إلى البوت بدلاً من getUpdates
+    python fake_api.py --rate 200 --webhook-url http://127.0.0.1:8080/<BOT_TOKEN>
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import itertools
+from collections import Counter, deque
+
+from telegram.request import BaseRequest
+
+from minihttp import read_request, write_response, parse_params, HTTPClient
+
+BOT_USER = {'id': 1, 'is_bot': True, 'first_name': 'Bot', 'username': 'fake_bot'}
+
+
+# بناء التحديثات
+def user_dict(user_id):
+    # ثلث المستخدمين بدون @username
+    user = {'id': user_id, 'is_bot': False, 'first_name': f'user{user_id}'}
+    if user_id % 3:
+        user['username'] = f'user{user_id}'
+    return user
+
+
+def group_message(update_id, group, user_id, text):
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': -1000 - group, 'type': 'supergroup', 'username': f'group{group}'},
+            'from': user_dict(user_id),
+            'text': text
+        }
+    }
+
+
+def menu_callback(update_id, user_id, action):
+    return {
+        'update_id': update_id,
+        'callback_query': {
+            'id': str(update_id),
+            'from': user_dict(user_id),
+            'chat_instance': str(user_id),
+            'data': action,
+            'message': {
+                'message_id': update_id,
+                'date': int(time.time()),
+                'chat': {'id': user_id, 'type': 'private'},
+                'from': BOT_USER,
+                'text': 'menu'
+            }
+        }
+    }
+
+
+# صلاحيات ChatMemberAdministrator المطلوبة
+ADMIN_RIGHTS = (
+    'can_manage_chat', 'can_delete_messages', 'can_manage_video_chats', 'can_restrict_members',
+    'can_promote_members', 'can_change_info', 'can_invite_users'
+)
+
+
+def membership_fixture(subscribed=1.0, path=None):
+    """دالة (channel, user_id) -> status من ملف JSON ثم من نسبة المشتركين
+
+    الملف بصيغة {"@channel": {"<user_id>": "member" | "left" | ...}}.
+    """
+    fixtures = {}
+    if path:
+        with open(path, encoding='utf-8') as f:
+            fixtures = {
+                channel: {int(user_id): status for user_id, status in members.items()}
+                for channel, members in json.load(f).items()
+            }
+    threshold = int(subscribed * 100)
+
+    def membership(channel, user_id):
+        status = fixtures.get(channel, {}).get(user_id)
+        if status is not None:
+            return status
+        return 'member' if user_id % 100 < threshold else 'left'
+
+    return membership
+
+
+def _chat(chat_id):
+    return {'id': chat_id, 'type': 'supergroup' if chat_id < 0 else 'private'}
+
+
+class FakeBotAPI:
+    """حالة Bot API المحاكاة: عضوية القنوات وأرقام الرسائل وطابور getUpdates وعدد الاستدعاءات
+
+    flood_rate نسبة الطلبات التي ترد بخطأ 429 مع retry_after (عدا getMe وgetUpdates).
+    """
+
+    def __init__(self, membership=None, flood_rate=0.0, retry_after=1, seed=None):
+        self.membership = membership or membership_fixture()
+        self.flood_rate = flood_rate
+        self.retry_after = retry_after
+        self.calls = Counter()
+        self.floods = 0
+        self._random = random.Random(seed)
+        self._message_ids = itertools.count(1_000_000)
+        self._updates = deque()
+        self._update_ids = itertools.count(1)
+        self._update_waiters = None
+
+    def push_update(self, data):
+        """إضافة تحديث إلى طابور getUpdates (يعاد ترقيم update_id)"""
+        data = dict(data, update_id=next(self._update_ids))
+        self._updates.append(data)
+        if self._update_waiters is not None:
+            self._update_waiters.set()
+
+    def _message(self, params):
+        return {
+            'message_id': int(params.get('message_id') or next(self._message_ids)),
+            'date': int(time.time()),
+            'chat': _chat(int(params['chat_id'])),
+            'from': BOT_USER,
+            'text': params.get('text', '')
+        }
+
+    async def _get_updates(self, params):
+        offset = int(params.get('offset') or 0)
+        while self._updates and self._updates[0]['update_id'] < offset:
+            self._updates.popleft()
+        if not self._updates:
+            if self._update_waiters is None:
+                self._update_waiters = asyncio.Event()
+            self._update_waiters.clear()
+            try:
+                await asyncio.wait_for(self._update_waiters.wait(), timeout=float(params.get('timeout') or 0))
+            except asyncio.TimeoutError:
+                pass
+        return list(itertools.islice(self._updates, int(params.get('limit') or 100)))
+
+    async def handle(self, method, params):
+        """تنفيذ طريقة API وإرجاع قيمة result كما يرسلها تيليجرام"""
+        self.calls[method] += 1
+        if method == 'getMe':
+            return BOT_USER
+        if method == 'getUpdates':
+            return await self._get_updates(params)
+        if method == 'getChatMember':
+            user_id = int(params['user_id'])
+            status = self.membership(params['chat_id'], user_id)
+            member = {
+                'status': status,
+                'user': {'id': user_id, 'is_bot': False, 'first_name': f'user{user_id}'}
+            }
+            if status in ('administrator', 'creator'):
+                member['is_anonymous'] = False
+            if status == 'administrator':
+                member.update(dict.fromkeys(ADMIN_RIGHTS, True), can_be_edited=False)
+            return member
+        if method == 'getWebhookInfo':
+            return {'url': '', 'has_custom_certificate': False, 'pending_update_count': len(self._updates)}
+        if method in ('sendMessage', 'editMessageText'):
+            return self._message(params)
+        return True
+
+    async def respond(self, method, params):
+        """الرد الكامل (رمز الحالة، جسم JSON) مع حقن أخطاء 429"""
+        if method not in ('getMe', 'getUpdates') and self._random.random() < self.flood_rate:
+            self.floods += 1
+            return 429, json.dumps({
+                'ok': False,
+                'error_code': 429,
+                'description': f'Too Many Requests: retry after {self.retry_after}',
+                'parameters': {'retry_after': self.retry_after}
+            }).encode('utf-8')
+        result = await self.handle(method, params)
+        return 200, json.dumps({'ok': True, 'result': result}).encode('utf-8')
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    def reset(self):
+        self.calls.clear()
+        self.floods = 0
+
+
+class FakeRequest(BaseRequest):
+    """طبقة HTTP بديلة لـ python-telegram-bot تجيب من FakeBotAPI داخل نفس العملية"""
+
+    def __init__(self, api, latency=0.0):
+        self.api = api
+        self.latency = latency
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None,
+                         write_timeout=None, connect_timeout=None, pool_timeout=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        params = request_data.parameters if request_data is not None else {}
+        return await self.api.respond(url.rsplit('/', 1)[-1], params)
+
+
+class FakeBotAPIServer:
+    """خادم HTTP يقدم FakeBotAPI على /bot<token>/<method> بزمن استجابة ثابت"""
+
+    def __init__(self, api, latency=0.0):
+        self.api = api
+        self.latency = latency
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                _, path, query, headers, body = request
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                status, payload = await self.api.respond(
+                    path.rsplit('/', 1)[-1], parse_params(query, headers, body)
+                )
+                await write_response(writer, '200 OK' if status == 200 else '429 Too Many Requests', payload)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # إيقاف الخادم أثناء انتظار طلب جديد على اتصال مفتوح
+            pass
+        finally:
+            writer.close()
+
+
+async def generate_traffic(api, rate, groups, users, hit_rate, webhook_url=None, secret=None, seed=1):
+    """توليد رسائل جروبات بمعدل ثابت إلى getUpdates أو إلى webhook البوت"""
+    rng = random.Random(seed)
+    client = HTTPClient(webhook_url) if webhook_url else None
+    headers = {'X-Telegram-Bot-Api-Secret-Token': secret} if secret else None
+    interval = 1 / rate
+    next_at = time.monotonic()
+    for update_id in itertools.count(1):
+        data = group_message(
+            update_id, rng.randrange(groups), rng.randrange(1, users + 1),
+            'عرض promo اليوم' if rng.random() < hit_rate else 'رسالة عادية بدون كلمات'
+        )
+        if client is None:
+            api.push_update(data)
+        else:
+            try:
+                await client.post(json.dumps(data).encode('utf-8'), headers)
+            except (ConnectionError, asyncio.IncompleteReadError, OSError) as e:
+                logging.error(f"❌ Webhook delivery failed: {e}")
+        next_at += interval
+        await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+
+
+async def serve(args):
+    api = FakeBotAPI(
+        membership=membership_fixture(args.subscribed, args.members),
+        flood_rate=args.flood_rate,
+        retry_after=args.retry_after
+    )
+    server = await asyncio.start_server(FakeBotAPIServer(api, args.latency / 1000).handle, args.host, args.port)
+    print(f"Fake Bot API on http://{args.host}:{args.port}/bot (BOT_API_URL)")
+
+    tasks = []
+    if args.rate:
+        tasks.append(asyncio.create_task(generate_traffic(
+            api, args.rate, args.groups, args.users, args.hit_rate, args.webhook_url, args.secret
+        )))
+    async with server:
+        while True:
+            await asyncio.sleep(args.report_every)
+            calls = ', '.join(f'{method}={count}' for method, count in sorted(api.calls.items()))
+            print(f"[{time.strftime('%H:%M:%S')}] {api.total_calls} calls, {api.floods} 429s | {calls}")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0.0, help='response latency in ms')
+    parser.add_argument('--flood-rate', type=float, default=0.0, help='share of requests answered with 429')
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--subscribed', type=float, default=1.0, help='share of users subscribed')
+    parser.add_argument('--members', help='JSON membership fixture file')
+    parser.add_argument('--rate', type=float, default=0.0, help='generated group messages per second')
+    parser.add_argument('--groups', type=int, default=10)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--hit-rate', type=float, default=0.2)
+    parser.add_argument('--webhook-url', help='deliver generated updates to this webhook instead of getUpdates')
+    parser.add_argument('--secret', help='secret token header for webhook delivery')
+    parser.add_argument('--report-every', type=float, default=5.0)
+    try:
+        asyncio.run(serve(parser.parse_args(argv)))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,141 @@
+# loadtest.py
+"""اختبار حمل للمعالجات الحقيقية بتحديثات مولدة وواجهة Bot API محاكاة (بدون إنترنت)
+
+الاستخدام:
+    python loadtest.py                     # كل السيناريوهات
+    python loadtest.py --updates 5000 --latency 20
+"""
+import os
+
+# قبل استيراد config: محرك الذاكرة وحدود إرسال لا تقيد القياس
+os.environ['DATABASE_URL'] = 'memory://'
+os.environ.setdefault('GLOBAL_RATE_LIMIT', '1000000')
+os.environ.setdefault('GROUP_RATE_LIMIT', '1000000')
+os.environ.setdefault('RETENTION_DAYS', '0')
+os.environ.setdefault('METRICS_PORT', '0')
+
+import sys
+import time
+import random
+import asyncio
+import logging
+import argparse
+
+from telegram import Update
+
+import bot as bot_module
+from async_database import AsyncDatabase
+from database_memory import MemoryDatabase
+from fake_api import FakeBotAPI, FakeRequest, membership_fixture, group_message, menu_callback
+from utils import subscription_cache
+from bench import report
+from tracing import percentile
+
+KEYWORDS = 'promo,sale'
+MENU_ACTIONS = ['stats', 'group_stats', 'active_groups', 'back_to_main', 'change_language', 'settings']
+
+
+def group_scenario(rng, count, groups, users, hit_rate):
+    """رسائل جروبات موزعة عشوائياً، نسبة hit_rate منها تحتوي كلمة مفتاحية"""
+    return [
+        group_message(
+            i, rng.randrange(groups), rng.randrange(1, users + 1),
+            'عرض promo اليوم' if rng.random() < hit_rate else 'رسالة عادية بدون كلمات'
+        )
+        for i in range(count)
+    ]
+
+
+def menu_scenario(rng, count, users):
+    """ضغطات أزرار القائمة في الدردشات الخاصة"""
+    return [menu_callback(i, rng.randrange(1, users + 1), rng.choice(MENU_ACTIONS)) for i in range(count)]
+
+
+async def run_scenario(updates, groups, users, subscribed, latency):
+    """تشغيل دفعة تحديثات عبر Application الحقيقي وإرجاع (زمن كل تحديث، المدة، عدد الاستدعاءات)"""
+    api = FakeBotAPI(membership=membership_fixture(subscribed))
+
+    # قاعدة بيانات وذاكرة مؤقتة جديدة لكل سيناريو
+    bot_module.db = AsyncDatabase(MemoryDatabase())
+    subscription_cache.clear()
+    telegram_bot = bot_module.TelegramBot(request=FakeRequest(api, latency))
+    application = telegram_bot.application
+
+    for group in range(groups):
+        await bot_module.db.add_group(f'@group{group}', -1000 - group, KEYWORDS)
+    for user_id in range(1, users + 1, 2):
+        await bot_module.db.add_user(user_id, f'user{user_id}', f'user{user_id}', 'en')
+
+    latencies = []
+
+    async def timed(update):
+        start = time.perf_counter()
+        await application.process_update(update)
+        latencies.append(time.perf_counter() - start)
+
+    async with application:
+        await telegram_bot.post_init(application)
+        api.reset()
+        objects = [Update.de_json(data, application.bot) for data in updates]
+
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            asyncio.create_task(telegram_bot.processor.process_update(update, timed(update)))
+            for update in objects
+        ])
+        elapsed = time.perf_counter() - start
+
+        # تفريغ الحذف والسجل المؤجل حتى تحسب استدعاءاتهما
+        await telegram_bot.post_stop(application)
+    await telegram_bot.post_shutdown(application)
+
+    return latencies, elapsed, api.total_calls
+
+
+def run(label, updates, groups, users, subscribed, latency):
+    latencies, elapsed, calls = asyncio.run(run_scenario(updates, groups, users, subscribed, latency))
+    return (
+        label,
+        f'p50 {percentile(latencies, 0.5) * 1000:6.2f}ms  p99 {percentile(latencies, 0.99) * 1000:6.2f}ms  '
+        f'{len(updates) / elapsed:8,.0f} updates/s  {calls / len(updates):.2f} API calls/update'
+    )
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--updates', type=int, default=2000, help='updates per scenario')
+    parser.add_argument('--latency', type=float, default=0.0, help='fake API latency in ms')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+    logging.disable(logging.WARNING)
+    latency = args.latency / 1000
+
+    # خط الأساس ثم تغيير بعد واحد في كل مرة
+    base = {'groups': 10, 'users': 1000, 'subscribed': 0.9, 'hit_rate': 0.2}
+    sweeps = [
+        ('groups', [1, 10, 100]),
+        ('users', [100, 1000, 10000]),
+        ('subscribed', [1.0, 0.9, 0.5]),
+        ('hit_rate', [0.0, 0.2, 0.8]),
+    ]
+    for name, values in sweeps:
+        rows = []
+        for value in values:
+            params = dict(base, **{name: value})
+            rng = random.Random(args.seed)
+            updates = group_scenario(rng, args.updates, params['groups'], params['users'], params['hit_rate'])
+            rows.append(run(
+                f"{name}={value}", updates, params['groups'], params['users'], params['subscribed'], latency
+            ))
+        report(f'monitor_messages, varying {name} (base {base})', rows)
+
+    rows = []
+    for users in (10, 1000):
+        rng = random.Random(args.seed)
+        rows.append(run(f'users={users}', menu_scenario(rng, args.updates, users), 10, users, 1.0, latency))
+    report('Menu callbacks', rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,63 @@
+# manage.py
+"""أوامر صيانة قاعدة البيانات
+
+الاستخدام:
+    python manage.py rebuild-counters    # إعادة حساب عدادات الإحصائيات من الجداول
+    python manage.py prune               # أرشفة وحذف سجلات الحذف الأقدم من RETENTION_DAYS
+"""
+import sys
+import logging
+
+from config import RETENTION_DAYS, ARCHIVE_DIR
+from storage import open_database
+from retention import prune_once
+
+COMMANDS = {}
+
+
+def command(name):
+    """تسجيل دالة كأمر صيانة"""
+    def decorator(func):
+        COMMANDS[name] = func
+        return func
+    return decorator
+
+
+@command('rebuild-counters')
+def rebuild_counters(db):
+    """مطابقة العدادات مع COUNT(*) الفعلي بعد أي تعديل يدوي على الجداول"""
+    before = db.get_stats()
+    after = db.rebuild_counters()
+    if after is None:
+        print("Counter rebuild failed")
+        return 1
+    for name, value in after.items():
+        print(f"{name:<20} {before.get(name, 0):>12,} -> {value:,}")
+    return 0
+
+
+@command('prune')
+def prune(db):
+    """تشغيل دورة أرشفة واحدة يدوياً"""
+    if RETENTION_DAYS <= 0:
+        print("Retention is disabled (RETENTION_DAYS=0)")
+        return 0
+    pruned = prune_once(db)
+    print(f"Archived {pruned:,} messages older than {RETENTION_DAYS} days to {ARCHIVE_DIR}/")
+    return 0
+
+
+def main(argv):
+    if len(argv) != 1 or argv[0] not in COMMANDS:
+        print(f"Usage: python manage.py <{'|'.join(COMMANDS)}>")
+        return 1
+    logging.basicConfig(level=logging.WARNING)
+    db = open_database()
+    try:
+        return COMMANDS[argv[0]](db)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,76 @@
+# matcher.py
+import re
+
+# فواصل قائمة الكلمات المفتاحية: فاصلة عربية أو إنجليزية أو سطر جديد
+_KEYWORD_SEPARATORS = re.compile(r'[,،\n]+')
+
+# التشكيل وعلامات القرآن والتطويل تحذف عند المطابقة
+_REMOVED_CHARS = (
+    [chr(c) for c in range(0x0610, 0x061B)]
+    + [chr(c) for c in range(0x064B, 0x0660)]
+    + ['ٰ', 'ـ']
+)
+
+# توحيد أشكال الألف والياء
+_CHAR_VARIANTS = {
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ی': 'ي',
+}
+
+# جدول توحيد ثابت يطبق بعد lower(): حذف الأحرف المحذوفة وتوحيد الأشكال
+_TABLE = str.maketrans({**dict.fromkeys(_REMOVED_CHARS), **_CHAR_VARIANTS})
+
+# كل حرف موحد -> كل أشكاله في النص الأصلي
+_VARIANT_CLASSES = {
+    base: '[' + base + ''.join(v for v, b in _CHAR_VARIANTS.items() if b == base) + ']'
+    for base in set(_CHAR_VARIANTS.values())
+}
+
+# الأحرف المحذوفة مسموحة بين أي حرفين من الكلمة
+_REMOVED_GAP = '[' + ''.join(_REMOVED_CHARS) + ']*'
+
+
+def normalize_text(text):
+    """توحيد النص: حذف التشكيل والتطويل وتوحيد الألف والياء وتصغير الأحرف"""
+    return text.lower().translate(_TABLE)
+
+
+def _compile_keyword(keyword):
+    """تعبير يطابق الكلمة الموحدة في النص الأصلي بكل أشكالها"""
+    pattern = _REMOVED_GAP.join(_VARIANT_CLASSES.get(char) or re.escape(char) for char in keyword)
+    # تجاهل حالة الأحرف أبطأ، والأحرف العربية ليس لها حالة
+    return re.compile(pattern, re.IGNORECASE if keyword != keyword.upper() else 0)
+
+
+def parse_keywords(keyword):
+    """تقسيم حقل الكلمة المفتاحية إلى قائمة كلمات"""
+    if not keyword:
+        return ()
+    return tuple(k.strip() for k in _KEYWORD_SEPARATORS.split(keyword) if k.strip())
+
+
+class KeywordMatcher:
+    """مطابقة كلمات الجروب المفتاحية بتعبيرات مجمعة مسبقاً
+
+    التوحيد مبني داخل كل تعبير (أشكال الأحرف والتشكيل بين الأحرف وحالة الأحرف)،
+    فيبحث في نص الرسالة كما هو بدون نسخة موحدة منه. تعبير لكل كلمة أسرع من بديل |
+    واحد، لأن re يبحث بسرعة عن أول حرف في التعبير المنفرد فقط.
+    """
+
+    __slots__ = ('keywords', '_patterns')
+
+    def __init__(self, keywords):
+        self.keywords = tuple(keywords)
+        # ترتيب ثابت وبدون تكرار
+        normalized = dict.fromkeys(k for k in map(normalize_text, self.keywords) if k)
+        self._patterns = tuple(map(_compile_keyword, normalized))
+
+    def search(self, text):
+        """هل يحتوي النص على أي كلمة مفتاحية بعد التوحيد"""
+        for pattern in self._patterns:
+            if pattern.search(text) is not None:
+                return True
+        return False
+
+    def __bool__(self):
+        return bool(self._patterns)
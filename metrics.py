@@ -0,0 +1,262 @@
+# metrics.py
+"""مقاييس بصيغة Prometheus النصية (بدون مكتبة prometheus_client)
+
+كل القياسات تتم من حلقة الأحداث فقط، لذلك لا تحتاج أقفالاً.
+"""
+import time
+import bisect
+import asyncio
+import logging
+import functools
+
+from minihttp import read_request, write_response
+
+# حدود الهيستوجرام بالثواني
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+INF_LABEL = 'le="+Inf"'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """عداد تراكمي لكل مجموعة قيم للتسميات"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        for labels, value in sorted(self._values.items()):
+            yield f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}'
+
+
+class Histogram:
+    """هيستوجرام بحدود ثابتة لكل مجموعة قيم للتسميات"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+
+    def observe(self, value, *labels):
+        entry = self._values.get(labels)
+        if entry is None:
+            # [عدادات الحدود..., المجموع، العدد]
+            entry = self._values[labels] = [0] * len(self.buckets) + [0.0, 0]
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            entry[index] += 1
+        entry[-2] += value
+        entry[-1] += 1
+
+    def count(self, *labels):
+        entry = self._values.get(labels)
+        return entry[-1] if entry else 0
+
+    def samples(self):
+        for labels, entry in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                yield f'{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}'
+            yield f'{self.name}_bucket{_labels(self.labelnames, labels, INF_LABEL)} {entry[-1]}'
+            yield f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(entry[-2])}'
+            yield f'{self.name}_count{_labels(self.labelnames, labels)} {entry[-1]}'
+
+
+class Gauge:
+    """قيمة لحظية تحسب عند كل قراءة من دالة
+
+    الدالة تعيد رقماً، أو قاموساً من قيم التسميات إلى الأرقام.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, func, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.func = func
+        self.labelnames = tuple(labelnames)
+
+    def samples(self):
+        value = self.func()
+        if not isinstance(value, dict):
+            value = {(): value}
+        for labels, sample in sorted(value.items()):
+            if not isinstance(labels, tuple):
+                labels = (labels,)
+            yield f'{self.name}{_labels(self.labelnames, labels)} {_number(sample)}'
+
+
+class Summary:
+    """ملخص بنسب مئوية محسوبة خارجياً
+
+    الدالة تعيد قاموساً من قيم التسميات إلى {'quantiles': {q: قيمة}, 'sum': ..., 'count': ...}.
+    """
+
+    kind = 'summary'
+
+    def __init__(self, name, documentation, func, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.func = func
+        self.labelnames = tuple(labelnames)
+
+    def samples(self):
+        for labels, stats in sorted(self.func().items()):
+            for q, value in stats['quantiles'].items():
+                quantile = f'quantile="{_number(q)}"'
+                yield f'{self.name}{_labels(self.labelnames, labels, quantile)} {_number(value)}'
+            yield f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(stats["sum"])}'
+            yield f'{self.name}_count{_labels(self.labelnames, labels)} {stats["count"]}'
+
+
+class Registry:
+    """مجموعة المقاييس المعروضة على /metrics"""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        # إعادة التسجيل بنفس الاسم تستبدل المقياس القديم (مثل إنشاء بوت جديد في اختبارات الحمل)
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, func, labelnames=()):
+        return self.register(Gauge(name, documentation, func, labelnames))
+
+    def summary(self, name, documentation, func, labelnames=()):
+        return self.register(Summary(name, documentation, func, labelnames))
+
+    def render(self):
+        """كل المقاييس بصيغة Prometheus النصية"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            try:
+                lines.extend(metric.samples())
+            except Exception as e:
+                logging.error(f"❌ Error collecting metric {metric.name}: {e}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+HANDLER_LATENCY = REGISTRY.histogram(
+    'botcheck_handler_seconds', 'Handler latency in seconds', ('handler',)
+)
+HANDLER_ERRORS = REGISTRY.counter(
+    'botcheck_handler_errors_total', 'Handlers that raised an exception', ('handler',)
+)
+DB_LATENCY = REGISTRY.histogram(
+    'botcheck_db_seconds', 'Database call latency in seconds, including queue wait', ('method',)
+)
+API_LATENCY = REGISTRY.histogram(
+    'botcheck_api_seconds', 'Bot API call latency in seconds, including rate limiter wait', ('method',)
+)
+API_CALLS = REGISTRY.counter(
+    'botcheck_api_calls_total', 'Bot API calls by outcome', ('method', 'outcome')
+)
+
+
+def instrument_handler(callback):
+    """تغليف معالج لقياس زمن تنفيذه باسم الدالة"""
+    name = callback.__name__
+
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        start = time.perf_counter()
+        try:
+            return await callback(update, context)
+        except Exception:
+            HANDLER_ERRORS.inc(name)
+            raise
+        finally:
+            HANDLER_LATENCY.observe(time.perf_counter() - start, name)
+
+    return wrapper
+
+
+class MetricsServer:
+    """خادم HTTP صغير يعرض /metrics"""
+
+    def __init__(self, port, host='127.0.0.1', registry=REGISTRY):
+        self.port = port
+        self.host = host
+        self.registry = registry
+        self._server = None
+
+    async def start(self):
+        if not self.port or self._server is not None:
+            return
+        try:
+            self._server = await asyncio.start_server(self.handle, self.host, self.port)
+        except OSError as e:
+            # المقاييس اختيارية: البوت يستمر بدونها إن كان المنفذ مستخدماً
+            logging.error(f"❌ Metrics server disabled, cannot listen on {self.host}:{self.port}: {e}")
+            return
+        logging.info(f"📈 Metrics on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, _, _, _ = request
+                if method == 'GET' and path == '/metrics':
+                    body = self.registry.render().encode('utf-8')
+                    await write_response(writer, '200 OK', body, CONTENT_TYPE)
+                else:
+                    await write_response(writer, '404 Not Found')
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            pass
+        finally:
+            writer.close()
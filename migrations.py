@@ -0,0 +1,355 @@
+# migrations.py
+import logging
+
+# كل ترحيل: (رقم الإصدار، الوصف، قائمة الأوامر)
+SQLITE_MIGRATIONS = [
+    (1, 'initial schema', [
+        '''
+        CREATE TABLE IF NOT EXISTS group_settings (
+            group_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            group_username TEXT UNIQUE,
+            group_chat_id INTEGER,
+            keyword TEXT,
+            is_active BOOLEAN DEFAULT 1,
+            language TEXT DEFAULT 'ar',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS group_channels (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            group_username TEXT,
+            channel_username TEXT,
+            is_active BOOLEAN DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS deleted_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            group_username TEXT,
+            user_id INTEGER,
+            user_name TEXT,
+            message_text TEXT,
+            language TEXT,
+            reason TEXT,
+            deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS user_settings (
+            user_id INTEGER PRIMARY KEY,
+            username TEXT,
+            first_name TEXT,
+            language TEXT DEFAULT 'ar',
+            is_subscribed BOOLEAN DEFAULT 0,
+            joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    ]),
+    (2, 'scheduled deletions', [
+        '''
+        CREATE TABLE IF NOT EXISTS scheduled_deletions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id INTEGER,
+            message_id INTEGER,
+            due_at REAL
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_scheduled_deletions_due_at ON scheduled_deletions (due_at)',
+    ]),
+    (3, 'hot-path indexes', [
+        'CREATE INDEX IF NOT EXISTS idx_group_channels_group_active ON group_channels (group_username, is_active)',
+        'CREATE INDEX IF NOT EXISTS idx_deleted_messages_group_time ON deleted_messages (group_username, deleted_at)',
+        'CREATE INDEX IF NOT EXISTS idx_deleted_messages_user ON deleted_messages (user_id)',
+        'CREATE INDEX IF NOT EXISTS idx_group_settings_chat_id ON group_settings (group_chat_id)',
+    ]),
+    (4, 'stats counters', [
+        '''
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        '''
+        INSERT OR IGNORE INTO stats_counters (name, value)
+        SELECT 'active_groups', COUNT(*) FROM group_settings WHERE is_active = 1
+        ''',
+        '''
+        INSERT OR IGNORE INTO stats_counters (name, value)
+        SELECT 'deleted_messages', COUNT(*) FROM deleted_messages
+        ''',
+        '''
+        INSERT OR IGNORE INTO stats_counters (name, value)
+        SELECT 'total_users', COUNT(*) FROM user_settings
+        ''',
+    ]),
+    (5, 'deletion rollups', [
+        '''
+        CREATE TABLE IF NOT EXISTS deletion_rollups (
+            group_username TEXT,
+            bucket TIMESTAMP,
+            reason TEXT,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (group_username, bucket, reason)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS group_reason_totals (
+            group_username TEXT,
+            reason TEXT,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (group_username, reason)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS offender_rollups (
+            group_username TEXT,
+            user_id INTEGER,
+            user_name TEXT,
+            count INTEGER NOT NULL DEFAULT 0,
+            last_deleted_at TIMESTAMP,
+            PRIMARY KEY (group_username, user_id)
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_offender_rollups_group_count ON offender_rollups (group_username, count)',
+        '''
+        INSERT OR IGNORE INTO deletion_rollups (group_username, bucket, reason, count)
+        SELECT group_username, strftime('%Y-%m-%d %H:00:00', deleted_at), reason, COUNT(*)
+        FROM deleted_messages GROUP BY 1, 2, 3
+        ''',
+        '''
+        INSERT OR IGNORE INTO group_reason_totals (group_username, reason, count)
+        SELECT group_username, reason, COUNT(*) FROM deleted_messages GROUP BY 1, 2
+        ''',
+        '''
+        INSERT OR IGNORE INTO offender_rollups (group_username, user_id, user_name, count, last_deleted_at)
+        SELECT group_username, user_id, MAX(user_name), COUNT(*), MAX(deleted_at)
+        FROM deleted_messages GROUP BY 1, 2
+        ''',
+    ]),
+    (6, 'archived messages counter', [
+        "INSERT OR IGNORE INTO stats_counters (name, value) VALUES ('archived_messages', 0)",
+    ]),
+    (7, 'group registry version', [
+        "INSERT OR IGNORE INTO stats_counters (name, value) VALUES ('registry_version', 0)",
+    ]),
+]
+
+POSTGRES_MIGRATIONS = [
+    (1, 'initial schema', [
+        '''
+        CREATE TABLE IF NOT EXISTS group_settings (
+            group_id SERIAL PRIMARY KEY,
+            group_username TEXT UNIQUE,
+            group_chat_id BIGINT,
+            keyword TEXT,
+            is_active BOOLEAN DEFAULT TRUE,
+            language TEXT DEFAULT 'ar',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS group_channels (
+            id SERIAL PRIMARY KEY,
+            group_username TEXT,
+            channel_username TEXT,
+            is_active BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS deleted_messages (
+            id SERIAL PRIMARY KEY,
+            group_username TEXT,
+            user_id BIGINT,
+            user_name TEXT,
+            message_text TEXT,
+            language TEXT,
+            reason TEXT,
+            deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS user_settings (
+            user_id BIGINT PRIMARY KEY,
+            username TEXT,
+            first_name TEXT,
+            language TEXT DEFAULT 'ar',
+            is_subscribed BOOLEAN DEFAULT FALSE,
+            joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        # الجداول القديمة أنشئت بـ INTEGER ولا تتسع لمعرفات تيليجرام الحالية
+        'ALTER TABLE group_settings ALTER COLUMN group_chat_id TYPE BIGINT',
+        'ALTER TABLE deleted_messages ALTER COLUMN user_id TYPE BIGINT',
+        'ALTER TABLE user_settings ALTER COLUMN user_id TYPE BIGINT',
+    ]),
+    (2, 'scheduled deletions', [
+        '''
+        CREATE TABLE IF NOT EXISTS scheduled_deletions (
+            id BIGSERIAL PRIMARY KEY,
+            chat_id BIGINT,
+            message_id BIGINT,
+            due_at DOUBLE PRECISION
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_scheduled_deletions_due_at ON scheduled_deletions (due_at)',
+    ]),
+    (3, 'hot-path indexes', [
+        'CREATE INDEX IF NOT EXISTS idx_group_channels_group_active ON group_channels (group_username, is_active)',
+        'CREATE INDEX IF NOT EXISTS idx_deleted_messages_group_time ON deleted_messages (group_username, deleted_at)',
+        'CREATE INDEX IF NOT EXISTS idx_deleted_messages_user ON deleted_messages (user_id)',
+        'CREATE INDEX IF NOT EXISTS idx_group_settings_chat_id ON group_settings (group_chat_id)',
+    ]),
+    (4, 'stats counters', [
+        '''
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            name TEXT PRIMARY KEY,
+            value BIGINT NOT NULL DEFAULT 0
+        )
+        ''',
+        '''
+        INSERT INTO stats_counters (name, value)
+        SELECT 'active_groups', COUNT(*) FROM group_settings WHERE is_active = TRUE
+        ON CONFLICT (name) DO NOTHING
+        ''',
+        '''
+        INSERT INTO stats_counters (name, value)
+        SELECT 'deleted_messages', COUNT(*) FROM deleted_messages
+        ON CONFLICT (name) DO NOTHING
+        ''',
+        '''
+        INSERT INTO stats_counters (name, value)
+        SELECT 'total_users', COUNT(*) FROM user_settings
+        ON CONFLICT (name) DO NOTHING
+        ''',
+    ]),
+    (5, 'deletion rollups', [
+        '''
+        CREATE TABLE IF NOT EXISTS deletion_rollups (
+            group_username TEXT,
+            bucket TIMESTAMP,
+            reason TEXT,
+            count BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (group_username, bucket, reason)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS group_reason_totals (
+            group_username TEXT,
+            reason TEXT,
+            count BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (group_username, reason)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS offender_rollups (
+            group_username TEXT,
+            user_id BIGINT,
+            user_name TEXT,
+            count BIGINT NOT NULL DEFAULT 0,
+            last_deleted_at TIMESTAMP,
+            PRIMARY KEY (group_username, user_id)
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_offender_rollups_group_count ON offender_rollups (group_username, count DESC)',
+        '''
+        INSERT INTO deletion_rollups (group_username, bucket, reason, count)
+        SELECT group_username, date_trunc('hour', deleted_at), reason, COUNT(*)
+        FROM deleted_messages GROUP BY 1, 2, 3
+        ON CONFLICT DO NOTHING
+        ''',
+        '''
+        INSERT INTO group_reason_totals (group_username, reason, count)
+        SELECT group_username, reason, COUNT(*) FROM deleted_messages GROUP BY 1, 2
+        ON CONFLICT DO NOTHING
+        ''',
+        '''
+        INSERT INTO offender_rollups (group_username, user_id, user_name, count, last_deleted_at)
+        SELECT group_username, user_id, MAX(user_name), COUNT(*), MAX(deleted_at)
+        FROM deleted_messages GROUP BY 1, 2
+        ON CONFLICT DO NOTHING
+        ''',
+    ]),
+    (6, 'archived messages counter', [
+        "INSERT INTO stats_counters (name, value) VALUES ('archived_messages', 0) ON CONFLICT (name) DO NOTHING",
+    ]),
+    (7, 'group registry version', [
+        "INSERT INTO stats_counters (name, value) VALUES ('registry_version', 0) ON CONFLICT (name) DO NOTHING",
+    ]),
+]
+
+# الاستعلامات الساخنة والفهرس الذي يجب أن تستخدمه (بصيغة SQLite)
+HOT_QUERIES = [
+    (
+        'group channel lookup',
+        'SELECT * FROM group_channels WHERE group_username = ? AND is_active = 1',
+        ('@group',),
+        'idx_group_channels_group_active'
+    ),
+    (
+        'group deletions by time',
+        'SELECT * FROM deleted_messages WHERE group_username = ? AND deleted_at >= ?',
+        ('@group', '2024-01-01 00:00:00'),
+        'idx_deleted_messages_group_time'
+    ),
+    (
+        'user deletions',
+        'SELECT * FROM deleted_messages WHERE user_id = ?',
+        (1,),
+        'idx_deleted_messages_user'
+    ),
+    (
+        'group by chat id',
+        'SELECT * FROM group_settings WHERE group_chat_id = ?',
+        (-100,),
+        'idx_group_settings_chat_id'
+    ),
+    (
+        'due scheduled deletions',
+        'SELECT id, chat_id, message_id FROM scheduled_deletions WHERE due_at <= ? ORDER BY due_at LIMIT ?',
+        (0, 100),
+        'idx_scheduled_deletions_due_at'
+    ),
+    (
+        'top offenders per group',
+        'SELECT user_id, user_name, count FROM offender_rollups WHERE group_username = ? ORDER BY count DESC LIMIT ?',
+        ('@group', 5),
+        'idx_offender_rollups_group_count'
+    ),
+]
+
+
+def run_migrations(conn, migrations, placeholder='?'):
+    """تطبيق الترحيلات التي لم تطبق بعد وتسجيل إصدار المخطط"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('SELECT MAX(version) FROM schema_version')
+    current = cursor.fetchone()[0] or 0
+
+    for version, description, statements in migrations:
+        if version <= current:
+            continue
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.execute(
+            f'INSERT INTO schema_version (version, description) VALUES ({placeholder}, {placeholder})',
+            (version, description)
+        )
+        current = version
+        logging.info(f"✅ تم تطبيق ترحيل قاعدة البيانات {version}: {description}")
+
+    return current
+
+
+def explain_query_plan(conn, sql, params=()):
+    """خطة تنفيذ استعلام SQLite كنص واحد"""
+    rows = conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()
+    return ' | '.join(row[-1] for row in rows)
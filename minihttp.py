@@ -0,0 +1,105 @@
+# minihttp.py
+"""أدوات HTTP/1.1 صغيرة فوق asyncio streams (بدون مكتبات إضافية)
+
+تكفي لطلبات JSON القصيرة بين مكونات البوت: مستقبل webhook وواجهة Bot API المحاكاة.
+"""
+import json
+import asyncio
+import urllib.parse
+
+# أكبر جسم طلب مقبول (التحديثات وطلبات Bot API أصغر من هذا بكثير)
+MAX_BODY_SIZE = 1024 * 1024
+
+
+class RequestTooLarge(ValueError):
+    """جسم الطلب أكبر من الحد المسموح"""
+
+
+async def read_request(reader, max_body=MAX_BODY_SIZE):
+    """قراءة طلب واحد: (method, path, query, headers, body) أو None عند إغلاق الاتصال"""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, target, _ = request_line.decode('latin-1').split(' ', 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', 0))
+    if length < 0:
+        raise ValueError(f'invalid Content-Length {length}')
+    if length > max_body:
+        raise RequestTooLarge(f'request body of {length} bytes exceeds {max_body}')
+    body = await reader.readexactly(length)
+    path, _, query = target.partition('?')
+    return method, path, query, headers, body
+
+
+async def write_response(writer, status, body=b'', content_type='application/json'):
+    """إرسال رد مع إبقاء الاتصال مفتوحاً"""
+    head = f'HTTP/1.1 {status}\r\nContent-Length: {len(body)}\r\n'
+    if body:
+        head += f'Content-Type: {content_type}\r\n'
+    writer.write(head.encode('latin-1') + b'\r\n' + body)
+    await writer.drain()
+
+
+def parse_params(query, headers, body):
+    """معاملات الطلب من الرابط ومن الجسم (JSON أو form-urlencoded)"""
+    params = dict(urllib.parse.parse_qsl(query))
+    content_type = headers.get('content-type', '')
+    if body and content_type.startswith('application/json'):
+        params.update(json.loads(body))
+    elif body:
+        params.update(urllib.parse.parse_qsl(body.decode('utf-8')))
+    return params
+
+
+class HTTPClient:
+    """عميل POST باتصال واحد دائم"""
+
+    def __init__(self, url):
+        parsed = urllib.parse.urlsplit(url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.path = parsed.path or '/'
+        self._reader = None
+        self._writer = None
+
+    async def post(self, body, headers=None, content_type='application/json'):
+        """إرسال جسم الطلب وإرجاع (رمز الحالة، جسم الرد)"""
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        head = (
+            f'POST {self.path} HTTP/1.1\r\nHost: {self.host}\r\n'
+            f'Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n'
+        )
+        for name, value in (headers or {}).items():
+            head += f'{name}: {value}\r\n'
+        try:
+            self._writer.write(head.encode('latin-1') + b'\r\n' + body)
+            await self._writer.drain()
+            status_line = await self._reader.readline()
+            if not status_line:
+                raise ConnectionError('connection closed by server')
+            length = 0
+            while True:
+                line = await self._reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.strip().lower() == 'content-length':
+                    length = int(value.strip())
+            payload = await self._reader.readexactly(length)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            await self.close()
+            raise
+        return int(status_line.split()[1]), payload
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
@@ -0,0 +1,254 @@
+# outbound.py
+import time
+import asyncio
+import logging
+from collections import deque
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from config import (
+    GLOBAL_RATE_LIMIT, GROUP_RATE_LIMIT, GROUP_RATE_PERIOD, OUTBOUND_MAX_RETRIES
+)
+from metrics import API_CALLS, API_LATENCY
+
+# فئات الأولوية: الأصغر يرسل أولاً
+PRIORITY_DELETE = 0
+PRIORITY_MEMBERSHIP = 1
+PRIORITY_WARNING = 2
+PRIORITY_MENU = 3
+
+PRIORITY_NAMES = {
+    PRIORITY_DELETE: 'delete',
+    PRIORITY_MEMBERSHIP: 'membership',
+    PRIORITY_WARNING: 'warning',
+    PRIORITY_MENU: 'menu',
+}
+
+ENDPOINT_PRIORITIES = {
+    'deleteMessage': PRIORITY_DELETE,
+    'deleteMessages': PRIORITY_DELETE,
+    'getChatMember': PRIORITY_MEMBERSHIP,
+    'sendMessage': PRIORITY_WARNING,
+    'editMessageText': PRIORITY_MENU,
+    'editMessageReplyMarkup': PRIORITY_MENU,
+    'answerCallbackQuery': PRIORITY_MENU,
+}
+
+# الطلبات التي تخضع لحد الرسائل في كل جروب
+GROUP_LIMITED_ENDPOINTS = {'sendMessage', 'editMessageText', 'editMessageReplyMarkup'}
+
+
+class TokenBucket:
+    """دلو رموز لتحديد معدل الطلبات"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated_at')
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = now
+
+    def wait_time(self, now):
+        """الوقت المتبقي حتى يتوفر رمز (0 إذا كان متاحاً)"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class _Request:
+    __slots__ = ('chat_key', 'future', 'enqueued_at')
+
+    def __init__(self, chat_key, future, enqueued_at):
+        self.chat_key = chat_key
+        self.future = future
+        self.enqueued_at = enqueued_at
+
+
+class OutboundScheduler(BaseRateLimiter):
+    """جدولة طلبات Bot API الصادرة حسب الأولوية مع حدود عامة ولكل جروب"""
+
+    def __init__(self, global_rate=GLOBAL_RATE_LIMIT, group_rate=GROUP_RATE_LIMIT,
+                 group_period=GROUP_RATE_PERIOD, max_retries=OUTBOUND_MAX_RETRIES):
+        self.global_rate = global_rate
+        self.group_rate = group_rate
+        self.group_period = group_period
+        self.max_retries = max_retries
+        self._queues = {priority: deque() for priority in PRIORITY_NAMES}
+        self._global_bucket = None
+        self._group_buckets = {}
+        # عدد الطلبات المنتظرة لكل جروب (لمعرفة ما تبقى من حده)
+        self._group_pending = {}
+        self._paused_until = 0.0
+        self._wakeup = None
+        self._task = None
+
+        # إحصائيات وقت الانتظار لكل فئة أولوية
+        self.wait_count = dict.fromkeys(PRIORITY_NAMES, 0)
+        self.wait_total = dict.fromkeys(PRIORITY_NAMES, 0.0)
+        self.wait_max = dict.fromkeys(PRIORITY_NAMES, 0.0)
+        self.rate_limited = 0
+
+    async def initialize(self):
+        # ExtBot.initialize يستدعى مرتين (من Application ومن Updater) قبل فحص التهيئة
+        if self._task is not None:
+            return
+        self._global_bucket = TokenBucket(self.global_rate, self.global_rate, time.monotonic())
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._dispatch())
+
+    async def shutdown(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # السماح للطلبات المتبقية بالمرور بدون انتظار
+        for queue in self._queues.values():
+            while queue:
+                request = queue.popleft()
+                if not request.future.done():
+                    request.future.set_result(None)
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        max_retries = rate_limit_args if rate_limit_args is not None else self.max_retries
+        priority = ENDPOINT_PRIORITIES.get(endpoint, PRIORITY_WARNING)
+
+        chat_key = None
+        if endpoint in GROUP_LIMITED_ENDPOINTS:
+            chat_id = data.get('chat_id')
+            # المعرفات السالبة والنصية تعود لجروبات أو قنوات
+            if isinstance(chat_id, str) or (isinstance(chat_id, int) and chat_id < 0):
+                chat_key = chat_id
+
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            for attempt in range(max_retries + 1):
+                await self._acquire(priority, chat_key)
+                try:
+                    result = await callback(*args, **kwargs)
+                    outcome = 'ok'
+                    return result
+                except RetryAfter as e:
+                    self.rate_limited += 1
+                    API_CALLS.inc(endpoint, 'retry_after')
+                    if attempt == max_retries:
+                        logging.error(f"❌ Rate limit hit for {endpoint} after {max_retries} retries")
+                        raise
+                    # إيقاف كل الطلبات حتى انتهاء المهلة
+                    self._paused_until = max(self._paused_until, time.monotonic() + e.retry_after)
+                    self._wakeup.set()
+        finally:
+            API_CALLS.inc(endpoint, outcome)
+            API_LATENCY.observe(time.perf_counter() - start, endpoint)
+
+    async def _acquire(self, priority, chat_key):
+        """انتظار دور الطلب في الطابور"""
+        if self._task is None:
+            return
+        loop = asyncio.get_running_loop()
+        request = _Request(chat_key, loop.create_future(), time.monotonic())
+        self._queues[priority].append(request)
+        if chat_key is not None:
+            self._group_pending[chat_key] = self._group_pending.get(chat_key, 0) + 1
+        self._wakeup.set()
+        try:
+            await request.future
+        except asyncio.CancelledError:
+            if request in self._queues[priority]:
+                self._queues[priority].remove(request)
+            raise
+        finally:
+            if chat_key is not None:
+                pending = self._group_pending.pop(chat_key) - 1
+                if pending:
+                    self._group_pending[chat_key] = pending
+
+        waited = time.monotonic() - request.enqueued_at
+        self.wait_count[priority] += 1
+        self.wait_total[priority] += waited
+        self.wait_max[priority] = max(self.wait_max[priority], waited)
+
+    def has_group_capacity(self, chat_id):
+        """هل يمكن إرسال رسالة للجروب الآن بدون انتظار حده (بعد الطلبات المنتظرة)"""
+        if self._task is None:
+            return True
+        now = time.monotonic()
+        bucket = self._group_bucket(chat_id, now)
+        bucket.wait_time(now)
+        return bucket.tokens - self._group_pending.get(chat_id, 0) >= 1
+
+    def _group_bucket(self, chat_key, now):
+        bucket = self._group_buckets.get(chat_key)
+        if bucket is None:
+            bucket = TokenBucket(self.group_rate / self.group_period, self.group_rate, now)
+            self._group_buckets[chat_key] = bucket
+        return bucket
+
+    def _next_request(self, now):
+        """اختيار أول طلب جاهز حسب الأولوية، مع تخطي الجروبات التي استنفدت حدها"""
+        min_wait = None
+        for priority in sorted(self._queues):
+            queue = self._queues[priority]
+            for index, request in enumerate(queue):
+                if request.future.done():
+                    continue
+                if request.chat_key is not None:
+                    bucket = self._group_bucket(request.chat_key, now)
+                    wait = bucket.wait_time(now)
+                    if wait:
+                        min_wait = wait if min_wait is None else min(min_wait, wait)
+                        continue
+                    bucket.take()
+                del queue[index]
+                return request, None
+        return None, min_wait
+
+    async def _dispatch(self):
+        while True:
+            now = time.monotonic()
+            if self._paused_until > now:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+
+            wait = self._global_bucket.wait_time(now)
+            if wait:
+                await asyncio.sleep(wait)
+                continue
+
+            request, min_wait = self._next_request(now)
+            if request is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=min_wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._global_bucket.take()
+            request.future.set_result(None)
+
+    @property
+    def queue_depth(self):
+        return sum(len(queue) for queue in self._queues.values())
+
+    def stats(self):
+        """إحصائيات وقت الانتظار لكل فئة أولوية"""
+        return {
+            PRIORITY_NAMES[priority]: {
+                'queued': len(self._queues[priority]),
+                'requests': self.wait_count[priority],
+                'avg_wait': self.wait_total[priority] / self.wait_count[priority] if self.wait_count[priority] else 0.0,
+                'max_wait': self.wait_max[priority]
+            }
+            for priority in PRIORITY_NAMES
+        }
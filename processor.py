@@ -0,0 +1,84 @@
+# processor.py
+import asyncio
+
+from telegram.ext import BaseUpdateProcessor
+
+from config import CONCURRENT_UPDATES, MAX_PENDING_UPDATES
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """معالجة تحديثات الدردشات المختلفة بالتوازي مع الحفاظ على الترتيب داخل كل دردشة
+
+    الإشارة (semaphore) في BaseUpdateProcessor تحجز مكاناً قبل do_process_update،
+    لذلك نجعلها حداً أعلى للتحديثات المعلقة فقط ونطبق حد التوازي الفعلي بعد
+    الحصول على قفل الدردشة. بهذا لا تشغل تحديثات دردشة مزدحمة تنتظر دورها
+    أماكن التنفيذ على حساب الدردشات الأخرى.
+
+    asyncio.Lock يوقظ المنتظرين بترتيب الوصول، فتنفذ تحديثات الدردشة الواحدة
+    بترتيب استلامها وتبقى حالات ConversationHandler وترتيب الحذف صحيحة.
+    """
+
+    __slots__ = ('limit', '_slots', '_chats', 'running', 'processed', 'max_running', 'max_chat_backlog')
+
+    def __init__(self, limit=CONCURRENT_UPDATES, max_pending=MAX_PENDING_UPDATES):
+        super().__init__(max(limit, max_pending))
+        self.limit = limit
+        self._slots = asyncio.Semaphore(limit)
+        self._chats = {}
+
+        # إحصائيات
+        self.running = 0
+        self.processed = 0
+        self.max_running = 0
+        self.max_chat_backlog = 0
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    @staticmethod
+    def chat_key(update):
+        """مفتاح الترتيب: رقم الدردشة، أو None للتحديثات بدون دردشة"""
+        chat = getattr(update, 'effective_chat', None)
+        return chat.id if chat is not None else None
+
+    async def do_process_update(self, update, coroutine):
+        key = self.chat_key(update)
+        if key is None:
+            await self._run(coroutine)
+            return
+
+        entry = self._chats.get(key)
+        if entry is None:
+            entry = self._chats[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        self.max_chat_backlog = max(self.max_chat_backlog, entry[1])
+        try:
+            async with entry[0]:
+                await self._run(coroutine)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._chats[key]
+
+    async def _run(self, coroutine):
+        async with self._slots:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            try:
+                await coroutine
+            finally:
+                self.running -= 1
+                self.processed += 1
+
+    def stats(self):
+        """إحصائيات المعالجة"""
+        return {
+            'processed': self.processed,
+            'running': self.running,
+            'waiting_chats': len(self._chats),
+            'max_running': self.max_running,
+            'max_chat_backlog': self.max_chat_backlog
+        }
@@ -0,0 +1,162 @@
+# registry.py
+import asyncio
+import logging
+import threading
+
+from config import REGISTRY_POLL_INTERVAL
+from matcher import KeywordMatcher, parse_keywords
+
+
+class GroupRecord:
+    """سجل مضغوط لإعدادات جروب واحد"""
+
+    __slots__ = (
+        'group_username', 'group_chat_id', 'keyword', 'is_active', 'language', 'channel_username',
+        'matcher'
+    )
+
+    def __init__(self, group_username, group_chat_id, keyword, is_active=True, language='ar',
+                 channel_username=None, matcher=None):
+        self.group_username = group_username
+        self.group_chat_id = group_chat_id
+        self.keyword = keyword
+        self.is_active = bool(is_active)
+        self.language = language
+        self.channel_username = channel_username
+        # الآلة تبنى مرة واحدة ولا يعاد بناؤها إلا عند تغيير الكلمات
+        self.matcher = matcher if matcher is not None else KeywordMatcher(parse_keywords(keyword))
+
+    def __getitem__(self, key):
+        # توافق مع الوصول بأسلوب sqlite3.Row
+        return getattr(self, key)
+
+
+class GroupRegistry:
+    """فهرس في الذاكرة لإعدادات الجروبات وقنواتها حسب المعرف ورقم الدردشة"""
+
+    def __init__(self):
+        self._by_username = {}
+        self._by_chat_id = {}
+        # أول قناة نشطة لكل جروب (نفس نتيجة get_group_channel)
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def load(self, group_rows, channel_rows):
+        """تحميل الفهرس بالكامل من صفوف group_settings و group_channels"""
+        by_username = {}
+        by_chat_id = {}
+        channels = {}
+
+        for row in channel_rows:
+            channels.setdefault(row['group_username'], row['channel_username'])
+
+        for row in group_rows:
+            record = GroupRecord(
+                row['group_username'], row['group_chat_id'], row['keyword'],
+                row['is_active'], row['language'], channels.get(row['group_username'])
+            )
+            by_username[record.group_username] = record
+            if record.group_chat_id is not None:
+                by_chat_id[record.group_chat_id] = record
+
+        with self._lock:
+            self._by_username = by_username
+            self._by_chat_id = by_chat_id
+            self._channels = channels
+
+    def put_group(self, group_username, group_chat_id, keyword, language='ar'):
+        """تحديث الفهرس بعد كتابة add_group"""
+        with self._lock:
+            old = self._by_username.get(group_username)
+            if old is not None and old.group_chat_id is not None:
+                self._by_chat_id.pop(old.group_chat_id, None)
+
+            matcher = old.matcher if old is not None and old.keyword == keyword else None
+            record = GroupRecord(
+                group_username, group_chat_id, keyword, True, language,
+                self._channels.get(group_username), matcher
+            )
+            self._by_username[group_username] = record
+            if group_chat_id is not None:
+                self._by_chat_id[group_chat_id] = record
+            return record
+
+    def put_channel(self, group_username, channel_username):
+        """تحديث الفهرس بعد كتابة add_group_channel"""
+        with self._lock:
+            if group_username in self._channels:
+                return
+            self._channels[group_username] = channel_username
+            record = self._by_username.get(group_username)
+            if record is not None:
+                record.channel_username = channel_username
+
+    def get(self, group_username, chat_id=None):
+        """البحث عن الجروب برقم الدردشة أولاً ثم بالمعرف"""
+        if chat_id is not None:
+            record = self._by_chat_id.get(chat_id)
+            if record is not None:
+                return record
+        return self._by_username.get(group_username)
+
+    def get_channel(self, group_username):
+        """الحصول على القناة المخصصة للجروب"""
+        return self._channels.get(group_username)
+
+    def __len__(self):
+        return len(self._by_username)
+
+
+class RegistryWatcher:
+    """إعادة تحميل فهرس الجروبات عند تغييره من عملية أخرى (وضع العمليات المتعددة)
+
+    كل عملية تحمل الفهرس مرة واحدة، والجروب الجديد يضاف في العملية التي استقبلت
+    أمر المشرف فقط؛ لذلك تراقب العمليات رقم registry_version في قاعدة البيانات.
+    """
+
+    def __init__(self, db, interval=REGISTRY_POLL_INTERVAL):
+        self.db = db
+        self.interval = interval
+        self.version = None
+        self._task = None
+
+        # إحصائيات
+        self.reloads = 0
+
+    async def start(self):
+        self.version = await self.db.get_registry_version()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception as e:
+                logging.error(f"❌ Error checking group registry version: {e}")
+
+    async def check(self):
+        """إعادة التحميل إذا تغير الإصدار منذ آخر فحص"""
+        version = await self.db.get_registry_version()
+        if version is None or version == self.version:
+            return False
+        await self.db.load_group_registry()
+        self.version = version
+        self.reloads += 1
+        return True
+
+    def stats(self):
+        """إحصائيات مراقب الفهرس"""
+        return {
+            'version': self.version,
+            'reloads': self.reloads
+        }
@@ -0,0 +1,127 @@
+# retention.py
+import os
+import gzip
+import json
+import time
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from config import RETENTION_DAYS, RETENTION_BATCH_SIZE, RETENTION_INTERVAL, ARCHIVE_DIR, VACUUM_PAGES
+
+
+def retention_cutoff(days, moment=None):
+    """أقدم وقت حذف يبقى في الجدول، بنفس تنسيق CURRENT_TIMESTAMP"""
+    moment = moment or datetime.now(timezone.utc)
+    return (moment - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def write_archive(directory, rows, moment=None):
+    """إلحاق السجلات بملف أرشيف اليوم (JSONL مضغوط) وحفظه على القرص
+
+    كل استدعاء يضيف عضو gzip جديداً في نهاية الملف، وقارئات gzip تقرأ
+    الأعضاء المتتالية كملف واحد، فلا يعاد كتابة أي أرشيف سابق.
+    """
+    moment = moment or datetime.now(timezone.utc)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"deleted_messages-{moment:%Y-%m-%d}.jsonl.gz")
+    payload = ''.join(json.dumps(dict(row), ensure_ascii=False, default=str) + '\n' for row in rows)
+    with open(path, 'ab') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb') as archive:
+            archive.write(payload.encode('utf-8'))
+        raw.flush()
+        os.fsync(raw.fileno())
+    return path
+
+
+def prune_once(db, days=RETENTION_DAYS, batch_size=RETENTION_BATCH_SIZE, directory=ARCHIVE_DIR):
+    """أرشفة وحذف كل السجلات المنتهية (نسخة متزامنة لأوامر الصيانة)"""
+    before = retention_cutoff(days)
+    pruned = 0
+    while True:
+        rows = db.fetch_expired_messages(before, batch_size)
+        if not rows:
+            break
+        write_archive(directory, rows)
+        if not db.delete_archived_messages([row['id'] for row in rows]):
+            break
+        pruned += len(rows)
+        if len(rows) < batch_size:
+            break
+    db.incremental_vacuum(VACUUM_PAGES)
+    return pruned
+
+
+class RetentionManager:
+    """أرشفة السجلات القديمة من deleted_messages وحذفها على دفعات صغيرة"""
+
+    def __init__(self, db, days=RETENTION_DAYS, batch_size=RETENTION_BATCH_SIZE,
+                 interval=RETENTION_INTERVAL, directory=ARCHIVE_DIR, vacuum_pages=VACUUM_PAGES):
+        self.db = db
+        self.days = days
+        self.batch_size = batch_size
+        self.interval = interval
+        self.directory = directory
+        self.vacuum_pages = vacuum_pages
+        self._task = None
+
+        # إحصائيات
+        self.runs = 0
+        self.archived = 0
+        self.vacuumed_pages = 0
+        self.last_run_duration = 0.0
+
+    async def start(self):
+        if self.days > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logging.error(f"❌ Error pruning deleted messages: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self):
+        """دورة واحدة: أرشفة ثم حذف كل دفعة، ثم تحرير الصفحات الفارغة"""
+        start = time.perf_counter()
+        before = retention_cutoff(self.days)
+        archived = 0
+        while True:
+            # كل دفعة طلب مستقل على خيط قاعدة البيانات فتتخللها استعلامات المعالجات
+            rows = await self.db.fetch_expired_messages(before, self.batch_size)
+            if not rows:
+                break
+            await asyncio.to_thread(write_archive, self.directory, rows)
+            if not await self.db.delete_archived_messages([row['id'] for row in rows]):
+                break
+            archived += len(rows)
+            if len(rows) < self.batch_size:
+                break
+
+        self.vacuumed_pages += await self.db.incremental_vacuum(self.vacuum_pages)
+        self.runs += 1
+        self.archived += archived
+        self.last_run_duration = time.perf_counter() - start
+        if archived:
+            logging.info(f"🗄️ Archived {archived} deleted messages older than {self.days} days")
+        return archived
+
+    def stats(self):
+        """إحصائيات الأرشفة"""
+        return {
+            'runs': self.runs,
+            'archived': self.archived,
+            'vacuumed_pages': self.vacuumed_pages,
+            'last_run_duration': self.last_run_duration
+        }
@@ -0,0 +1,37 @@
+# rollups.py
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+# أسباب الحذف كما تسجل في deleted_messages
+REASON_NOT_SUBSCRIBED = "لم يشترك في القناة"
+REASON_NO_USERNAME = "لا يوجد username"
+
+BUCKET_FORMAT = '%Y-%m-%d %H:00:00'
+
+
+def hour_bucket(moment=None):
+    """بداية الساعة (UTC) التي يقع فيها الوقت، بنفس تنسيق CURRENT_TIMESTAMP"""
+    moment = moment or datetime.now(timezone.utc)
+    return moment.strftime(BUCKET_FORMAT)
+
+
+def stats_windows(moment=None):
+    """بداية نافذتي آخر 24 ساعة وآخر 7 أيام كحدود للساعات المجمعة"""
+    moment = moment or datetime.now(timezone.utc)
+    return hour_bucket(moment - timedelta(hours=23)), hour_bucket(moment - timedelta(hours=7 * 24 - 1))
+
+
+def aggregate(records):
+    """تجميع دفعة سجلات الحذف قبل كتابتها في جداول التجميع
+
+    يعيد عدد الرسائل لكل (جروب، سبب) ولكل (جروب، مستخدم) مع آخر اسم معروف،
+    حتى تكتب الدفعة بعدد من عمليات upsert يساوي عدد المفاتيح وليس عدد الرسائل.
+    """
+    reasons = Counter()
+    offenders = Counter()
+    names = {}
+    for group_username, user_id, user_name, message_text, language, reason in records:
+        reasons[(group_username, reason)] += 1
+        offenders[(group_username, user_id)] += 1
+        names[(group_username, user_id)] = user_name
+    return reasons, [(key, names[key], count) for key, count in offenders.items()]
@@ -0,0 +1,160 @@
+# storage.py
+from abc import ABC, abstractmethod
+
+from config import DATABASE_URL, USER_CACHE_TTL, USER_CACHE_MAX_ENTRIES
+from registry import GroupRegistry
+from cache import TTLCache, MISSING
+
+
+class Storage(ABC):
+    """الواجهة المشتركة لمحركات التخزين (SQLite و PostgreSQL والذاكرة)
+
+    كل محرك يوفر نفس الدوال حتى يمكن تبديله بدون تعديل المعالجات، والمحرك
+    الذي ينقصه أي منها يفشل عند إنشائه وليس عند أول استدعاء.
+    """
+
+    def __init__(self):
+        self.groups = GroupRegistry()
+        self.users = TTLCache(max_entries=USER_CACHE_MAX_ENTRIES, ttl=USER_CACHE_TTL)
+
+    # دورة الحياة والمعاملات
+    @abstractmethod
+    def init_database(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def transaction(self):
+        """مدير سياق يجمع عدة عمليات في معاملة واحدة"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def close(self):
+        raise NotImplementedError
+
+    # دوال الجروبات
+    @abstractmethod
+    def add_group(self, group_username, group_chat_id, keyword, language='ar'):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_group(self, group_username):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_all_groups(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def load_group_registry(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_registry_version(self):
+        """رقم يزيد مع كل تعديل على الجروبات أو قنواتها (لمزامنة العمليات المتعددة)"""
+        raise NotImplementedError
+
+    # دوال القنوات
+    @abstractmethod
+    def add_group_channel(self, group_username, channel_username):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_group_channel(self, group_username):
+        raise NotImplementedError
+
+    # دوال المستخدمين
+    @abstractmethod
+    def add_user(self, user_id, username, first_name, language='ar'):
+        raise NotImplementedError
+
+    def get_user(self, user_id):
+        """الحصول على بيانات المستخدم (من الذاكرة المؤقتة إن وجدت)"""
+        row = self.users.get(user_id, MISSING)
+        if row is not MISSING:
+            return row
+        return self.load_user(user_id)
+
+    @abstractmethod
+    def load_user(self, user_id):
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_user_language(self, user_id, language):
+        raise NotImplementedError
+
+    def _cache_user_language(self, user_id, language):
+        """تحديث اللغة في نسخة المستخدم المخزنة مؤقتاً"""
+        row = self.users.get(user_id, MISSING)
+        if row:
+            row = dict(row)
+            row['language'] = language
+            self.users.set(user_id, row)
+
+    # دوال الإحصائيات
+    @abstractmethod
+    def get_stats(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def rebuild_counters(self):
+        """إعادة حساب عدادات الإحصائيات من الجداول"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_group_stats(self, group_username, top=5):
+        """إحصائيات جروب واحد من جداول التجميع (بدون المرور على deleted_messages)"""
+        raise NotImplementedError
+
+    # دوال التسجيل
+    @abstractmethod
+    def log_deleted_message(self, group_username, user_id, user_name, message_text, language, reason):
+        raise NotImplementedError
+
+    @abstractmethod
+    def log_deleted_messages(self, records):
+        raise NotImplementedError
+
+    # دوال الاحتفاظ والأرشفة
+    @abstractmethod
+    def fetch_expired_messages(self, before, limit):
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_archived_messages(self, ids):
+        raise NotImplementedError
+
+    @abstractmethod
+    def incremental_vacuum(self, pages):
+        """تحرير الصفحات الفارغة من الملف، ويعيد عدد الصفحات المحررة"""
+        raise NotImplementedError
+
+    # دوال الحذف المؤجل
+    @abstractmethod
+    def schedule_deletion(self, chat_id, message_id, due_at):
+        raise NotImplementedError
+
+    @abstractmethod
+    def pop_due_deletions(self, now, limit):
+        raise NotImplementedError
+
+    @abstractmethod
+    def next_deletion_due(self):
+        raise NotImplementedError
+
+
+def open_database(url=None):
+    """اختيار محرك التخزين حسب DATABASE_URL"""
+    url = url or DATABASE_URL
+
+    if url.startswith('postgresql://'):
+        from database_railway import Database as PostgresDatabase
+        return PostgresDatabase(url)
+
+    if url.startswith('memory://'):
+        from database_memory import MemoryDatabase
+        return MemoryDatabase()
+
+    from database import Database as SQLiteDatabase
+    if url.startswith('sqlite:///'):
+        return SQLiteDatabase(url[len('sqlite:///'):])
+    return SQLiteDatabase()
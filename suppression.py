@@ -0,0 +1,47 @@
+# suppression.py
+import time
+
+from cache import TTLCache
+from config import WARNING_SUPPRESS_WINDOW, WARNING_DELETE_TIMEOUT, WARNING_SUPPRESS_MAX_ENTRIES
+
+
+class WarningEntry:
+    """تحذير مرسل لمستخدم داخل جروب"""
+
+    __slots__ = ('message_id', 'text', 'count', 'shown_count', 'edited_at', 'refresh')
+
+    def __init__(self, message_id, text):
+        self.message_id = message_id
+        self.text = text
+        self.count = 1
+        # العدد الظاهر في الرسالة ووقت آخر إرسال/تعديل ومهمة التعديل الجارية
+        self.shown_count = 1
+        self.edited_at = time.monotonic()
+        self.refresh = None
+
+
+class WarningSuppressor:
+    """جدول منع تكرار التحذيرات لكل (جروب، مستخدم) خلال نافذة زمنية"""
+
+    def __init__(self, window=WARNING_SUPPRESS_WINDOW, max_entries=WARNING_SUPPRESS_MAX_ENTRIES):
+        # لا تتجاوز النافذة مدة بقاء التحذير حتى لا نعدل رسالة محذوفة
+        self.window = min(window, WARNING_DELETE_TIMEOUT)
+        self._entries = TTLCache(max_entries=max_entries, ttl=self.window)
+        self.suppressed = 0
+
+    def get(self, chat_id, user_id):
+        """التحذير النشط للمستخدم في الجروب إن وجد"""
+        entry = self._entries.get((chat_id, user_id))
+        if entry is not None:
+            entry.count += 1
+            self.suppressed += 1
+        return entry
+
+    def record(self, chat_id, user_id, message_id, text):
+        """تسجيل تحذير جديد وبدء نافذة المنع"""
+        entry = WarningEntry(message_id, text)
+        self._entries.set((chat_id, user_id), entry)
+        return entry
+
+    def __len__(self):
+        return len(self._entries)
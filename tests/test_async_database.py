@@ -0,0 +1,63 @@
+# tests/test_async_database.py
+import asyncio
+import sqlite3
+from contextlib import contextmanager
+
+import pytest
+
+from async_database import AsyncDatabase
+from database import Database
+
+
+class FailingCommit:
+    """تغليف transaction ليفشل الحفظ في أول دفعة فقط"""
+
+    def __init__(self, db):
+        self.db = db
+        self.transaction = db.transaction
+        self.failures = 1
+
+    @contextmanager
+    def __call__(self):
+        with self.transaction() as conn:
+            yield conn
+            if self.failures:
+                self.failures -= 1
+                # خطأ بعد تنفيذ الطلبات: يتراجع السياق الحقيقي عن الدفعة كلها
+                raise sqlite3.OperationalError('database is locked')
+
+
+@pytest.fixture
+def database(tmp_path):
+    db = Database(str(tmp_path / 'bot.db'))
+    yield db
+    db.close()
+
+
+def test_failed_commit_rejects_batch_and_keeps_worker(database):
+    failing = FailingCommit(database)
+    database.transaction = failing
+
+    async def scenario():
+        adb = AsyncDatabase(database)
+        # الطلبان في نفس الدفعة لأن الخيط لا يبدأ قبل وضعهما في الطابور
+        results = await asyncio.wait_for(asyncio.gather(
+            adb.add_group('@one', -1001, 'a'),
+            adb.add_group('@two', -1002, 'b'),
+            return_exceptions=True
+        ), timeout=5)
+        # الخيط ما زال يعمل بعد الفشل
+        after = await asyncio.wait_for(adb.add_group('@three', -1003, 'c'), timeout=5)
+        await adb.close()
+        return results, after
+
+    results, after = asyncio.run(scenario())
+    assert isinstance(results[0], sqlite3.OperationalError)
+    assert after is True
+
+    # لم يحفظ شيء من الدفعة الفاشلة
+    conn = sqlite3.connect(database.db_name)
+    saved = {row[0] for row in conn.execute('SELECT group_username FROM group_settings')}
+    conn.close()
+    assert '@one' not in saved
+    assert '@three' in saved
@@ -0,0 +1,144 @@
+# tests/test_database_railway.py
+"""اختبارات محرك PostgreSQL على خادم محلي
+
+    TEST_DATABASE_URL=postgresql://postgres@127.0.0.1:5432/postgres python -m pytest tests
+
+تتخطى الاختبارات إن لم يكن المتغير معرفاً أو لم يكن الخادم متاحاً.
+"""
+import os
+import uuid
+
+import pytest
+
+psycopg2 = pytest.importorskip('psycopg2')
+
+from database_railway import Database, PreparedConnection
+
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+
+
+def _admin_connection():
+    conn = psycopg2.connect(TEST_DATABASE_URL)
+    conn.autocommit = True
+    return conn
+
+
+@pytest.fixture
+def database_url():
+    if not TEST_DATABASE_URL:
+        pytest.skip('TEST_DATABASE_URL is not set')
+    try:
+        admin = _admin_connection()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f'PostgreSQL is not available: {e}')
+
+    # قاعدة بيانات مؤقتة لكل اختبار حتى تطبق الترحيلات من البداية
+    name = f'botcheck_test_{uuid.uuid4().hex[:12]}'
+    with admin.cursor() as cursor:
+        cursor.execute(f'CREATE DATABASE {name}')
+    base, _, _ = TEST_DATABASE_URL.rpartition('/')
+    try:
+        yield f'{base}/{name}'
+    finally:
+        with admin.cursor() as cursor:
+            cursor.execute(f'DROP DATABASE IF EXISTS {name} WITH (FORCE)')
+        admin.close()
+
+
+@pytest.fixture
+def database(database_url):
+    # اتصال واحد في المجمع حتى تمر كل العمليات على نفس الجلسة
+    db = Database(database_url, minconn=1, maxconn=1)
+    yield db
+    db.close()
+
+
+def _backend_pid(db):
+    with db.get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT pg_backend_pid()')
+            return cursor.fetchone()[0]
+
+
+def _prepared_names(db):
+    with db.get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT name FROM pg_prepared_statements')
+            return {row[0] for row in cursor.fetchall()}, conn.prepared
+
+
+def test_prepared_statements_are_reused(database):
+    opened = PreparedConnection.opened
+    assert database.add_group('@group', -1001, 'kw')
+    assert database.get_registry_version() == 1
+    assert database.add_group('@other', -1002, 'kw')
+    assert database.get_registry_version() == 2
+
+    # نفس الاتصال، وكل استعلام جهز مرة واحدة على الخادم
+    assert PreparedConnection.opened == opened
+    server, local = _prepared_names(database)
+    assert {'add_group', 'get_counter', 'increment_counter'} <= local
+    assert local == server
+
+
+def test_broken_connection_is_replaced(database):
+    assert database.add_group('@group', -1001, 'kw')
+    pid = _backend_pid(database)
+    opened = PreparedConnection.opened
+
+    admin = _admin_connection()
+    with admin.cursor() as cursor:
+        cursor.execute('SELECT pg_terminate_backend(%s)', (pid,))
+    admin.close()
+
+    # أول استعمال يكتشف الانقطاع ويغلق الاتصال بدلاً من إعادته للمجمع
+    assert database.get_registry_version() is None
+    assert database.get_registry_version() == 1
+    assert PreparedConnection.opened == opened + 1
+    assert _backend_pid(database) != pid
+
+    # الاتصال الجديد يجهز استعلاماته من جديد
+    assert database.add_group('@other', -1002, 'kw')
+    server, local = _prepared_names(database)
+    assert local == server
+
+
+def test_disconnect_error_is_not_masked(database):
+    pid = _backend_pid(database)
+    opened = PreparedConnection.opened
+
+    with pytest.raises(psycopg2.OperationalError):
+        with database.get_connection() as conn:
+            admin = _admin_connection()
+            with admin.cursor() as cursor:
+                cursor.execute('SELECT pg_terminate_backend(%s)', (pid,))
+            admin.close()
+            database.execute(conn, 'get_counter', ('registry_version',))
+
+    assert database.get_registry_version() == 0
+    assert PreparedConnection.opened == opened + 1
+
+
+def test_operational_error_retires_connection(database):
+    pid = _backend_pid(database)
+
+    # انتهاء مهلة الاستعلام لا يغلق الجلسة، لكن الاتصال لا يعاد للمجمع
+    with pytest.raises(psycopg2.OperationalError):
+        with database.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SET LOCAL statement_timeout = '10ms'")
+                cursor.execute('SELECT pg_sleep(1)')
+
+    assert _backend_pid(database) != pid
+    assert database.get_registry_version() == 0
+
+
+def test_query_error_keeps_connection(database):
+    pid = _backend_pid(database)
+
+    with pytest.raises(psycopg2.errors.UndefinedTable):
+        with database.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT * FROM missing_table')
+
+    assert _backend_pid(database) == pid
@@ -0,0 +1,44 @@
+# tests/test_matcher.py
+import random
+
+import pytest
+
+from matcher import KeywordMatcher, normalize_text, parse_keywords
+
+
+def reference(keywords, text):
+    """المطابقة المرجعية: توحيد النص كاملاً ثم البحث عن كل كلمة"""
+    normalized = normalize_text(text)
+    return any(k in normalized for k in map(normalize_text, keywords) if k)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('هذا اعْلَان مهم', True),
+    ('آعلان', True),
+    ('يبـيـع بسعر', True),
+    ('ىبيع', True),
+    ('PROMO code', True),
+    ('A.B', True),
+    ('axb', False),
+    ('رسالة عادية', False),
+])
+def test_search_normalizes_text(text, expected):
+    matcher = KeywordMatcher(parse_keywords('إعلان، يبيع, promo\na.b'))
+    assert matcher.search(text) is expected
+
+
+def test_search_matches_reference():
+    rng = random.Random(0)
+    chars = 'اأإآىيیبعلنaAbB.ًـ '
+    for _ in range(50):
+        keywords = [''.join(rng.choice(chars) for _ in range(rng.randint(1, 3))) for _ in range(4)]
+        matcher = KeywordMatcher(keywords)
+        for _ in range(200):
+            text = ''.join(rng.choice(chars) for _ in range(rng.randint(0, 12)))
+            assert matcher.search(text) == reference(keywords, text), (keywords, text)
+
+
+def test_empty_keywords():
+    matcher = KeywordMatcher(parse_keywords(' ، ,'))
+    assert not matcher
+    assert not matcher.search('أي نص')
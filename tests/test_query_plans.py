@@ -0,0 +1,22 @@
+# tests/test_query_plans.py
+import sqlite3
+
+import pytest
+
+from migrations import HOT_QUERIES, SQLITE_MIGRATIONS, explain_query_plan, run_migrations
+
+
+@pytest.fixture(scope='module')
+def conn(tmp_path_factory):
+    conn = sqlite3.connect(str(tmp_path_factory.mktemp('plans') / 'bot.db'))
+    run_migrations(conn, SQLITE_MIGRATIONS)
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize('name, sql, params, index', HOT_QUERIES, ids=[q[0] for q in HOT_QUERIES])
+def test_hot_query_uses_index(conn, name, sql, params, index):
+    plan = explain_query_plan(conn, sql, params)
+    assert index in plan, plan
+    assert 'SCAN' not in plan, plan
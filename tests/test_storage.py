@@ -0,0 +1,24 @@
+# tests/test_storage.py
+import pytest
+
+from storage import Storage, open_database
+from database import Database as SQLiteDatabase
+from database_memory import MemoryDatabase
+
+
+@pytest.mark.parametrize('engine', [SQLiteDatabase, MemoryDatabase])
+def test_engines_implement_storage(engine):
+    assert not engine.__abstractmethods__
+
+
+def test_engine_missing_methods_fails_at_construction():
+    class Partial(Storage):
+        def init_database(self):
+            pass
+
+    with pytest.raises(TypeError, match='abstract'):
+        Partial()
+
+
+def test_open_database_memory():
+    assert isinstance(open_database('memory://'), MemoryDatabase)
@@ -0,0 +1,59 @@
+# tests/test_workers.py
+import asyncio
+import multiprocessing
+import queue
+
+from workers import WebhookReceiver, WorkerSupervisor, update_chat_id
+
+
+def crashing_worker(index, queue, workers):
+    """العملية 1 تتوقف فوراً والبقية تنتظر إشارة الإيقاف"""
+    if index == 1:
+        raise SystemExit(3)
+    while queue.get() is not None:
+        pass
+
+
+def test_update_chat_id():
+    assert update_chat_id({'message': {'chat': {'id': -100}}}) == -100
+    assert update_chat_id({'callback_query': {'from': {'id': 7}}}) == 7
+    assert update_chat_id({'poll': {'id': '1'}}) == 0
+
+
+def test_supervisor_restarts_dead_worker():
+    supervisor = WorkerSupervisor(
+        2, context=multiprocessing.get_context('fork'), target=crashing_worker, max_restarts=2
+    )
+    supervisor.start()
+    try:
+        healthy, first_queue = supervisor.processes[0], supervisor.queues[1]
+        for expected in (True, True, False):
+            supervisor.processes[1].join(timeout=10)
+            assert supervisor.check() is expected
+        # العملية السليمة لم يعد تشغيلها، والمتوقفة بدأت بطابور جديد
+        assert supervisor.processes[0] is healthy
+        assert supervisor.queues[1] is not first_queue
+        assert supervisor.restarts == 3
+    finally:
+        supervisor.stop()
+    assert healthy.exitcode == 0
+
+
+def test_oversized_request_is_rejected():
+    queues = [queue.Queue()]
+    receiver = WebhookReceiver(queues, path='/token', secret=None)
+
+    async def scenario():
+        server = await asyncio.start_server(receiver.handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'POST /token HTTP/1.1\r\nContent-Length: 104857600\r\n\r\n')
+            await writer.drain()
+            status = await asyncio.wait_for(reader.readline(), timeout=5)
+            writer.close()
+            return status
+
+    assert asyncio.run(scenario()).startswith(b'HTTP/1.1 413')
+    assert receiver.rejected == 1
+    assert queues[0].empty()
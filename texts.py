@@ -1,4 +1,6 @@
 # texts.py
+from types import MappingProxyType
+
 TEXTS = {
     'ar': {
         'welcome': "🎉 مرحباً بك في بوت إدارة الجروبات المتطور!\n\n🤖 هذا البوت يساعدك في إدارة جروباتك تلقائياً مع نظام الاشتراك الإجباري في القنوات.",
@@ -7,7 +9,7 @@ TEXTS = {
         'add_group': "📝 لإضافة جروب جديد:\n\n1. أضف البوت كأدمن في الجروب\n2. امنحه صلاحية حذف الرسائل\n3. أرسل معرف الجروب أو الرابط",
         'enter_group_username': "🔗 أرسل معرف الجروب (مثال: @group_username) أو الرابط:",
         'group_added_success': "✅ تم إضافة الجروب بنجاح!\n\n📝 الآن قم بإعداد الكلمة المفتاحية للجروب:",
-        'enter_keyword': "🔑 أرسل الكلمة المفتاحية للجروب (سيتم مراقبة الرسائل التي تحتوي على هذه الكلمة):",
+        'enter_keyword': "🔑 أرسل الكلمة المفتاحية للجروب (سيتم مراقبة الرسائل التي تحتوي على هذه الكلمة).\nيمكنك إرسال عدة كلمات مفصولة بفاصلة:",
         'keyword_set_success': "✅ تم تعيين الكلمة المفتاحية بنجاح!\n\n📢 هل تريد إضافة قناة مخصصة للاشتراك الإجباري؟",
         'add_channel_question': "📢 هل تريد إضافة قناة مخصصة للاشتراك الإجباري؟\n\nإذا كنت تريد استخدام القناة الافتراضية فقط، اضغط 'تخطي'",
         'enter_channel_username': "🔗 أرسل معرف القناة (مثال: @channel_username):",
@@ -21,6 +23,18 @@ TEXTS = {
         'stats_groups': "👥 الجروبات النشطة: {active_groups}",
         'stats_deleted': "🗑️ الرسائل المحذوفة: {deleted_messages}",
         'stats_users': "👤 المستخدمين: {total_users}",
+        'group_stats_choose': "📈 اختر الجروب لعرض إحصائياته:",
+        'group_stats': "📈 إحصائيات {group_name}:\n\n",
+        'group_stats_totals': "🗑️ إجمالي المحذوف: {total}\n🕐 آخر 24 ساعة: {last_24h}\n📅 آخر 7 أيام: {last_7d}\n",
+        'group_stats_reasons': "\n📌 الأسباب:\n",
+        'group_stats_reason_item': "   • {reason}: {count} ({share:.0%})\n",
+        'reason_not_subscribed': "غير مشترك في القناة",
+        'reason_no_username': "بدون username",
+        'group_stats_offenders': "\n🚫 أكثر المخالفين:\n",
+        'group_stats_offender_item': "   {rank}. {user_name} ({user_id}): {count}\n",
+        'group_stats_empty': "لا توجد رسائل محذوفة في هذا الجروب بعد.",
+        'group_stats_no_groups': "❌ لا توجد جروبات نشطة أنت أدمن فيها.",
+        'group_stats_not_admin': "❌ إحصائيات الجروب متاحة لأدمن الجروب فقط.",
         'check_subscription': "🔍 تحقق من اشتراكك في القناة المطلوبة:",
         'not_subscribed': "❌ **عذراً!**\n\nيجب عليك الاشتراك في القناة التالية أولاً:\n{channel}\n\nبعد الاشتراك، اضغط على زر 'تحقق من الاشتراك'",
         'subscribed': "✅ **مبروك!**\n\nأنت مشترك في القناة المطلوبة.\nيمكنك الآن استخدام البوت.",
@@ -32,6 +46,7 @@ TEXTS = {
         'back_to_main': "↩️ العودة إلى القائمة الرئيسية",
         'subscription_warning': "⚠️ **تنبيه!**\n\nعزيزي {user_name}، يجب عليك الاشتراك في القناة التالية:\n{channel}\n\nسيتم حذف رسالتك خلال 3 دقائق.",
         'no_username_warning': "⚠️ **تنبيه!**\n\nعزيزي {user_name}، يجب أن يكون لديك @username في حسابك لإرسال الرسائل في هذا الجروب.",
+        'warning_repeat_count': "🔁 عدد الرسائل المحذوفة: {count}",
         'message_deleted': "🗑️ **تم حذف الرسالة**\n\nالسبب: {reason}",
         'bot_not_admin': "❌ البوت ليس أدمن في الجروب! يرجى إضافة البوت كأدمن مع صلاحية حذف الرسائل.",
         'invalid_group': "❌ رابط الجروب غير صحيح! تأكد من إرسال معرف الجروب أو الرابط بشكل صحيح.",
@@ -45,7 +60,7 @@ TEXTS = {
         'add_group': "📝 To add a new group:\n\n1. Add bot as admin in the group\n2. Give it delete messages permission\n3. Send group username or link",
         'enter_group_username': "🔗 Send group username (e.g., @group_username) or link:",
         'group_added_success': "✅ Group added successfully!\n\n📝 Now set the keyword for the group:",
-        'enter_keyword': "🔑 Send the group keyword (messages containing this word will be monitored):",
+        'enter_keyword': "🔑 Send the group keyword (messages containing this word will be monitored).\nYou can send several keywords separated by commas:",
         'keyword_set_success': "✅ Keyword set successfully!\n\n📢 Do you want to add a custom channel for mandatory subscription?",
         'add_channel_question': "📢 Do you want to add a custom channel for mandatory subscription?\n\nIf you want to use only the default channel, click 'Skip'",
         'enter_channel_username': "🔗 Send channel username (e.g., @channel_username):",
@@ -59,6 +74,18 @@ TEXTS = {
         'stats_groups': "👥 Active Groups: {active_groups}",
         'stats_deleted': "🗑️ Deleted Messages: {deleted_messages}",
         'stats_users': "👤 Users: {total_users}",
+        'group_stats_choose': "📈 Choose a group to view its statistics:",
+        'group_stats': "📈 Statistics for {group_name}:\n\n",
+        'group_stats_totals': "🗑️ Total deleted: {total}\n🕐 Last 24 hours: {last_24h}\n📅 Last 7 days: {last_7d}\n",
+        'group_stats_reasons': "\n📌 Reasons:\n",
+        'group_stats_reason_item': "   • {reason}: {count} ({share:.0%})\n",
+        'reason_not_subscribed': "Not subscribed to the channel",
+        'reason_no_username': "No username",
+        'group_stats_offenders': "\n🚫 Top offenders:\n",
+        'group_stats_offender_item': "   {rank}. {user_name} ({user_id}): {count}\n",
+        'group_stats_empty': "No deleted messages in this group yet.",
+        'group_stats_no_groups': "❌ There are no active groups where you are an admin.",
+        'group_stats_not_admin': "❌ Group statistics are available to the group's admins only.",
         'check_subscription': "🔍 Check your subscription to the required channel:",
         'not_subscribed': "❌ **Sorry!**\n\nYou must subscribe to the following channel first:\n{channel}\n\nAfter subscribing, click the 'Check Subscription' button",
         'subscribed': "✅ **Congratulations!**\n\nYou are subscribed to the required channel.\nYou can now use the bot.",
@@ -70,6 +97,7 @@ TEXTS = {
         'back_to_main': "↩️ Back to main menu",
         'subscription_warning': "⚠️ **Warning!**\n\nDear {user_name}, you must subscribe to the following channel:\n{channel}\n\nYour message will be deleted in 3 minutes.",
         'no_username_warning': "⚠️ **Warning!**\n\nDear {user_name}, you must have @username in your account to send messages in this group.",
+        'warning_repeat_count': "🔁 Messages deleted: {count}",
         'message_deleted': "🗑️ **Message Deleted**\n\nReason: {reason}",
         'bot_not_admin': "❌ Bot is not admin in the group! Please add bot as admin with delete messages permission.",
         'invalid_group': "❌ Invalid group link! Make sure to send group username or link correctly.",
@@ -90,7 +118,18 @@ TEXTS = {
     }
 }
 
+def _build_catalog():
+    """دمج نصوص كل لغة فوق العربية مرة واحدة (المفاتيح الناقصة في ru/fr تؤخذ من ar)"""
+    return {
+        language: MappingProxyType({**TEXTS['ar'], **texts})
+        for language, texts in TEXTS.items()
+    }
+
+
+# النصوص المحلولة لكل لغة، مشتركة وغير قابلة للتعديل
+CATALOG = MappingProxyType(_build_catalog())
+
 def get_text(language, key, **kwargs):
     """الحصول على النص بناءً على اللغة والمفتاح"""
-    text = TEXTS.get(language, TEXTS['ar']).get(key, TEXTS['ar'].get(key, key))
+    text = CATALOG.get(language, CATALOG['ar']).get(key, key)
     return text.format(**kwargs) if kwargs else text
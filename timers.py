@@ -0,0 +1,75 @@
+# timers.py
+import time
+import asyncio
+import logging
+
+from config import DELETION_TIMER_BATCH_SIZE, DELETION_TIMER_MAX_SLEEP
+
+
+class DeletionTimer:
+    """مؤقت واحد لعمليات الحذف المؤجلة المحفوظة في قاعدة البيانات"""
+
+    def __init__(self, db, deleter, batch_size=DELETION_TIMER_BATCH_SIZE, max_sleep=DELETION_TIMER_MAX_SLEEP):
+        self.db = db
+        self.deleter = deleter
+        self.batch_size = batch_size
+        self.max_sleep = max_sleep
+        self._next_due = None
+        self._wakeup = None
+        self._task = None
+
+        # إحصائيات
+        self.scheduled = 0
+        self.fired = 0
+
+    async def schedule(self, chat_id, message_id, delay):
+        """جدولة حذف رسالة بعد تأخير (يبقى محفوظاً بعد إعادة التشغيل)"""
+        due_at = time.time() + delay
+        if not await self.db.schedule_deletion(chat_id, message_id, due_at):
+            return False
+        self.scheduled += 1
+        if self._wakeup is not None and (self._next_due is None or due_at < self._next_due):
+            self._wakeup.set()
+        return True
+
+    async def start(self):
+        """تشغيل المؤقت؛ أول دورة تلتقط الحذف الفائت أثناء توقف البوت"""
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.fire_due()
+            except Exception as e:
+                logging.error(f"❌ Error processing scheduled deletions: {e}")
+
+            self._next_due = await self.db.next_deletion_due()
+            timeout = self.max_sleep
+            if self._next_due is not None:
+                timeout = min(timeout, max(0.0, self._next_due - time.time()))
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def fire_due(self):
+        """تسليم كل عمليات الحذف المستحقة إلى مجدول الحذف على دفعات"""
+        while True:
+            due = await self.db.pop_due_deletions(time.time(), self.batch_size)
+            for chat_id, message_id in due:
+                self.deleter.schedule(chat_id, message_id)
+            self.fired += len(due)
+            if len(due) < self.batch_size:
+                return
@@ -0,0 +1,147 @@
+# tracing.py
+"""تتبع مراحل التحديثات بالعينة وسجل التحديثات البطيئة
+
+كل تحديث مختار يقيس زمن كل مرحلة بالتتابع (trace.lap) ثم يسجل المدد في نوافذ
+لكل مرحلة. التحديثات غير المختارة تأخذ NULL_TRACE الذي لا يفعل شيئاً.
+"""
+import json
+import time
+import random
+import logging
+from collections import deque
+
+from config import TRACE_SAMPLE_RATE, TRACE_SLOW_THRESHOLD, TRACE_WINDOW
+
+TOTAL = 'total'
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+class _NullTrace:
+    """تتبع فارغ للتحديثات غير المختارة"""
+
+    __slots__ = ()
+
+    def lap(self, phase):
+        pass
+
+    def finish(self):
+        pass
+
+
+NULL_TRACE = _NullTrace()
+
+
+class Trace:
+    """مدد مراحل تحديث واحد"""
+
+    __slots__ = ('tracer', 'name', 'update', 'started_at', 'marked_at', 'phases')
+
+    def __init__(self, tracer, name, update):
+        self.tracer = tracer
+        self.name = name
+        self.update = update
+        self.started_at = self.marked_at = time.perf_counter()
+        self.phases = []
+
+    def lap(self, phase):
+        """إنهاء المرحلة الحالية (الزمن منذ آخر علامة)"""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.marked_at))
+        self.marked_at = now
+
+    def finish(self):
+        self.tracer.record(self, time.perf_counter() - self.started_at)
+
+
+class Tracer:
+    """اختيار عينة من التحديثات وتجميع زمن كل مرحلة"""
+
+    def __init__(self, sample_rate=TRACE_SAMPLE_RATE, slow_threshold=TRACE_SLOW_THRESHOLD,
+                 window=TRACE_WINDOW, rng=random.random):
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.window = window
+        self.rng = rng
+        # المرحلة -> [آخر المدد، المجموع، العدد]
+        self._phases = {}
+
+        # إحصائيات
+        self.sampled = 0
+        self.slow = 0
+
+    def start(self, name, update):
+        """بدء تتبع تحديث إن وقع في العينة"""
+        if not self.sample_rate or self.rng() >= self.sample_rate:
+            return NULL_TRACE
+        return Trace(self, name, update)
+
+    def record(self, trace, total):
+        """تجميع مدد تحديث منتهٍ وتسجيله إن كان بطيئاً"""
+        self.sampled += 1
+        for phase, duration in trace.phases + [(TOTAL, total)]:
+            entry = self._phases.get((trace.name, phase))
+            if entry is None:
+                entry = self._phases[(trace.name, phase)] = [deque(maxlen=self.window), 0.0, 0]
+            entry[0].append(duration)
+            entry[1] += duration
+            entry[2] += 1
+
+        if total >= self.slow_threshold:
+            self.slow += 1
+            phases = {}
+            for phase, duration in trace.phases:
+                phases[phase] = round(phases.get(phase, 0.0) + duration * 1000, 3)
+            update = trace.update
+            logging.warning("🐢 Slow update " + json.dumps({
+                'handler': trace.name,
+                'update_id': update.update_id,
+                'chat_id': update.effective_chat.id if update.effective_chat else None,
+                'user_id': update.effective_user.id if update.effective_user else None,
+                'total_ms': round(total * 1000, 3),
+                'phases_ms': phases
+            }, ensure_ascii=False))
+
+    def percentiles(self):
+        """النسب المئوية لكل مرحلة من آخر window عينة"""
+        result = {}
+        for (name, phase), (durations, total, count) in self._phases.items():
+            values = sorted(durations)
+            result[(name, phase)] = {
+                'count': count,
+                'sum': total,
+                'max': values[-1] if values else 0.0,
+                'quantiles': {q: percentile(values, q) for q in QUANTILES}
+            }
+        return result
+
+    def dump(self):
+        """تسجيل جدول النسب المئوية للمراحل"""
+        logging.info(
+            f"🔬 Traces: {self.sampled} sampled (rate {self.sample_rate:.2%}), "
+            f"{self.slow} slower than {self.slow_threshold * 1000:.0f}ms"
+        )
+        for (name, phase), stats in sorted(self.percentiles().items()):
+            quantiles = ', '.join(
+                f"p{q * 100:g} {value * 1000:.2f}ms" for q, value in stats['quantiles'].items()
+            )
+            logging.info(
+                f"🔬 {name}.{phase}: {stats['count']} samples, {quantiles}, max {stats['max'] * 1000:.2f}ms"
+            )
+
+    def reset(self):
+        self._phases.clear()
+        self.sampled = 0
+        self.slow = 0
+
+    def stats(self):
+        """إحصائيات المتتبع"""
+        return {
+            'sampled': self.sampled,
+            'slow': self.slow,
+            'sample_rate': self.sample_rate
+        }
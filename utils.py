@@ -3,13 +3,28 @@ import re
 import logging
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from texts import get_text
+from cache import TTLCache
+from config import (
+    SUBSCRIPTION_CACHE_TTL, SUBSCRIPTION_CACHE_NEGATIVE_TTL, SUBSCRIPTION_CACHE_MAX_ENTRIES
+)
 
-def create_main_menu_keyboard(language='ar'):
-    """إنشاء لوحة المفاتيح الرئيسية"""
+# ذاكرة مؤقتة لحالة الاشتراك بمفتاح (القناة، المستخدم)
+subscription_cache = TTLCache(
+    max_entries=SUBSCRIPTION_CACHE_MAX_ENTRIES,
+    ttl=SUBSCRIPTION_CACHE_TTL
+)
+
+# اللوحات الثابتة تبنى مرة واحدة لكل لغة عند الاستيراد وتشارك بين كل الردود
+# (InlineKeyboardMarkup غير قابل للتعديل بعد الإنشاء)
+
+def _build_main_menu_keyboard(language):
     keyboard = [
         [InlineKeyboardButton("📝 إضافة جروب", callback_data="add_group")],
         [InlineKeyboardButton("👥 الجروبات النشطة", callback_data="active_groups")],
-        [InlineKeyboardButton("📊 الإحصائيات", callback_data="stats")],
+        [
+            InlineKeyboardButton("📊 الإحصائيات", callback_data="stats"),
+            InlineKeyboardButton("📈 إحصائيات الجروبات", callback_data="group_stats")
+        ],
         [
             InlineKeyboardButton("🔍 تحقق من الاشتراك", callback_data="check_subscription"),
             InlineKeyboardButton("🌐 اللغة", callback_data="change_language")
@@ -21,7 +36,10 @@ def create_main_menu_keyboard(language='ar'):
         keyboard = [
             [InlineKeyboardButton("📝 Add Group", callback_data="add_group")],
             [InlineKeyboardButton("👥 Active Groups", callback_data="active_groups")],
-            [InlineKeyboardButton("📊 Statistics", callback_data="stats")],
+            [
+                InlineKeyboardButton("📊 Statistics", callback_data="stats"),
+                InlineKeyboardButton("📈 Group Statistics", callback_data="group_stats")
+            ],
             [
                 InlineKeyboardButton("🔍 Check Subscription", callback_data="check_subscription"),
                 InlineKeyboardButton("🌐 Language", callback_data="change_language")
@@ -31,8 +49,7 @@ def create_main_menu_keyboard(language='ar'):
     
     return InlineKeyboardMarkup(keyboard)
 
-def create_language_keyboard():
-    """إنشاء لوحة اختيار اللغة"""
+def _build_language_keyboard():
     keyboard = [
         [
             InlineKeyboardButton("🇸🇦 العربية", callback_data="lang_ar"),
@@ -46,14 +63,17 @@ def create_language_keyboard():
     ]
     return InlineKeyboardMarkup(keyboard)
 
-def create_back_keyboard(language='ar'):
-    """إنشاء زر الرجوع فقط"""
+def _build_back_button(language):
     back_text = "↩️ رجوع" if language == 'ar' else "↩️ Back"
-    keyboard = [[InlineKeyboardButton(back_text, callback_data="back_to_main")]]
-    return InlineKeyboardMarkup(keyboard)
+    return InlineKeyboardButton(back_text, callback_data="back_to_main")
 
-def create_yes_no_keyboard(language='ar'):
-    """إنشاء لوحة نعم/لا"""
+def _build_recheck_keyboard():
+    return InlineKeyboardMarkup([[
+        InlineKeyboardButton("🔍 تحقق مرة أخرى", callback_data="check_subscription"),
+        InlineKeyboardButton("↩️ رجوع", callback_data="back_to_main")
+    ]])
+
+def _build_yes_no_keyboard(language):
     if language == 'ar':
         keyboard = [
             [
@@ -72,6 +92,42 @@ def create_yes_no_keyboard(language='ar'):
         ]
     return InlineKeyboardMarkup(keyboard)
 
+_MAIN_MENU_KEYBOARDS = {language: _build_main_menu_keyboard(language) for language in ('ar', 'en')}
+_BACK_BUTTONS = {language: _build_back_button(language) for language in ('ar', 'en')}
+_BACK_KEYBOARDS = {language: InlineKeyboardMarkup([[button]]) for language, button in _BACK_BUTTONS.items()}
+_YES_NO_KEYBOARDS = {language: _build_yes_no_keyboard(language) for language in ('ar', 'en')}
+_LANGUAGE_KEYBOARD = _build_language_keyboard()
+_RECHECK_KEYBOARD = _build_recheck_keyboard()
+
+def create_main_menu_keyboard(language='ar'):
+    """إنشاء لوحة المفاتيح الرئيسية (العربية لكل اللغات عدا الإنجليزية)"""
+    return _MAIN_MENU_KEYBOARDS['en' if language == 'en' else 'ar']
+
+def create_language_keyboard():
+    """إنشاء لوحة اختيار اللغة"""
+    return _LANGUAGE_KEYBOARD
+
+def create_back_keyboard(language='ar'):
+    """إنشاء زر الرجوع فقط (الإنجليزية لكل اللغات عدا العربية)"""
+    return _BACK_KEYBOARDS['ar' if language == 'ar' else 'en']
+
+def create_recheck_keyboard():
+    """إنشاء لوحة إعادة التحقق من الاشتراك"""
+    return _RECHECK_KEYBOARD
+
+def create_group_stats_keyboard(groups, language='ar'):
+    """إنشاء قائمة الجروبات لاختيار عرض إحصائياتها"""
+    keyboard = [
+        [InlineKeyboardButton(group['group_username'], callback_data=f"gstats:{group['group_username']}")]
+        for group in groups
+    ]
+    keyboard.append([_BACK_BUTTONS['ar' if language == 'ar' else 'en']])
+    return InlineKeyboardMarkup(keyboard)
+
+def create_yes_no_keyboard(language='ar'):
+    """إنشاء لوحة نعم/لا (الإنجليزية لكل اللغات عدا العربية)"""
+    return _YES_NO_KEYBOARDS['ar' if language == 'ar' else 'en']
+
 def extract_username(text):
     """استخراج المعرف من النص"""
     # البحث عن معرفات مثل @username
@@ -86,24 +142,37 @@ def extract_username(text):
     
     return None
 
-async def check_subscription(bot, user_id, channel_username):
-    """التحقق من اشتراك المستخدم في القناة"""
+async def check_subscription(bot, user_id, channel_username, cache=subscription_cache, fresh=False):
+    """التحقق من اشتراك المستخدم في القناة
+
+    fresh يتجاوز الذاكرة المؤقتة (إعادة التحقق بطلب المستخدم) ويحدّث القيمة المخزنة.
+    """
+    key = (channel_username, user_id)
+    if cache is not None and not fresh:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
     try:
         chat_member = await bot.get_chat_member(channel_username, user_id)
-        return chat_member.status in ['member', 'administrator', 'creator']
     except Exception as e:
+        # لا نخزن الأخطاء حتى لا يستمر خطأ عابر في الـ API
         logging.error(f"❌ Error checking subscription: {e}")
         return False
 
-async def delete_message_with_delay(context, chat_id, message_id, delay=180):
-    """حذف الرسالة بعد تأخير"""
-    async def delete():
-        try:
-            await context.bot.delete_message(chat_id, message_id)
-        except Exception as e:
-            logging.error(f"❌ Error deleting message: {e}")
-    
-    context.job_queue.run_once(lambda _: delete(), delay)
+    is_subscribed = chat_member.status in ['member', 'administrator', 'creator']
+    if cache is not None:
+        cache.set(key, is_subscribed, ttl=None if is_subscribed else SUBSCRIPTION_CACHE_NEGATIVE_TTL)
+    return is_subscribed
+
+async def is_group_admin(bot, chat, user_id):
+    """هل المستخدم أدمن أو مالك في الجروب"""
+    try:
+        chat_member = await bot.get_chat_member(chat, user_id)
+    except Exception as e:
+        logging.error(f"❌ Error checking group admin: {e}")
+        return False
+    return chat_member.status in ['administrator', 'creator']
 
 def escape_markdown(text):
     """تهريب الأحرف الخاصة في Markdown"""
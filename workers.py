@@ -0,0 +1,316 @@
+# workers.py
+"""وضع العمليات المتعددة: مستقبل webhook خفيف يوزع التحديثات على عمليات عاملة
+
+الاستخدام:
+    WEBHOOK_URL=https://... WORKER_PROCESSES=4 python workers.py
+
+المستقبل يرد على تيليجرام فوراً ثم يرسل كل تحديث إلى العملية
+hash(chat_id) % WORKER_PROCESSES، فتبقى تحديثات الدردشة الواحدة في نفس
+العملية وبنفس الترتيب. كل عملية تشغل TelegramBot كاملاً بذاكرتها المؤقتة
+الخاصة وتشترك مع البقية في قاعدة البيانات.
+"""
+import json
+import time
+import signal
+import asyncio
+import logging
+import multiprocessing
+from collections import deque
+
+from config import (
+    BOT_TOKEN, BOT_API_URL, PORT, WEBHOOK_URL, WEBHOOK_SECRET, WORKER_PROCESSES, METRICS_PORT,
+    WORKER_CHECK_INTERVAL, WORKER_MAX_RESTARTS
+)
+from minihttp import read_request, write_response, RequestTooLarge
+
+# فترة تسجيل إحصائيات المستقبل (بالثواني)
+STATS_INTERVAL = 600
+
+# مفاتيح التحديث التي تحمل رسالة (ومنها نأخذ الدردشة)
+MESSAGE_KEYS = ('message', 'edited_message', 'channel_post', 'edited_channel_post')
+# مفاتيح التحديث التي تحمل الدردشة مباشرة
+CHAT_KEYS = ('my_chat_member', 'chat_member', 'chat_join_request')
+
+
+def update_chat_id(data):
+    """رقم الدردشة من تحديث JSON خام بدون بناء كائن Update"""
+    for key in MESSAGE_KEYS + CHAT_KEYS:
+        if key in data:
+            return data[key].get('chat', {}).get('id', 0)
+    query = data.get('callback_query')
+    if query is not None:
+        if 'message' in query:
+            return query['message']['chat']['id']
+        return query['from']['id']
+    # التحديثات بدون دردشة (inline، poll...) توزع حسب المستخدم إن وجد
+    for value in data.values():
+        if isinstance(value, dict) and 'from' in value:
+            return value['from']['id']
+    return 0
+
+
+def run_worker(index, queue, workers):
+    """نقطة دخول العملية العاملة"""
+    # الإيقاف يأتي من المستقبل عبر الطابور وليس من Ctrl+C
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(
+        format=f'%(asctime)s - worker {index} - %(name)s - %(levelname)s - %(message)s',
+        level=logging.INFO
+    )
+    from bot import TelegramBot
+
+    # كل عملية تعرض مقاييسها على منفذ مستقل بعد METRICS_PORT
+    bot = TelegramBot(
+        maintenance=index == 0,
+        metrics_port=METRICS_PORT + index if METRICS_PORT else 0,
+        catch_up=False,
+        workers=workers
+    )
+    asyncio.run(serve_queue(bot, queue))
+
+
+async def serve_queue(bot, queue):
+    """تمرير التحديثات من طابور العملية إلى Application حتى وصول إشارة الإيقاف"""
+    from telegram import Update
+
+    application = bot.application
+    loop = asyncio.get_running_loop()
+    async with application:
+        await bot.post_init(application)
+        await application.start()
+        try:
+            while True:
+                data = await loop.run_in_executor(None, queue.get)
+                if data is None:
+                    break
+                await application.update_queue.put(Update.de_json(data, application.bot))
+        finally:
+            await application.stop()
+            await bot.post_stop(application)
+    await bot.post_shutdown(application)
+
+
+class WorkerSupervisor:
+    """تشغيل العمليات العاملة وإعادة تشغيل أي عملية تتوقف
+
+    العملية المتوقفة قد تكون ما زالت تحمل قفل القراءة في طابورها، لذلك تبدأ
+    البديلة بطابور جديد. القائمة queues نفسها مشتركة مع WebhookReceiver.
+    """
+
+    def __init__(self, workers, context=None, target=run_worker, max_restarts=WORKER_MAX_RESTARTS,
+                 window=60):
+        # spawn: كل عملية تفتح اتصالاتها بنفسها بدلاً من وراثة اتصالات الأب
+        self.context = context or multiprocessing.get_context('spawn')
+        self.workers = workers
+        self.target = target
+        self.max_restarts = max_restarts
+        self.window = window
+        self.queues = [self.context.Queue() for _ in range(workers)]
+        self.processes = [None] * workers
+        self._recent = deque()
+
+        # إحصائيات
+        self.restarts = 0
+        self.dropped = 0
+
+    def start(self):
+        for index in range(self.workers):
+            self._spawn(index)
+
+    def _spawn(self, index):
+        process = self.context.Process(
+            target=self.target, args=(index, self.queues[index], self.workers), name=f"worker-{index}"
+        )
+        process.start()
+        self.processes[index] = process
+
+    def check(self):
+        """إعادة تشغيل العمليات المتوقفة، ويعيد False إذا تجاوزت إعادات التشغيل الحد"""
+        now = time.monotonic()
+        for index, process in enumerate(self.processes):
+            if process.is_alive():
+                continue
+            old = self.queues[index]
+            try:
+                lost = old.qsize()
+            except NotImplementedError:
+                lost = 0
+            logging.error(
+                f"❌ Worker {index} exited with code {process.exitcode}, restarting "
+                f"({lost} queued updates dropped)"
+            )
+            old.cancel_join_thread()
+            old.close()
+            self.queues[index] = self.context.Queue()
+            self._spawn(index)
+            self.restarts += 1
+            self.dropped += lost
+            self._recent.append(now)
+
+        while self._recent and now - self._recent[0] > self.window:
+            self._recent.popleft()
+        return len(self._recent) <= self.max_restarts
+
+    def stop(self):
+        """إرسال إشارة الإيقاف لكل العمليات وانتظارها"""
+        for queue in self.queues:
+            queue.put(None)
+        for process in self.processes:
+            if process is not None:
+                process.join()
+
+    def stats(self):
+        """إحصائيات العمليات العاملة"""
+        return {
+            'alive': sum(1 for process in self.processes if process is not None and process.is_alive()),
+            'restarts': self.restarts,
+            'dropped': self.dropped
+        }
+
+
+class WebhookReceiver:
+    """خادم HTTP صغير يستقبل تحديثات webhook ويوزعها على طوابير العمليات"""
+
+    def __init__(self, queues, path=f"/{BOT_TOKEN}", secret=WEBHOOK_SECRET):
+        self.queues = queues
+        self.path = path
+        self.secret = secret
+
+        # إحصائيات
+        self.received = 0
+        self.rejected = 0
+        self.routed = [0] * len(queues)
+
+    def route(self, body):
+        """تحويل جسم الطلب إلى تحديث ووضعه في طابور العملية المسؤولة عن دردشته"""
+        try:
+            data = json.loads(body)
+            index = hash(update_chat_id(data)) % len(self.queues)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            logging.error(f"❌ Invalid webhook update: {e}")
+            return
+        self.queues[index].put(data)
+        self.routed[index] += 1
+
+    async def handle(self, reader, writer):
+        """خدمة طلبات اتصال واحد (تيليجرام يعيد استخدام الاتصالات)"""
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, _, headers, body = request
+
+                if method != 'POST' or path != self.path:
+                    status = '404 Not Found'
+                elif self.secret and headers.get('x-telegram-bot-api-secret-token') != self.secret:
+                    status = '403 Forbidden'
+                else:
+                    status = '200 OK'
+
+                # الرد قبل التوزيع حتى لا ينتظر تيليجرام العمليات العاملة
+                await write_response(writer, status)
+
+                if status == '200 OK':
+                    self.received += 1
+                    self.route(body)
+                else:
+                    self.rejected += 1
+        except RequestTooLarge as e:
+            logging.warning(f"⚠️ Webhook request rejected: {e}")
+            self.rejected += 1
+            try:
+                await write_response(writer, '413 Payload Too Large')
+            except ConnectionError:
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # إيقاف الخادم أثناء انتظار طلب جديد على اتصال مفتوح
+            pass
+        finally:
+            writer.close()
+
+    def stats(self):
+        """إحصائيات المستقبل"""
+        return {
+            'received': self.received,
+            'rejected': self.rejected,
+            'routed': list(self.routed),
+            'queue_depth': [queue.qsize() for queue in self.queues]
+        }
+
+
+async def set_webhook():
+    """تسجيل عنوان webhook لدى تيليجرام"""
+    from telegram import Bot, Update
+
+    async with Bot(BOT_TOKEN, base_url=BOT_API_URL or 'https://api.telegram.org/bot') as bot:
+        await bot.set_webhook(
+            url=f"{WEBHOOK_URL}/{BOT_TOKEN}",
+            allowed_updates=Update.ALL_TYPES,
+            secret_token=WEBHOOK_SECRET
+        )
+
+
+async def serve(receiver, supervisor, host='0.0.0.0', port=PORT):
+    """تشغيل المستقبل حتى SIGINT أو SIGTERM، ويعيد False إذا توقف بسبب تكرار توقف العمليات"""
+    await set_webhook()
+    server = await asyncio.start_server(receiver.handle, host, port)
+    logging.info(f"🚀 Webhook receiver on port {port} routing to {len(receiver.queues)} workers")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    async with server:
+        reported_at = time.monotonic()
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=WORKER_CHECK_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            if not supervisor.check():
+                # بدون رد 200 يحتفظ تيليجرام بالتحديثات ويعيد إرسالها بعد إعادة تشغيل البوت
+                logging.error(
+                    f"❌ Workers restarted more than {supervisor.max_restarts} times in "
+                    f"{supervisor.window}s, stopping the receiver"
+                )
+                return False
+            if time.monotonic() - reported_at >= STATS_INTERVAL:
+                reported_at = time.monotonic()
+                stats = receiver.stats()
+                workers = supervisor.stats()
+                logging.info(
+                    f"📥 Webhook: {stats['received']} updates, {stats['rejected']} rejected, "
+                    f"routed {stats['routed']}, queue depth {stats['queue_depth']}, "
+                    f"{workers['alive']} workers alive, {workers['restarts']} restarts"
+                )
+    return True
+
+
+def main(workers=WORKER_PROCESSES):
+    logging.basicConfig(
+        format='%(asctime)s - receiver - %(name)s - %(levelname)s - %(message)s',
+        level=logging.INFO
+    )
+    if not WEBHOOK_URL:
+        raise SystemExit("WEBHOOK_URL is required for multi-process mode")
+
+    # تطبيق الترحيلات مرة واحدة قبل تشغيل العمليات حتى لا تتسابق عليها
+    from storage import open_database
+    open_database().close()
+
+    supervisor = WorkerSupervisor(workers)
+    supervisor.start()
+    try:
+        ok = asyncio.run(serve(WebhookReceiver(supervisor.queues), supervisor))
+    finally:
+        supervisor.stop()
+    if not ok:
+        raise SystemExit("Workers keep crashing")
+
+
+if __name__ == "__main__":
+    main()